@@ -0,0 +1,12 @@
+# context_processors.py
+from django.utils.functional import SimpleLazyObject
+
+from .mixins import resolve_request_permissions
+
+
+def permissions(request):
+    """
+    Exposes the request's already-resolved permission set as ``user_permissions``
+    (used by the sidebar), without touching the database again.
+    """
+    return {"user_permissions": SimpleLazyObject(lambda: resolve_request_permissions(request))}
@@ -0,0 +1,49 @@
+# mixins.py
+from django.shortcuts import render
+
+from .models import Role
+from .utils import get_user_permissions, get_user_role
+
+
+def render_forbidden(request, message="🚫 Access denied: Superadmins only!"):
+    return render(request, "errors/forbidden_alert.html", {"message": message}, status=403)
+
+
+def resolve_request_permissions(request):
+    """
+    Attaches the user's permission set to ``request.permissions`` (resolved once per request).
+    """
+    if not hasattr(request, "permissions"):
+        request.permissions = get_user_permissions(request.user)
+    return request.permissions
+
+
+class PermissionRequiredMixin:
+    """
+    Declarative replacement for the per-view dispatch() permission checks.
+
+        class BookingListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+            permission_required = "view_bookings"
+
+    The check runs before any view work or ORM queries. Put it after
+    LoginRequiredMixin so anonymous users are redirected to the login page.
+    """
+    permission_required = None
+    permission_denied_message = "🚫 Access denied: Superadmins only!"
+
+    def has_permission(self):
+        return self.permission_required in resolve_request_permissions(self.request)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.has_permission():
+            return render_forbidden(request, self.permission_denied_message)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class SuperadminRequiredMixin(PermissionRequiredMixin):
+    """
+    For the pages that manage subadmins: gated on the role, not on a permission code.
+    """
+
+    def has_permission(self):
+        return self.request.user.is_authenticated and get_user_role(self.request.user) == Role.SUPERADMIN
@@ -0,0 +1,19 @@
+# signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Role, RolePermissions
+from .utils import invalidate_permission_cache
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=RolePermissions)
+def role_permissions_changed(sender, **kwargs):
+    """
+    Invalidate cached roles/permissions whenever they are written
+    (ManageSubadminPermissionsView, RolePermissionsAdmin, CreateSubadminView...).
+    Bump again on commit so no worker re-caches the pre-commit value.
+    """
+    invalidate_permission_cache()
+    transaction.on_commit(invalidate_permission_cache)
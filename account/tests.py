@@ -1,3 +1,106 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from tricksy.constants import PERMISSIONS
+
+from .models import Role, RolePermissions
+from .utils import get_user_permissions, invalidate_permission_cache, user_has_access
+
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="sub", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUBADMIN)
+        RolePermissions.objects.create(role=Role.SUBADMIN, permissions=["view_bookings"])
+        self.client.login(username="sub", password="pass")
+
+    def permission_queries(self, queries):
+        return [
+            q["sql"] for q in queries
+            if "role_permissions" in q["sql"] or "user_roles" in q["sql"]
+        ]
+
+    def test_warm_request_issues_no_permission_queries(self):
+        url = reverse("booking:list")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.permission_queries(ctx.captured_queries), [])
+
+    def test_permission_set_resolved_once_per_request(self):
+        user = User.objects.get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(user_has_access(user, "view_bookings"))
+            self.assertFalse(user_has_access(user, "manage_bookings"))
+            self.assertTrue(user_has_access(user, "view_bookings"))
+        self.assertLessEqual(len(self.permission_queries(ctx.captured_queries)), 2)
+
+    def test_saving_permissions_invalidates_cache(self):
+        url = reverse("booking:list")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        role_permissions = RolePermissions.objects.get(role=Role.SUBADMIN)
+        role_permissions.permissions = []
+        role_permissions.save()
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(get_user_permissions(User.objects.get(pk=self.user.pk)), frozenset())
+
+    def test_manage_permissions_view_invalidates_cache(self):
+        admin = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=admin, role=Role.SUPERADMIN)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(user_has_access(user, "manage_bookings"))
+
+        self.client.login(username="admin", password="pass")
+        self.client.post(reverse("account:manage_permissions"), {"permissions": ["manage_bookings"]})
+
+        self.assertTrue(user_has_access(User.objects.get(pk=self.user.pk), "manage_bookings"))
+
+
+class PermissionRequiredMixinTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="sub", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUBADMIN)
+        RolePermissions.objects.create(role=Role.SUBADMIN, permissions=["view_cleaners"])
+        self.client.login(username="sub", password="pass")
+
+    def test_allowed_view_runs(self):
+        # Cleaner views used to drop the response when the check passed.
+        self.assertEqual(self.client.get(reverse("cleaner:list")).status_code, 200)
+
+    def test_denied_view_short_circuits(self):
+        response = self.client.get(reverse("cleaner:create"))
+        self.assertEqual(response.status_code, 403)
+        self.assertTemplateUsed(response, "errors/forbidden_alert.html")
+
+    def test_anonymous_user_is_redirected_to_login(self):
+        self.client.logout()
+        response = self.client.get(reverse("booking:list"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_subadmin_pages_are_for_superadmins_only(self):
+        RolePermissions.objects.filter(role=Role.SUBADMIN).update(permissions=list(PERMISSIONS))
+        invalidate_permission_cache()
+        for name in ("account:create_subadmin", "account:manage_permissions"):
+            response = self.client.post(reverse(name), {"username": "new", "password": "pass", "permissions": []})
+            self.assertEqual(response.status_code, 403)
+            self.assertTemplateUsed(response, "errors/forbidden_alert.html")
+        self.assertFalse(User.objects.filter(username="new").exists())
+
+        admin = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=admin, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.assertEqual(self.client.get(reverse("account:create_subadmin")).status_code, 200)
+        self.client.post(reverse("account:create_subadmin"), {"username": "new", "password": "pass"})
+        self.assertTrue(Role.objects.filter(user__username="new", role=Role.SUBADMIN).exists())
@@ -1,9 +1,84 @@
 # utils.py
 from django.shortcuts import redirect
 from django.urls import reverse
+from tricksy.cache import bump_cache_version, get_cache_version
 from tricksy.constants import PERMISSIONS
 from account.models import Role, RolePermissions
 
+PERMISSION_CACHE_NAMESPACE = "role_permissions"
+
+# Process-level caches: {key: (namespace version, value)}
+_role_cache = {}
+_role_permissions_cache = {}
+
+
+def invalidate_permission_cache():
+    """
+    Drops every cached role and permission set, in this worker and all others.
+    """
+    bump_cache_version(PERMISSION_CACHE_NAMESPACE)
+    _role_cache.clear()
+    _role_permissions_cache.clear()
+
+
+def get_user_role(user, version=None):
+    """
+    Returns the user's role name (or None), cached per worker until invalidated.
+    """
+    if version is None:
+        version = get_cache_version(PERMISSION_CACHE_NAMESPACE)
+    cached = _role_cache.get(user.pk)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    role = Role.objects.filter(user_id=user.pk).values_list("role", flat=True).first()
+    _role_cache[user.pk] = (version, role)
+    return role
+
+
+def get_role_permissions(role, version=None):
+    """
+    Returns the frozenset of permission codes stored for ``role``.
+    """
+    if version is None:
+        version = get_cache_version(PERMISSION_CACHE_NAMESPACE)
+    cached = _role_permissions_cache.get(role)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    stored = RolePermissions.objects.filter(role=role).values_list("permissions", flat=True).first()
+    permissions = frozenset(stored or [])
+    _role_permissions_cache[role] = (version, permissions)
+    return permissions
+
+
+def get_user_permissions(user):
+    """
+    ✅ Resolves the permission set for ``user`` once per request.
+       - Superadmin → every permission
+       - Subadmin → RolePermissions for 'subadmin'
+       The result is memoized on the user object, which lives for one request.
+    """
+    permissions = getattr(user, "_permission_set", None)
+    if permissions is not None:
+        return permissions
+
+    if not user.is_authenticated:
+        permissions = frozenset()
+    else:
+        version = get_cache_version(PERMISSION_CACHE_NAMESPACE)
+        role = get_user_role(user, version)
+        if role is None:
+            permissions = frozenset()
+        elif role == Role.SUPERADMIN:
+            permissions = frozenset(PERMISSIONS)
+        else:
+            permissions = get_role_permissions(role, version)
+
+    user._permission_set = permissions
+    return permissions
+
+
 def user_has_access(user, permission_code):
     """
     ✅ Grants access based on role permissions.
@@ -14,17 +89,5 @@ def user_has_access(user, permission_code):
     # Step 1: If user not logged in → redirect to login page
     if not user.is_authenticated:
         return redirect(reverse('account:login'))  # make sure you have 'login' named URL
-    # if user doesn't have a role
-    if not hasattr(user, "role"):
-        return False
-
-    # Superadmin always has full access
-    if user.role.role == Role.SUPERADMIN:
-        return True
-
-    # Subadmin → check in RolePermissions model
-    try:
-        role_perms = RolePermissions.objects.get(role=Role.SUBADMIN)
-        return permission_code in (role_perms.permissions or [])
-    except RolePermissions.DoesNotExist:
-        return False
+
+    return permission_code in get_user_permissions(user)
@@ -4,7 +4,8 @@ from django.views.generic import ListView
 from django.shortcuts import render, redirect,get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import JsonResponse
+from .mixins import PermissionRequiredMixin, SuperadminRequiredMixin
 from .utils import user_has_access
 from django.contrib.auth.models import User
 from .models import Role, RolePermissions
@@ -22,20 +23,12 @@ def manage_services_view(request):
     # Your normal view logic
     return JsonResponse({"detail": "Service management allowed!"})
 
-class UserListView(LoginRequiredMixin, ListView):
+class UserListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = User
     template_name = "accounts/list.html"
     context_object_name = "users"
     paginate_by = 10  # Show 10 users per page
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_subadmins"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+    permission_required = "manage_subadmins"
 
     def get_queryset(self):
         queryset = User.objects.select_related("role").order_by("id")
@@ -105,21 +98,13 @@ class RegisterView(View):
     
 
 
-class CreateSubadminView(LoginRequiredMixin, View):
+class CreateSubadminView(LoginRequiredMixin, SuperadminRequiredMixin, View):
     template_name = "accounts/create_subadmin.html"
 
     def get(self, request):
-        # Only Superadmins can create Subadmins
-        if not hasattr(request.user, "role") or request.user.role.role != Role.SUPERADMIN:
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
         return render(request, self.template_name)
 
     def post(self, request):
-        if not hasattr(request.user, "role") or request.user.role.role != Role.SUPERADMIN:
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-
         username = request.POST.get("username")
         email = request.POST.get("email")
         password = request.POST.get("password")
@@ -142,15 +127,9 @@ class CreateSubadminView(LoginRequiredMixin, View):
         return redirect("account:list")  # Redirect to your user list page
 
 
-class ManageSubadminPermissionsView(LoginRequiredMixin, View):
+class ManageSubadminPermissionsView(LoginRequiredMixin, SuperadminRequiredMixin, View):
     template_name = "accounts/manage_permissions.html"
 
-    def dispatch(self, request, *args, **kwargs):
-        if not hasattr(request.user, "role") or request.user.role.role != Role.SUPERADMIN:
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """ ✅ Render permission management page for Subadmin """
         role_permissions, _ = RolePermissions.objects.get_or_create(role=Role.SUBADMIN)
@@ -0,0 +1,34 @@
+# assignments.py
+# Write path for a booking's cleaners: lock, diff, and write the changes in bulk.
+from cleaner.models import Cleaner
+from .models import BookingCleaner
+
+
+def lock_cleaners(cleaner_ids):
+    """
+    Row-locks the given cleaners (in pk order, so concurrent callers can't deadlock).
+    Two dispatchers putting the same cleaner on overlapping bookings are serialized here,
+    and the second one then sees the first one's assignment in its conflict check.
+    Call inside transaction.atomic().
+    """
+    return list(
+        Cleaner.objects.select_for_update().filter(pk__in=cleaner_ids).order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def replace_booking_cleaners(booking, cleaner_ids):
+    """
+    Makes ``cleaner_ids`` the booking's cleaners, touching only the rows that change:
+    one SELECT, at most one DELETE ... IN and one bulk INSERT.
+    Returns (added ids, removed ids). Call inside transaction.atomic() with the booking locked.
+    """
+    wanted = set(cleaner_ids)
+    current = set(BookingCleaner.objects.filter(booking=booking).values_list("cleaner_id", flat=True))
+    added = [cid for cid in cleaner_ids if cid not in current]
+    removed = sorted(current - wanted)
+
+    if removed:
+        BookingCleaner.objects.filter(booking=booking, cleaner_id__in=removed).delete()
+    if added:
+        BookingCleaner.objects.bulk_create([BookingCleaner(booking=booking, cleaner_id=cid) for cid in added])
+    return added, removed
@@ -0,0 +1,278 @@
+# autoassign.py
+# Automatic cleaner assignment for all unassigned bookings in a time window.
+#
+# Greedy interval partitioning: bookings are processed in start order; cleaners given a
+# job go into a min-heap keyed by the time they become free and return to the pool when
+# a later booking starts. For each booking we first look for a single team (same
+# vehicle_code, else same company) that can cover it, smallest team first, then fall
+# back to combining the largest teams. Free teams are kept bucketed by size (TeamPool), so
+# a booking only looks at the teams it tries: O((B + C) log C) plus the cleaners tried, and
+# thousands x thousands plans in well under a second.
+import bisect
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from cleaner.models import Cleaner
+from reports.rollups import schedule_rollups
+from search.index import index_ids
+from .availability import booking_cells, refresh_cells
+from .events import publish_events
+from .models import Booking, BookingCleaner, BookingEvent
+from .scheduling import overlapping_assignments
+
+
+def team_key(cleaner):
+    if cleaner.vehicle_code:
+        return ("vehicle", cleaner.vehicle_code.strip().upper())
+    if cleaner.company:
+        return ("company", cleaner.company.strip().upper())
+    return ("cleaner", cleaner.pk)
+
+
+class TeamPool:
+    """
+    The free cleaners by team, with the teams bucketed by their number of free members.
+    Cleaners leaving or rejoining move their team between buckets, so picking walks the
+    teams in size order without sorting them per booking. A cleaner can be held for
+    several reasons at once (a planned job, existing ones) and is free when none is left.
+    """
+
+    def __init__(self, cleaners):
+        self.cleaner_team = {c.pk: team_key(c) for c in cleaners}
+        self.members = defaultdict(dict)    # team -> {cleaner_id: None} (ordered set)
+        self.by_size = {}                   # free members -> {team: None}
+        self.sizes = []                     # sorted keys of by_size
+        self.held = defaultdict(int)        # cleaner_id -> reasons it is out of the pool
+        self.free_count = 0
+        for cleaner in cleaners:
+            self._add(cleaner.pk)
+
+    def _resize(self, team, old, new):
+        if old:
+            bucket = self.by_size[old]
+            del bucket[team]
+            if not bucket:
+                del self.by_size[old]
+                del self.sizes[bisect.bisect_left(self.sizes, old)]
+        if new:
+            if new not in self.by_size:
+                self.by_size[new] = {}
+                bisect.insort(self.sizes, new)
+            self.by_size[new][team] = None
+
+    def _add(self, cleaner_id):
+        team = self.cleaner_team[cleaner_id]
+        members = self.members[team]
+        members[cleaner_id] = None
+        self._resize(team, len(members) - 1, len(members))
+        self.free_count += 1
+
+    def _remove(self, cleaner_id):
+        team = self.cleaner_team[cleaner_id]
+        members = self.members[team]
+        del members[cleaner_id]
+        self._resize(team, len(members) + 1, len(members))
+        self.free_count -= 1
+
+    def hold(self, cleaner_id):
+        self.held[cleaner_id] += 1
+        if self.held[cleaner_id] == 1:
+            self._remove(cleaner_id)
+
+    def release(self, cleaner_id):
+        self.held[cleaner_id] -= 1
+        if not self.held[cleaner_id]:
+            self._add(cleaner_id)
+
+    def teams(self, smallest=1, largest_first=False):
+        """
+        Free members of each team with at least ``smallest`` of them, smallest team first.
+        """
+        sizes = self.sizes[bisect.bisect_left(self.sizes, smallest):]
+        for size in reversed(sizes) if largest_first else sizes:
+            for team in self.by_size[size]:
+                yield self.members[team]
+
+
+class AssignmentPlan:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.bookings = []              # bookings considered, in start order
+        self.cleaners = {}              # cleaner_id -> Cleaner
+        self.assignments = {}           # booking_id -> [cleaner_id, ...]
+        self.unfilled = {}              # booking_id -> cleaners required but not found
+
+    @property
+    def assigned_count(self):
+        return len(self.assignments)
+
+    def rows(self):
+        """
+        Preview rows: (booking, [cleaners], missing count).
+        """
+        for booking in self.bookings:
+            cleaner_ids = self.assignments.get(booking.pk, [])
+            yield booking, [self.cleaners[cid] for cid in cleaner_ids], self.unfilled.get(booking.pk, 0)
+
+
+class AutoAssigner:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    def unassigned_bookings(self, lock=False):
+        queryset = (
+            Booking.objects.filter(start_at__gte=self.start, start_at__lt=self.end)
+            .annotate(
+                # The stored total: no join to booking_services and no GROUP BY
+                required=F("required_cleaners"),
+                has_cleaners=Exists(BookingCleaner.objects.filter(booking=OuterRef("pk"))),
+            )
+            .filter(has_cleaners=False, required_cleaners__gt=0)
+            .select_related("customer")
+            .only("booking_reference", "start_at", "end_at", "customer__full_name", "customer__latitude", "customer__longitude")
+            .order_by("start_at", "pk")
+        )
+        if lock:
+            # Lock the rows themselves (no joins locked) before we write their assignments
+            locked_ids = list(
+                Booking.objects.select_for_update()
+                .filter(pk__in=[b.pk for b in queryset])
+                .values_list("pk", flat=True)
+            )
+            queryset = queryset.filter(pk__in=locked_ids)
+        return list(queryset)
+
+    def busy_intervals(self, bookings):
+        """
+        {cleaner_id: ([starts], [ends])} of existing assignments overlapping the plan window.
+        """
+        busy = defaultdict(list)
+        if not bookings:
+            return {}
+        window_start = bookings[0].start_at
+        window_end = max(b.end_at for b in bookings)
+        rows = overlapping_assignments(window_start, window_end).values_list(
+            "cleaner_id", "booking__start_at", "booking__end_at"
+        )
+        for cleaner_id, start_at, end_at in rows:
+            busy[cleaner_id].append((start_at, end_at))
+        intervals = {}
+        for cleaner_id, spans in busy.items():
+            spans.sort()
+            intervals[cleaner_id] = ([s for s, _ in spans], [e for _, e in spans])
+        return intervals
+
+    def build(self, lock=False):
+        plan = AssignmentPlan(self.start, self.end)
+        plan.bookings = self.unassigned_bookings(lock=lock)
+        cleaners = Cleaner.objects.filter(is_available=True).order_by("pk")
+        if lock:
+            # Same lock order as BookingAssignView, so manual and automatic assignment serialize
+            cleaners = cleaners.select_for_update()
+        cleaners = list(cleaners)
+        plan.cleaners = {c.pk: c for c in cleaners}
+        if not plan.bookings or not cleaners:
+            plan.unfilled = {b.pk: b.required for b in plan.bookings}
+            return plan
+
+        self.assign(plan, cleaners, self.busy_intervals(plan.bookings))
+        return plan
+
+    def assign(self, plan, cleaners, busy):
+        """
+        Fills ``plan.assignments``/``plan.unfilled`` for ``plan.bookings`` (in start order)
+        from ``cleaners``, given their existing ``busy`` intervals. No queries.
+        """
+        pool = TeamPool(cleaners)
+        released = []                   # heap of (free_at, cleaner_id) for held cleaners
+        # Existing jobs in start order; a cleaner is held while one covers the booking start
+        existing = sorted(
+            (start, end, cleaner_id)
+            for cleaner_id, (starts, ends) in busy.items() if cleaner_id in pool.cleaner_team
+            for start, end in zip(starts, ends)
+        )
+        next_existing = 0
+
+        def is_free(cleaner_id, start, end):
+            spans = busy.get(cleaner_id)
+            if not spans:
+                return True
+            starts, ends = spans
+            # Only intervals starting before our end can overlap; check those that end after our start
+            i = bisect.bisect_left(starts, end)
+            return not any(ends[j] > start for j in range(i - 1, -1, -1))
+
+        def pick(need, start, end):
+            # 1) One team that covers the whole booking, smallest team first
+            for members in pool.teams(smallest=need):
+                chosen = []
+                for cleaner_id in members:
+                    if is_free(cleaner_id, start, end):
+                        chosen.append(cleaner_id)
+                        if len(chosen) == need:
+                            return chosen
+            # 2) Otherwise combine teams, largest first
+            chosen = []
+            for members in pool.teams(largest_first=True):
+                for cleaner_id in members:
+                    if is_free(cleaner_id, start, end):
+                        chosen.append(cleaner_id)
+                        if len(chosen) == need:
+                            return chosen
+            return chosen
+
+        for booking in plan.bookings:
+            while released and released[0][0] <= booking.start_at:
+                pool.release(heapq.heappop(released)[1])
+            while next_existing < len(existing) and existing[next_existing][0] <= booking.start_at:
+                _, end, cleaner_id = existing[next_existing]
+                next_existing += 1
+                if end > booking.start_at:
+                    pool.hold(cleaner_id)
+                    heapq.heappush(released, (end, cleaner_id))
+
+            if pool.free_count < booking.required:
+                plan.unfilled[booking.pk] = booking.required
+                continue
+            chosen = pick(booking.required, booking.start_at, booking.end_at)
+            if len(chosen) < booking.required:
+                plan.unfilled[booking.pk] = booking.required
+                continue
+            for cleaner_id in chosen:
+                pool.hold(cleaner_id)
+                heapq.heappush(released, (booking.end_at, cleaner_id))
+            plan.assignments[booking.pk] = chosen
+
+
+def preview_assignments(start, end):
+    return AutoAssigner(start, end).build()
+
+
+@transaction.atomic
+def commit_assignments(start, end):
+    """
+    Rebuilds the plan with the window's bookings locked and writes every BookingCleaner
+    row in one transaction. Returns the plan that was written.
+    """
+    plan = AutoAssigner(start, end).build(lock=True)
+    BookingCleaner.objects.bulk_create([
+        BookingCleaner(booking_id=booking_id, cleaner_id=cleaner_id)
+        for booking_id, cleaner_ids in plan.assignments.items()
+        for cleaner_id in cleaner_ids
+    ], batch_size=1000)
+    bookings = {booking.pk: booking for booking in plan.bookings}
+    refresh_cells({
+        cell
+        for booking_id, cleaner_ids in plan.assignments.items()
+        for cell in booking_cells(bookings[booking_id], cleaner_ids)
+    })
+    schedule_rollups(booking_days={timezone.localdate(bookings[pk].start_at) for pk in plan.assignments})
+    index_ids(Booking, list(plan.assignments))
+    publish_events(BookingEvent.ASSIGNED, plan.assignments)
+    return plan
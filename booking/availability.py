@@ -0,0 +1,235 @@
+# availability.py
+# Cleaner availability index: a 48-bit bitset per cleaner per day (cleaner_day_slots), bit i
+# set when an assignment covers the i-th 30-minute slot. "Who is free from X to Y" is then
+# a few AND operations per cleaner on rows loaded by day, instead of a scan of
+# booking_cleaners joined to bookings. Writers wrap their changes in availability_changes().
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from tricksy.batching import chunked, iter_queryset_chunks
+from .choices import cleaner_choices
+from .models import BookingCleaner, CleanerDaySlots
+from .scheduling import overlapping_assignments
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOT_BYTES = SLOTS_PER_DAY // 8
+CHUNK_SIZE = 500
+
+
+def to_bytes(bits):
+    return bits.to_bytes(SLOT_BYTES, "little")
+
+
+def from_bytes(value):
+    return int.from_bytes(bytes(value), "little")
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def days_between(start_at, end_at):
+    """
+    Local days touched by [start_at, end_at).
+    """
+    day = timezone.localtime(start_at).date()
+    last = timezone.localtime(end_at - timedelta(microseconds=1)).date()
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def slot_mask(start_at, end_at, day):
+    """
+    Bits of ``day``'s slots that [start_at, end_at) overlaps, partially covered slots included.
+    """
+    origin = day_start(day)
+    first = max(start_at, origin) - origin
+    last = min(end_at, origin + timedelta(days=1)) - origin
+    if last <= first:
+        return 0
+    slot = timedelta(minutes=SLOT_MINUTES)
+    low = first // slot
+    high = min(-(-last // slot), SLOTS_PER_DAY)
+    return ((1 << high) - 1) ^ ((1 << low) - 1)
+
+
+def slot_label(index):
+    minutes = index * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+# --- Write side -------------------------------------------------------------------------------
+
+def assignment_cells(booking_ids, since=None):
+    """
+    {(cleaner_id, day)} covered by the current assignments of the given bookings
+    (a list or a values("pk") queryset), only from day ``since`` on if given.
+    """
+    rows = BookingCleaner.objects.filter(booking_id__in=booking_ids)
+    if since is not None:
+        rows = rows.filter(booking__end_at__gt=day_start(since))
+    return {
+        (cleaner_id, day)
+        for cleaner_id, start_at, end_at in rows.values_list("cleaner_id", "booking__start_at", "booking__end_at")
+        if start_at and end_at
+        for day in days_between(start_at, end_at)
+        if since is None or day >= since
+    }
+
+
+def booking_cells(booking, cleaner_ids):
+    """
+    {(cleaner_id, day)} that ``booking`` covers for the given cleaners, without a query.
+    """
+    if booking.start_at is None or booking.end_at is None:
+        booking.sync_schedule()
+    days = list(days_between(booking.start_at, booking.end_at))
+    return {(cleaner_id, day) for cleaner_id in cleaner_ids for day in days}
+
+
+def refresh_cells(cells):
+    """
+    Recomputes the given (cleaner_id, day) bitsets from the live assignments: one range
+    query per chunk of cleaners, one upsert and at most one DELETE for emptied days.
+    """
+    days_by_cleaner = defaultdict(set)
+    for cleaner_id, day in cells:
+        days_by_cleaner[cleaner_id].add(day)
+    for cleaner_ids in chunked(sorted(days_by_cleaner), CHUNK_SIZE):
+        wanted = {(cleaner_id, day) for cleaner_id in cleaner_ids for day in days_by_cleaner[cleaner_id]}
+        days = {day for _, day in wanted}
+        busy = dict.fromkeys(wanted, 0)
+        rows = overlapping_assignments(
+            day_start(min(days)), day_start(max(days) + timedelta(days=1)), cleaner_ids=cleaner_ids
+        ).values_list("cleaner_id", "booking__start_at", "booking__end_at")
+        for cleaner_id, start_at, end_at in rows:
+            for day in days_between(start_at, end_at):
+                if (cleaner_id, day) in busy:
+                    busy[cleaner_id, day] |= slot_mask(start_at, end_at, day)
+        _write_cells(busy)
+
+
+def _write_cells(busy):
+    filled = [
+        CleanerDaySlots(cleaner_id=cleaner_id, day=day, busy=to_bytes(bits))
+        for (cleaner_id, day), bits in busy.items() if bits
+    ]
+    if filled:
+        # INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE; MySQL takes no conflict target
+        unique_fields = ["cleaner", "day"] if connection.features.supports_update_conflicts_with_target else None
+        CleanerDaySlots.objects.bulk_create(
+            filled, update_conflicts=True, unique_fields=unique_fields, update_fields=["busy"]
+        )
+    emptied = defaultdict(list)
+    for (cleaner_id, day), bits in busy.items():
+        if not bits:
+            emptied[cleaner_id].append(day)
+    if emptied:
+        CleanerDaySlots.objects.filter(
+            reduce(or_, (Q(cleaner_id=cleaner_id, day__in=days) for cleaner_id, days in emptied.items()))
+        ).delete()
+
+
+@contextmanager
+def availability_changes(booking_ids, since=None):
+    """
+    Wrap writes to bookings' cleaners or schedule (or their deletion): the cells they covered
+    before and after are refreshed on exit, so removed cleaners and moved days are cleared too.
+    ``since`` limits the refresh to that day onwards.
+
+        with transaction.atomic(), availability_changes([booking.pk]):
+            booking = form.save()
+    """
+    before = assignment_cells(booking_ids, since)
+    yield
+    refresh_cells(before | assignment_cells(booking_ids, since))
+
+
+def rebuild_index(chunk_size=5000):
+    """
+    Recomputes every bitset from booking_cleaners (`manage.py rebuild_availability`).
+    Returns the number of cleaner-days written. Call inside transaction.atomic().
+    """
+    busy = defaultdict(int)
+    rows = BookingCleaner.objects.filter(booking__deleted_at__isnull=True).values(
+        "pk", "cleaner_id", "booking__start_at", "booking__end_at"
+    )
+    for chunk in iter_queryset_chunks(rows, chunk_size):
+        for row in chunk:
+            start_at, end_at = row["booking__start_at"], row["booking__end_at"]
+            if start_at and end_at:
+                for day in days_between(start_at, end_at):
+                    busy[row["cleaner_id"], day] |= slot_mask(start_at, end_at, day)
+    CleanerDaySlots.objects.all().delete()
+    CleanerDaySlots.objects.bulk_create(
+        [CleanerDaySlots(cleaner_id=cleaner_id, day=day, busy=to_bytes(bits))
+         for (cleaner_id, day), bits in busy.items() if bits],
+        batch_size=1000,
+    )
+    return len(busy)
+
+
+# --- Read side --------------------------------------------------------------------------------
+
+def load_busy(days):
+    """
+    {(cleaner_id, day): bits} for the given days; days without a row are free.
+    """
+    return {
+        (cleaner_id, day): from_bytes(bits)
+        for cleaner_id, day, bits in CleanerDaySlots.objects.filter(day__in=list(days)).values_list(
+            "cleaner_id", "day", "busy"
+        )
+    }
+
+
+def free_cleaners(start_at, end_at):
+    """
+    Available cleaners with no assignment overlapping [start_at, end_at):
+    one indexed query for the days' bitsets, then an AND per cleaner and day.
+    """
+    masks = {day: slot_mask(start_at, end_at, day) for day in days_between(start_at, end_at)}
+    busy = load_busy(masks)
+    return [
+        cleaner for cleaner in cleaner_choices().objects
+        if cleaner.is_available
+        and not any(busy.get((cleaner.pk, day), 0) & mask for day, mask in masks.items())
+    ]
+
+
+class AvailabilityGrid:
+    """
+    Free-cleaner counts for every slot of ``days`` consecutive days from ``start``.
+    """
+
+    def __init__(self, start, days=7):
+        self.days = [start + timedelta(days=offset) for offset in range(days)]
+        self.cleaners = [cleaner for cleaner in cleaner_choices().objects if cleaner.is_available]
+        busy = load_busy(self.days)
+        available = {cleaner.pk for cleaner in self.cleaners}
+        self.free_counts = {}
+        for day in self.days:
+            counts = [len(available)] * SLOTS_PER_DAY
+            for cleaner_id in available:
+                bits = busy.get((cleaner_id, day), 0)
+                while bits:
+                    low = bits & -bits
+                    counts[low.bit_length() - 1] -= 1
+                    bits ^= low
+            self.free_counts[day] = counts
+
+    def rows(self):
+        """
+        (slot label, [(day, free count), ...]) per slot, for the template.
+        """
+        for index in range(SLOTS_PER_DAY):
+            yield slot_label(index), [(day, self.free_counts[day][index]) for day in self.days]
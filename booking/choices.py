@@ -0,0 +1,16 @@
+# choices.py
+# Cached service/cleaner choices for the booking formsets (invalidated in booking.signals).
+from cleaner.models import Cleaner
+from service.models import Service
+from tricksy.choices import CachedChoices
+
+SERVICE_CHOICES_NAMESPACE = "service_choices"
+CLEANER_CHOICES_NAMESPACE = "cleaner_choices"
+
+
+def service_choices():
+    return CachedChoices(SERVICE_CHOICES_NAMESPACE, Service.objects.order_by("pk"))
+
+
+def cleaner_choices():
+    return CachedChoices(CLEANER_CHOICES_NAMESPACE, Cleaner.objects.order_by("pk"))
@@ -0,0 +1,144 @@
+# dashboard.py
+# KPIs for the dashboard (booking:home). Computed with a fixed handful of aggregate queries,
+# mostly over the report rollups, and cached for a few seconds: any number of staff
+# reloading the page cost at most one computation per DASHBOARD_TTL. When the cached copy
+# goes stale one request recomputes it while the others keep serving the stale copy.
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, ExpressionWrapper, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from payment.ledger import MONEY, payment_totals
+from reports.models import CleanerRollup, PaymentRollup, Rollup, ServiceRollup
+from tricksy.cache import versioned_key
+from .availability import day_start
+from .choices import cleaner_choices
+from .models import Booking, BookingCleaner
+
+DASHBOARD_NAMESPACE = "dashboard"
+# Seconds a computed dashboard is served as is
+DASHBOARD_TTL = 30
+# A stale copy is still served (while one request refreshes it) for this long
+DASHBOARD_STALE_TTL = 300
+# Days of bookings (up to today) whose unpaid balances count as pending payments
+PENDING_DAYS = 90
+# Minutes of work per available cleaner per day, for utilization
+WORKDAY_MINUTES = 8 * 60
+
+
+def compute_dashboard(today=None):
+    """
+    Every number on the dashboard, as a plain dict (cacheable). Five queries.
+    """
+    today = today or timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=7)
+    month = today.replace(day=1)
+    tomorrow = today + timedelta(days=1)
+
+    # 1. Bookings: today, this week, and upcoming ones nobody is assigned to
+    bookings = (
+        Booking.objects.filter(start_at__gte=day_start(week_start))
+        .annotate(assigned=Exists(BookingCleaner.objects.filter(booking=OuterRef("pk"))))
+        .aggregate(
+            today=Count("pk", filter=Q(start_at__gte=day_start(today), start_at__lt=day_start(tomorrow))),
+            week=Count("pk", filter=Q(start_at__gte=day_start(week_start), start_at__lt=day_start(week_end))),
+            unassigned=Count("pk", filter=Q(start_at__gte=day_start(today), assigned=False)),
+        )
+    )
+
+    # 2. Pending payments: bookings of the last PENDING_DAYS already due that are not fully
+    # paid. A range of bookings_schedule_idx, so the cost follows the window, not the table
+    pending = (
+        Booking.objects.filter(
+            start_at__gte=day_start(tomorrow - timedelta(days=PENDING_DAYS)), start_at__lt=day_start(tomorrow)
+        )
+        .annotate(paid_total=payment_totals()["paid_total"])
+        .annotate(outstanding=ExpressionWrapper(F("total_amount") - F("paid_total"), output_field=MONEY))
+        .filter(outstanding__gt=0)
+        .aggregate(count=Count("pk"), amount=Sum("outstanding"))
+    )
+
+    # 3. Revenue received: this year's monthly rows and the last 7 daily ones
+    revenue = {"today": 0, "month": 0, "year": 0}
+    by_day = dict.fromkeys((today - timedelta(days=offset) for offset in range(6, -1, -1)), 0)
+    by_region = defaultdict(int)
+    rows = PaymentRollup.objects.filter(
+        Q(grain=Rollup.MONTH, period__gte=today.replace(month=1, day=1), period__lte=month)
+        | Q(grain=Rollup.DAY, period__gt=today - timedelta(days=7), period__lte=today)
+    ).values_list("grain", "period", "region", "amount")
+    for grain, period, region, amount in rows:
+        if grain == Rollup.MONTH:
+            revenue["year"] += amount
+            if period == month:
+                revenue["month"] += amount
+                by_region[region or "—"] += amount
+        else:
+            by_day[period] += amount
+    revenue["today"] = by_day[today]
+
+    # 4. Booked revenue per service this month
+    services = list(
+        ServiceRollup.objects.filter(grain=Rollup.MONTH, period=month)
+        .values_list("service__name")
+        .annotate(amount=Sum("amount"))
+        .order_by("-amount")
+    )
+
+    # 5. Cleaner workload this week (the cleaner list itself is cached)
+    minutes_today, minutes_week, bookings_today = defaultdict(int), 0, defaultdict(int)
+    for cleaner_id, period, minutes, count in CleanerRollup.objects.filter(
+        grain=Rollup.DAY, period__gte=week_start, period__lt=week_end
+    ).values_list("cleaner_id", "period", "minutes", "bookings"):
+        minutes_week += minutes
+        if period == today:
+            minutes_today[cleaner_id] += minutes
+            bookings_today[cleaner_id] += count
+    cleaners = cleaner_choices().objects
+    available = sum(1 for cleaner in cleaners if cleaner.is_available)
+    capacity_today = available * WORKDAY_MINUTES
+    return {
+        "today": today,
+        "bookings": bookings,
+        "pending_payments": {"count": pending["count"], "amount": pending["amount"] or 0, "days": PENDING_DAYS},
+        "revenue": revenue,
+        "earnings": [(day.strftime("%a"), float(amount)) for day, amount in by_day.items()],
+        "regions": sorted(by_region.items(), key=lambda item: -item[1]),
+        "services": [(name, float(amount)) for name, amount in services],
+        "utilization": {
+            "today": round(100 * sum(minutes_today.values()) / capacity_today) if capacity_today else 0,
+            "week": round(100 * minutes_week / (capacity_today * 7)) if capacity_today else 0,
+            "available": available,
+        },
+        "cleaners": [
+            {
+                "name": cleaner.name,
+                "bookings": bookings_today.get(cleaner.pk, 0),
+                "hours": round(minutes_today.get(cleaner.pk, 0) / 60, 1),
+                "is_available": cleaner.is_available,
+            }
+            for cleaner in sorted(cleaners, key=lambda c: (-minutes_today.get(c.pk, 0), c.name))[:10]
+        ],
+        "computed_at": timezone.now(),
+    }
+
+
+def get_dashboard():
+    """
+    The cached dashboard: fresh for DASHBOARD_TTL seconds, then refreshed by whichever
+    request wins the refresh lock while the others get the stale copy.
+    """
+    today = timezone.localdate()
+    key = versioned_key(DASHBOARD_NAMESPACE, today.isoformat())
+    cached = cache.get(key)
+    if cached is not None:
+        fresh_until, data = cached
+        if time.time() < fresh_until or not cache.add(f"{key}:refreshing", 1, DASHBOARD_TTL):
+            return data
+    data = compute_dashboard(today)
+    cache.set(key, (time.time() + DASHBOARD_TTL, data), DASHBOARD_STALE_TTL)
+    cache.delete(f"{key}:refreshing")
+    return data
@@ -0,0 +1,128 @@
+# deletion.py
+# Deleting a customer or booking without a request-long cascade. The delete views soft-delete
+# the row (hidden from every default manager at once) and queue a DeletionJob; the
+# `manage.py purge_deleted` worker then removes the bookings with their services, cleaners
+# and payments a chunk at a time, one short transaction per chunk.
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from customer.models import Customer
+from payment.models import Payment
+from reports.rollups import rollup_changes
+from search.index import unindex_object
+from search.models import SearchToken
+from .availability import availability_changes
+from .models import Booking, BookingCleaner, BookingService, DeletionJob
+
+DEFAULT_CHUNK_SIZE = 500
+# A running job whose worker hasn't saved progress for this long is taken over (the worker
+# died mid-purge); far longer than one chunk takes
+STALE_AFTER = timedelta(minutes=10)
+
+
+def schedule_deletion(obj, user=None):
+    """
+    Soft-deletes a Customer (and its bookings) or a Booking and queues the purge.
+    A couple of UPDATEs whatever the size of the cascade. Returns the DeletionJob.
+    """
+    if isinstance(obj, Customer):
+        target = DeletionJob.CUSTOMER
+        bookings = Booking.objects.filter(customer_id=obj.pk)
+    else:
+        target = DeletionJob.BOOKING
+        bookings = Booking.objects.filter(pk=obj.pk)
+    # Upcoming slots are freed at once; the worker clears the past ones as it purges
+    with (
+        transaction.atomic(),
+        availability_changes(bookings.values("pk"), since=timezone.localdate()),
+        # Reports leave out soft-deleted bookings and their payments
+        rollup_changes(bookings.values("pk")),
+    ):
+        SearchToken.objects.filter(entity_type=SearchToken.BOOKING, entity_id__in=bookings.values("pk")).delete()
+        bookings.mark_deleted()
+        if target == DeletionJob.CUSTOMER:
+            Customer.objects.filter(pk=obj.pk).mark_deleted()
+        unindex_object(obj)
+        return DeletionJob.objects.create(target=target, object_id=obj.pk, label=str(obj), requested_by=user)
+
+
+def purge_bookings(booking_ids):
+    """
+    Removes bookings and everything that references them with one DELETE per table,
+    leaves first, so Django's collector never loads the cascade into memory.
+    The cleaners' day slots they still covered are recomputed.
+    """
+    with transaction.atomic(), availability_changes(booking_ids):
+        Payment.objects.filter(booking_id__in=booking_ids).delete()
+        BookingCleaner.objects.filter(booking_id__in=booking_ids).delete()
+        # _raw_delete skips the per-row post_delete signals, whose work (recomputing totals,
+        # unindexing) is pointless or done here for rows that are going anyway
+        services = BookingService.objects.filter(booking_id__in=booking_ids)
+        services._raw_delete(services.db)
+        SearchToken.objects.filter(entity_type=SearchToken.BOOKING, entity_id__in=booking_ids).delete()
+        bookings = Booking.all_objects.filter(pk__in=booking_ids)
+        return bookings._raw_delete(bookings.db)
+
+
+def claim_next_job(stale_after=STALE_AFTER):
+    """
+    Marks the oldest pending job running and returns it (None if there is none). A running
+    job with no heartbeat for ``stale_after`` is claimed again: its worker died mid-purge.
+    SKIP LOCKED lets several workers run side by side.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            DeletionJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=DeletionJob.PENDING)
+                | Q(status=DeletionJob.RUNNING, heartbeat_at__lt=now - stale_after)
+            )
+            .order_by("pk")
+            .first()
+        )
+        if job is not None:
+            job.status = DeletionJob.RUNNING
+            job.started_at = job.heartbeat_at = now
+            job.save(update_fields=["status", "started_at", "heartbeat_at"])
+    return job
+
+
+def run_deletion_job(job, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Purges a job's bookings ``chunk_size`` at a time, saving the progress after each chunk
+    (and calling ``progress(job)``), then deletes the customer. Safe to re-run after a failure.
+    """
+    if job.target == DeletionJob.CUSTOMER:
+        bookings = Booking.all_objects.filter(customer_id=job.object_id)
+    else:
+        bookings = Booking.all_objects.filter(pk=job.object_id)
+    job.total = job.processed + bookings.count()
+    job.save(update_fields=["total"])
+    try:
+        while True:
+            ids = list(bookings.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+            if not ids:
+                break
+            purge_bookings(ids)
+            job.processed += len(ids)
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=["processed", "heartbeat_at"])
+            if progress:
+                progress(job)
+        if job.target == DeletionJob.CUSTOMER:
+            Customer.all_objects.filter(pk=job.object_id).delete()
+    except Exception as exc:
+        job.status = DeletionJob.FAILED
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        raise
+    job.status = DeletionJob.DONE
+    job.error = ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+    return job
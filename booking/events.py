@@ -0,0 +1,209 @@
+# events.py
+# Change events pushed to open pages over server-sent events (GET /events/, served by the
+# ASGI app in tricksy/asgi.py). Writers append compact rows to booking_events when their
+# transaction commits; in each worker process one EventBroker polls the table for rows past
+# the last id it saw and wakes every stream connected to that process. N open pages cost one
+# indexed query per POLL_INTERVAL per process, not N reloads of the booking list.
+#
+# Ids are handed out at insert time but become visible at commit, so two concurrent writers
+# can commit in the opposite order: a row may appear below an id already delivered. Each
+# poll therefore re-reads the last LATE_WINDOW ids and keeps the rows it hasn't buffered
+# yet; streams follow the buffer in arrival order, not id order.
+import asyncio
+import json
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BookingEvent
+
+# Seconds between polls of booking_events while anyone is listening
+POLL_INTERVAL = 1.0
+# Events each broker keeps for reconnecting clients (Last-Event-ID)
+BUFFER_SIZE = 1000
+# Ids below the newest one re-read by every poll, for rows that committed late
+LATE_WINDOW = 100
+# Seconds of silence before a keep-alive comment, so proxies don't drop the connection
+HEARTBEAT = 15
+# Seconds a stream stays open; the browser then reconnects with Last-Event-ID
+STREAM_LIFETIME = 300
+# Milliseconds the browser waits before reconnecting
+RETRY_MS = 3000
+EVENT_RETENTION = timedelta(hours=1)
+# Seconds between deletions of events older than EVENT_RETENTION (by any listening process)
+PRUNE_INTERVAL = 600
+
+
+def publish_events(kind, booking_ids):
+    """
+    Queues one ``kind`` event per booking, written when the current transaction commits
+    (now, outside one) so pages never fetch a row they can't see yet.
+    """
+    booking_ids = list(dict.fromkeys(booking_ids))
+    if booking_ids:
+        transaction.on_commit(lambda: BookingEvent.objects.bulk_create(
+            [BookingEvent(kind=kind, booking_id=booking_id) for booking_id in booking_ids]
+        ))
+
+
+def format_event(event_id, kind, booking_id):
+    data = json.dumps({"kind": kind, "booking": booking_id}, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+
+class EventBroker:
+    """
+    The recent events of one event loop's streams, refreshed by a single polling task that
+    runs only while at least one stream is subscribed.
+    """
+
+    def __init__(self, size=BUFFER_SIZE):
+        self.events = deque(maxlen=size)  # (seq, id, kind, booking_id) in arrival order
+        self.seq = 0  # arrival number of the newest buffered event
+        self.last_id = None  # highest id buffered
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.loading = asyncio.Lock()
+        self.task = None
+        self.pruned_at = None
+
+    async def fetch(self, after):
+        rows = BookingEvent.objects.filter(id__gt=after).order_by("id").values_list("id", "kind", "booking_id")
+        return [row async for row in rows[:self.events.maxlen]]
+
+    def add(self, rows):
+        for row in rows:
+            self.seq += 1
+            self.events.append((self.seq, *row))
+            self.last_id = max(self.last_id or 0, row[0])
+
+    async def load(self):
+        async with self.loading:
+            if self.last_id is None:
+                rows = BookingEvent.objects.order_by("-id").values_list("id", "kind", "booking_id")
+                rows = [row async for row in rows[:self.events.maxlen]]
+                self.add(reversed(rows))
+                self.last_id = self.last_id or 0
+
+    async def refresh(self):
+        """
+        Buffers the rows committed since the last poll, including late ones up to LATE_WINDOW
+        ids below the newest. Returns whether there were any.
+        """
+        after = max(self.last_id - LATE_WINDOW, 0)
+        known = {event[1] for event in self.events if event[1] > after}
+        found = False
+        rows = await self.fetch(after)
+        while rows:
+            new = [row for row in rows if row[0] not in known]
+            self.add(new)
+            found = found or bool(new)
+            # A full batch means more may be waiting (catching up after a quiet spell)
+            rows = await self.fetch(rows[-1][0]) if len(rows) == self.events.maxlen else []
+        return found
+
+    async def poll(self):
+        try:
+            while self.subscribers:
+                await asyncio.sleep(POLL_INTERVAL)
+                if await self.refresh():
+                    async with self.changed:
+                        self.changed.notify_all()
+                await self.prune()
+        finally:
+            self.task = None
+
+    async def prune(self):
+        now = timezone.now()
+        if self.pruned_at is None or now - self.pruned_at >= timedelta(seconds=PRUNE_INTERVAL):
+            self.pruned_at = now
+            await BookingEvent.objects.filter(created_at__lt=now - EVENT_RETENTION).adelete()
+
+    @asynccontextmanager
+    async def subscribe(self):
+        self.subscribers += 1
+        try:
+            await self.load()
+            if self.task is None:
+                self.task = asyncio.create_task(self.poll())
+            yield self
+        finally:
+            self.subscribers -= 1
+
+    def missed(self, after):
+        """
+        True when events after id ``after`` have already left the buffer.
+        """
+        return len(self.events) == self.events.maxlen and after < min(event[1] for event in self.events) - 1
+
+    def after_id(self, after):
+        """
+        Buffered events with an id above ``after`` (a reconnecting client's Last-Event-ID).
+        """
+        return [event for event in self.events if event[1] > after]
+
+    def since(self, seq):
+        """
+        Events that arrived after arrival number ``seq``.
+        """
+        return [event for event in self.events if event[0] > seq]
+
+    async def wait(self, timeout):
+        async with self.changed:
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+_brokers = weakref.WeakKeyDictionary()
+
+
+def get_broker():
+    """
+    The running event loop's broker (one per worker process under an ASGI server).
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _brokers:
+        _brokers[loop] = EventBroker()
+    return _brokers[loop]
+
+
+async def event_stream(after=None, broker=None):
+    """
+    The SSE body: events after ``after`` (the client's Last-Event-ID, else only new ones),
+    then each new event as it arrives, for STREAM_LIFETIME seconds. A client that fell
+    further behind than the buffer gets a "reset" event and should reload. The id sent
+    with each event is the highest delivered so far, so a late (lower) id never moves
+    the client's Last-Event-ID back.
+    """
+    broker = broker or get_broker()
+    loop = asyncio.get_running_loop()
+    async with broker.subscribe():
+        last_id = broker.last_id if after is None else after
+        if broker.missed(last_id):
+            yield f"retry: {RETRY_MS}\nid: {broker.last_id}\nevent: reset\ndata: {{}}\n\n"
+            last_id, pending = broker.last_id, []
+        else:
+            # The id alone (no data) gives the browser a Last-Event-ID to reconnect with
+            yield f"retry: {RETRY_MS}\nid: {last_id}\n\n"
+            pending = broker.after_id(last_id)
+        cursor = broker.seq
+        deadline = loop.time() + STREAM_LIFETIME
+        while True:
+            for _, event_id, kind, booking_id in pending:
+                last_id = max(last_id, event_id)
+                yield format_event(last_id, kind, booking_id)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            await broker.wait(min(HEARTBEAT, remaining))
+            pending = broker.since(cursor)
+            if pending:
+                cursor = pending[-1][0]
+            else:
+                yield ": keep-alive\n\n"
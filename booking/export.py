@@ -0,0 +1,110 @@
+# export.py
+# Streaming booking export (CSV / NDJSON) shared by BookingExportView and `manage.py export_bookings`.
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from tricksy.batching import iter_queryset_chunks
+from .models import Booking, BookingCleaner, BookingService
+
+CSV = "csv"
+NDJSON = "ndjson"
+EXPORT_FORMATS = [(CSV, "CSV"), (NDJSON, "NDJSON")]
+
+EXPORT_COLUMNS = [
+    "booking_reference",
+    "created_at",
+    "start",
+    "end",
+    "customer",
+    "region",
+    "address",
+    "building",
+    "unit",
+    "services",
+    "required_cleaners",
+    "cleaners",
+    "payments",
+    "paid_total",
+    "latest_payment_method",
+    "created_by",
+]
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def export_queryset(start=None, end=None, region=None):
+    """
+    Bookings (with everything an export row needs) starting within [start, end], optionally in one region.
+    """
+    queryset = Booking.objects.select_related("customer", "created_by").prefetch_related(
+        Prefetch("booking_services", queryset=BookingService.objects.select_related("service")),
+        Prefetch("booking_cleaners", queryset=BookingCleaner.objects.select_related("cleaner")),
+        "payments",
+    )
+    if start:
+        queryset = queryset.filter(start_date__gte=start)
+    if end:
+        queryset = queryset.filter(start_date__lte=end)
+    if region:
+        queryset = queryset.filter(customer__region__iexact=region)
+    return queryset
+
+
+def booking_row(booking):
+    services = list(booking.booking_services.all())
+    payments = sorted(booking.payments.all(), key=lambda p: p.paid_at, reverse=True)
+    customer = booking.customer
+    return {
+        "booking_reference": booking.booking_reference,
+        "created_at": booking.created_at.isoformat(),
+        "start": f"{booking.start_date.isoformat()} {booking.start_time.isoformat()}",
+        "end": f"{booking.end_date.isoformat()} {booking.end_time.isoformat()}",
+        "customer": customer.full_name,
+        "region": customer.region,
+        "address": customer.address,
+        "building": customer.building,
+        "unit": customer.unit,
+        "services": "; ".join(f"{bs.service.name} x{bs.number_of_cleaners}" for bs in services),
+        "required_cleaners": sum(bs.number_of_cleaners for bs in services),
+        "cleaners": "; ".join(bc.cleaner.name for bc in booking.booking_cleaners.all()),
+        "payments": len(payments),
+        "paid_total": sum((p.net_amount for p in payments), 0),
+        "latest_payment_method": payments[0].payment_method if payments else "",
+        "created_by": booking.created_by.username if booking.created_by else "",
+    }
+
+
+def iter_booking_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields one dict per booking; related rows are prefetched once per chunk.
+    """
+    for chunk in iter_queryset_chunks(queryset, chunk_size):
+        for booking in chunk:
+            yield booking_row(booking)
+
+
+class _Echo:
+    """File-like object whose write() just returns the line (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_export(fmt, queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    rows = iter_booking_rows(queryset, chunk_size)
+    return iter_ndjson(rows) if fmt == NDJSON else iter_csv(rows)
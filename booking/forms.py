@@ -1,6 +1,10 @@
+from datetime import time, timedelta
+
 from django import forms
 from .models import Booking, BookingService, BookingCleaner
-import uuid
+from .export import EXPORT_FORMATS
+from .utils import generate_booking_reference
+from tricksy.choices import CachedChoicesFormMixin, CachedModelChoiceField
 
 
 class BookingForm(forms.ModelForm):
@@ -25,11 +29,19 @@ class BookingForm(forms.ModelForm):
             "entry_instruction": forms.Textarea(attrs={"rows": 2, "class": "form-control"}),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date, start_time = cleaned_data.get("start_date"), cleaned_data.get("start_time")
+        end_date, end_time = cleaned_data.get("end_date"), cleaned_data.get("end_time")
+        if all([start_date, start_time, end_date, end_time]) and (end_date, end_time) <= (start_date, start_time):
+            raise forms.ValidationError("The booking must end after it starts.")
+        return cleaned_data
+
     def save(self, commit=True, user=None):
         instance = super().save(commit=False)
         # Auto-generate booking_reference only if new
         if not instance.booking_reference:
-            instance.booking_reference = f"BK-{uuid.uuid4().hex[:8].upper()}"
+            instance.booking_reference = generate_booking_reference()
         if user:
             instance.created_by = user
         if commit:
@@ -37,20 +49,94 @@ class BookingForm(forms.ModelForm):
         return instance
 
 
-class BookingServiceForm(forms.ModelForm):
+class BookingServiceForm(CachedChoicesFormMixin, forms.ModelForm):
     class Meta:
         model = BookingService
         fields = ["service", "number_of_cleaners"]
+        field_classes = {"service": CachedModelChoiceField}
         widgets = {
             "service": forms.Select(attrs={"class": "form-select"}),
             "number_of_cleaners": forms.NumberInput(attrs={"class": "form-control", "min": 1}),
         }
 
+    def __init__(self, *args, service_choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Formsets pass one CachedChoices to every row, so the options load once per request
+        self.fields["service"].provider = service_choices
+
 
-class BookingCleanerForm(forms.ModelForm):
+class BookingCleanerForm(CachedChoicesFormMixin, forms.ModelForm):
     class Meta:
         model = BookingCleaner
         fields = ["cleaner"]
+        field_classes = {"cleaner": CachedModelChoiceField}
         widgets = {
             "cleaner": forms.Select(attrs={"class": "form-select"}),
         }
+
+    def __init__(self, *args, cleaner_choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["cleaner"].provider = cleaner_choices
+
+
+class BookingExportForm(forms.Form):
+    format = forms.ChoiceField(choices=EXPORT_FORMATS, required=False)
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    region = forms.CharField(max_length=100, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if start and end and start > end:
+            raise forms.ValidationError("Start date must be on or before the end date.")
+        return cleaned_data
+
+
+class AutoAssignForm(forms.Form):
+    start = forms.DateField(widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if start and end and start > end:
+            raise forms.ValidationError("Start date must be on or before the end date.")
+        return cleaned_data
+
+    def window(self):
+        """
+        Aware [start, end) datetimes covering the chosen days.
+        """
+        start = self.cleaned_data["start"]
+        end = self.cleaned_data.get("end") or start
+        return (
+            Booking.combine_schedule(start, time.min),
+            Booking.combine_schedule(end + timedelta(days=1), time.min),
+        )
+
+
+class AvailabilityForm(forms.Form):
+    MAX_DAYS = 14
+
+    start = forms.DateField(widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+    days = forms.IntegerField(
+        min_value=1, max_value=MAX_DAYS, initial=7, required=False,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+
+
+class RoutesForm(forms.Form):
+    day = forms.DateField(widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+
+
+class FreeCleanersForm(forms.Form):
+    start = forms.DateTimeField(widget=forms.DateTimeInput(attrs={"type": "datetime-local", "class": "form-control"}))
+    end = forms.DateTimeField(widget=forms.DateTimeInput(attrs={"type": "datetime-local", "class": "form-control"}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if start and end and end <= start:
+            raise forms.ValidationError("End must be after start.")
+        return cleaned_data
@@ -0,0 +1,60 @@
+# formsets.py
+# Saves a validated model formset with a constant number of queries: the creates, updates
+# and deletes are collected first, then written with bulk_create / bulk_update / one DELETE.
+from django.db import transaction
+
+
+class FormsetChanges:
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.update_fields = set()
+        self.deleted = []  # primary keys
+
+    def __bool__(self):
+        return bool(self.created or self.updated or self.deleted)
+
+
+def collect_formset_changes(formset, **attrs):
+    """
+    Sorts the forms of a valid formset into creates, updates and deletes, without queries.
+    ``attrs`` are set on new instances (e.g. booking=booking); existing rows already have them.
+    """
+    changes = FormsetChanges()
+    field_names = {field.name for field in formset.model._meta.concrete_fields}
+    for form in formset.forms:
+        instance = form.instance
+        if formset.can_delete and form.cleaned_data.get("DELETE"):
+            if instance.pk:
+                changes.deleted.append(instance.pk)
+            continue
+        if not form.has_changed():
+            # Untouched existing row, or an empty extra form
+            continue
+        obj = form.save(commit=False)
+        if obj.pk:
+            changes.updated.append(obj)
+            changes.update_fields.update(name for name in form.changed_data if name in field_names)
+        else:
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+            changes.created.append(obj)
+    return changes
+
+
+def apply_formset_changes(model, changes):
+    """
+    Writes collected changes: at most one DELETE, one bulk UPDATE and one bulk INSERT.
+    """
+    with transaction.atomic():
+        if changes.deleted:
+            model.objects.filter(pk__in=changes.deleted).delete()
+        if changes.updated and changes.update_fields:
+            model.objects.bulk_update(changes.updated, sorted(changes.update_fields))
+        if changes.created:
+            model.objects.bulk_create(changes.created)
+    return changes
+
+
+def save_formset(formset, **attrs):
+    return apply_formset_changes(formset.model, collect_formset_changes(formset, **attrs))
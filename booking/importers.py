@@ -0,0 +1,235 @@
+# importers.py
+# Bulk booking import (corporate contract spreadsheets) used by `manage.py import_bookings`
+# and BookingImportView. Rows are validated with the regular forms, then written per chunk
+# with bulk_create instead of one INSERT per customer/booking/service.
+import csv
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+
+from customer.forms import CustomerForm
+from customer.models import Customer
+from reports.rollups import schedule_rollups
+from search.index import index_ids, index_objects
+from service.models import Service
+from tricksy.batching import chunked
+from .events import publish_events
+from .forms import BookingForm
+from .models import Booking, BookingEvent, BookingService
+from .utils import generate_booking_references
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Expected CSV header: the CustomerForm and BookingForm fields plus "services",
+# e.g. "Deep Clean:2; Window Cleaning" (service name or id, optional cleaner count).
+IMPORT_COLUMNS = CustomerForm._meta.fields + BookingForm._meta.fields + ["services"]
+REQUIRED_COLUMNS = ["full_name", "address", "start_date", "start_time", "end_date", "end_time", "services"]
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []  # [(line number, message)]
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+class FormRules:
+    """
+    Applies a ModelForm's field rules to a plain dict. Same validation as the form,
+    without deep-copying every field for each of 100k rows.
+    """
+
+    def __init__(self, form_class):
+        self.model = form_class._meta.model
+        self.fields = form_class.base_fields
+
+    def build(self, row, errors):
+        cleaned = {}
+        for name, field in self.fields.items():
+            try:
+                cleaned[name] = field.clean(field.widget.value_from_datadict(row, {}, name))
+            except ValidationError as exc:
+                errors.append(f"{name}: {' '.join(exc.messages)}")
+        return self.model(**cleaned)
+
+
+class BookingImporter:
+    def __init__(self, user=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.customer_rules = FormRules(CustomerForm)
+        self.booking_rules = FormRules(BookingForm)
+        self.services = {}
+        self.prices = {}
+        for pk, name, base_price in Service.objects.values_list("pk", "name", "base_price"):
+            self.prices[pk] = base_price
+            self.services[str(pk)] = pk
+            self.services[name.strip().lower()] = pk
+
+    def import_csv(self, fh):
+        """
+        Imports bookings from a text file object with a header row.
+        """
+        reader = csv.DictReader(fh)
+        result = ImportResult()
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            result.errors.append((1, "Missing columns: " + ", ".join(missing)))
+            return result
+        # Line numbers: header is line 1
+        return self.import_rows(enumerate(reader, start=2), result)
+
+    def import_rows(self, numbered_rows, result=None):
+        result = result or ImportResult()
+        for chunk in chunked(numbered_rows, self.chunk_size):
+            self._import_chunk(chunk, result)
+        return result
+
+    def parse_services(self, value):
+        services = {}
+        for item in (value or "").split(";"):
+            item = item.strip()
+            if not item:
+                continue
+            name, _, count = item.rpartition(":") if ":" in item else (item, "", "1")
+            service_id = self.services.get(name.strip().lower())
+            if service_id is None:
+                raise RowError(f"Unknown service '{name.strip()}'.")
+            if service_id in services:
+                raise RowError(f"Service '{name.strip()}' is listed twice.")
+            try:
+                number_of_cleaners = int(count)
+            except ValueError:
+                raise RowError(f"Invalid number of cleaners '{count}' for '{name.strip()}'.")
+            if number_of_cleaners < 1:
+                raise RowError(f"Number of cleaners for '{name.strip()}' must be at least 1.")
+            services[service_id] = number_of_cleaners
+        if not services:
+            raise RowError("At least one service is required.")
+        return services
+
+    def validate_row(self, row):
+        """
+        Returns (Customer, Booking, {service_id: number_of_cleaners}) validated with the
+        same form rules the create page uses; raises RowError with the errors.
+        """
+        row = {key: (value or "").strip() for key, value in row.items() if key}
+        errors = []
+        customer = self.customer_rules.build(row, errors)
+        booking = self.booking_rules.build(row, errors)
+        if not errors:
+            booking.sync_schedule()
+            if booking.end_at <= booking.start_at:
+                errors.append("The booking must end after it starts.")
+            else:
+                try:
+                    booking.clean()
+                except ValidationError as exc:
+                    errors.extend(exc.messages)
+        try:
+            services = self.parse_services(row.get("services"))
+        except RowError as exc:
+            errors.append(str(exc))
+        if errors:
+            raise RowError("; ".join(errors))
+        return customer, booking, services
+
+    def _import_chunk(self, chunk, result):
+        valid = []
+        for line, row in chunk:
+            try:
+                valid.append(self.validate_row(row))
+            except RowError as exc:
+                result.errors.append((line, str(exc)))
+        if not valid:
+            return
+
+        with transaction.atomic():
+            customers, new_customers = self._resolve_customers([customer for customer, _, _ in valid])
+
+            bookings = []
+            for (_, booking, services), customer, reference in zip(
+                valid, customers, generate_booking_references(len(valid))
+            ):
+                booking.customer = customer
+                booking.booking_reference = reference
+                booking.created_by = self.user
+                # bulk_create skips the BookingService signals, so set the stored totals here
+                booking.required_cleaners = sum(services.values())
+                booking.total_amount = sum(self.prices[pk] * count for pk, count in services.items())
+                bookings.append(booking)
+            self._bulk_create_bookings(bookings)
+
+            BookingService.objects.bulk_create([
+                BookingService(booking=booking, service_id=service_id, number_of_cleaners=count)
+                for booking, (_, _, services) in zip(bookings, valid)
+                for service_id, count in services.items()
+            ])
+            # bulk_create skips the search index, rollup and event signals too
+            index_objects(Customer, new_customers)
+            index_ids(Booking, [booking.pk for booking in bookings])
+            schedule_rollups(booking_days={booking.start_date for booking in bookings})
+            publish_events(BookingEvent.CREATED, [booking.pk for booking in bookings])
+        result.created += len(bookings)
+
+    def _resolve_customers(self, customers):
+        """
+        Repeat clients: each row's customer becomes the existing record with the same lookup
+        key (or the first row of the chunk with it); only the rest are inserted.
+        Returns (customer per row, newly created customers).
+        """
+        for customer in customers:
+            customer.sync_lookup_keys()
+            customer.sync_coordinates()
+        existing = {}
+        # Newest first, so the oldest record of any duplicates wins
+        for customer in (
+            Customer.objects.filter(lookup_key__in={customer.lookup_key for customer in customers})
+            .order_by("-customer_id")
+            .only("customer_id", "lookup_key")
+        ):
+            existing[customer.lookup_key] = customer
+        new = {}
+        resolved = [
+            existing.get(customer.lookup_key) or new.setdefault(customer.lookup_key, customer)
+            for customer in customers
+        ]
+        new_customers = list(new.values())
+        self._bulk_create_customers(new_customers)
+        return resolved, new_customers
+
+    def _bulk_create_customers(self, customers):
+        if not customers:
+            return
+        floor = Customer.objects.aggregate(last=Max("pk"))["last"] or 0
+        Customer.objects.bulk_create(customers)
+        if all(customer.pk for customer in customers):
+            return
+        # Backends that can't return ids from a bulk insert (MySQL): lookup keys are unique
+        # within the batch, so match the new rows back by key.
+        ids = dict(
+            Customer.objects.filter(pk__gt=floor, lookup_key__in=[customer.lookup_key for customer in customers])
+            .order_by("-pk")
+            .values_list("lookup_key", "pk")
+        )
+        for customer in customers:
+            customer.pk = ids[customer.lookup_key]
+
+    def _bulk_create_bookings(self, bookings):
+        Booking.objects.bulk_create(bookings)
+        if all(booking.pk for booking in bookings):
+            return
+        ids = dict(
+            Booking.objects.filter(booking_reference__in=[b.booking_reference for b in bookings])
+            .values_list("booking_reference", "pk")
+        )
+        for booking in bookings:
+            booking.pk = ids[booking.booking_reference]
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.export import CSV, DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_export
+from booking.forms import BookingExportForm
+
+
+class Command(BaseCommand):
+    help = "Stream bookings with customers, services, cleaners and payments as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=[key for key, _ in EXPORT_FORMATS], default=CSV)
+        parser.add_argument("--start", help="Only bookings starting on/after this date (YYYY-MM-DD).")
+        parser.add_argument("--end", help="Only bookings starting on/before this date (YYYY-MM-DD).")
+        parser.add_argument("--region", help="Only bookings for customers in this region.")
+        parser.add_argument("--output", "-o", help="Write to this file instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        form = BookingExportForm({
+            "format": options["format"],
+            "start": options["start"],
+            "end": options["end"],
+            "region": options["region"],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        data = form.cleaned_data
+        queryset = export_queryset(data["start"], data["end"], data["region"])
+        lines = iter_export(data["format"], queryset, options["chunk_size"])
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as fh:
+                fh.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.importers import DEFAULT_CHUNK_SIZE, BookingImporter
+
+
+class Command(BaseCommand):
+    help = "Import bookings (with their customers and services) from a CSV file in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--user", help="Username recorded as the bookings' creator.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        user = None
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        importer = BookingImporter(user=user, chunk_size=options["chunk_size"])
+        with open(options["path"], newline="", encoding="utf-8-sig") as fh:
+            result = importer.import_csv(fh)
+
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} bookings ({result.failed} rows rejected)."
+        ))
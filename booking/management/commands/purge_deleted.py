@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking.deletion import DEFAULT_CHUNK_SIZE, claim_next_job, run_deletion_job
+from booking.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = "Background worker: purge soft-deleted customers and bookings queued as DeletionJobs, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                            help="Bookings purged per transaction.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs instead of exiting.")
+        parser.add_argument("--sleep", type=float, default=5, help="Seconds between polls with --loop.")
+        parser.add_argument("--retry-failed", action="store_true",
+                            help="Queue failed jobs again first (stalled running jobs are reclaimed anyway).")
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            retried = DeletionJob.objects.filter(status=DeletionJob.FAILED).update(status=DeletionJob.PENDING)
+            self.stdout.write(f"Queued {retried} failed jobs again.")
+
+        def progress(job):
+            self.stdout.write(f"Job #{job.pk} ({job.label}): {job.processed}/{job.total} bookings purged ({job.percent}%)")
+
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if not options["loop"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+            self.stdout.write(f"Job #{job.pk}: deleting {job.target} {job.label}...")
+            try:
+                run_deletion_job(job, options["chunk_size"], progress)
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"Job #{job.pk} failed: {exc}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(f"Job #{job.pk} done: {job.processed} bookings purged."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from booking.availability import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cleaner availability index (cleaner_day_slots) from booking_cleaners."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = rebuild_index(options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} cleaner-days."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from booking.models import Booking
+from booking.totals import recompute_booking_totals
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored required_cleaners/total_amount of every booking, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        batch_size = options["batch_size"]
+        last_pk = 0
+        updated = 0
+        while True:
+            ids = list(
+                Booking.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # One short transaction per batch so the table is never locked for long
+            with transaction.atomic():
+                updated += recompute_booking_totals(ids)
+            last_pk = ids[-1]
+            self.stdout.write(f"Recomputed {updated} bookings...")
+        self.stdout.write(self.style.SUCCESS(f"Recomputed totals for {updated} bookings."))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0002_initial"),
+        ("customer", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["created_at", "id"], name="bookings_created_id_idx"
+            ),
+        ),
+    ]
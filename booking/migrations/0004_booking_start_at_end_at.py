@@ -0,0 +1,74 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:16
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BACKFILL_CHUNK_SIZE = 10000
+
+
+def backfill_start_end(apps, schema_editor):
+    """
+    Fill start_at/end_at in primary-key chunks so no single statement locks the whole table.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == "mysql" and settings.TIME_ZONE == "UTC":
+        # Datetimes are stored as naive UTC, so TIMESTAMP(date, time) is exactly what save() writes.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT MIN(id), MAX(id) FROM bookings")
+            low, high = cursor.fetchone()
+            if low is None:
+                return
+            for start in range(low, high + 1, BACKFILL_CHUNK_SIZE):
+                cursor.execute(
+                    "UPDATE bookings SET start_at = TIMESTAMP(start_date, start_time), "
+                    "end_at = TIMESTAMP(end_date, end_time) WHERE id >= %s AND id < %s",
+                    [start, start + BACKFILL_CHUNK_SIZE],
+                )
+        return
+
+    Booking = apps.get_model("booking", "Booking")
+    last_pk = 0
+    while True:
+        chunk = list(
+            Booking.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .only("pk", "start_date", "start_time", "end_date", "end_time")[:1000]
+        )
+        if not chunk:
+            break
+        for booking in chunk:
+            booking.start_at = timezone.make_aware(datetime.datetime.combine(booking.start_date, booking.start_time))
+            booking.end_at = timezone.make_aware(datetime.datetime.combine(booking.end_date, booking.end_time))
+        Booking.objects.bulk_update(chunk, ["start_at", "end_at"])
+        last_pk = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0003_booking_created_at_id_index"),
+        ("customer", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="end_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="start_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_start_end, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["start_at", "end_at"], name="bookings_schedule_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:24
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+BACKFILL_CHUNK_SIZE = 10000
+
+
+def backfill_totals(apps, schema_editor):
+    """
+    Same set-based UPDATE as booking.totals.recompute_booking_totals, per primary-key range.
+    """
+    Booking = apps.get_model("booking", "Booking")
+    BookingService = apps.get_model("booking", "BookingService")
+    services = BookingService.objects.filter(booking=OuterRef("pk")).values("booking")
+    amount_field = models.DecimalField(max_digits=10, decimal_places=2)
+    totals = {
+        "required_cleaners": Coalesce(
+            Subquery(services.annotate(total=Sum("number_of_cleaners")).values("total")), 0
+        ),
+        "total_amount": Coalesce(
+            Subquery(
+                services.annotate(
+                    total=Sum(F("service__base_price") * F("number_of_cleaners"))
+                ).values("total"),
+                output_field=amount_field,
+            ),
+            Value(Decimal("0")),
+            output_field=amount_field,
+        ),
+    }
+    bounds = Booking.objects.aggregate(low=models.Min("pk"), high=models.Max("pk"))
+    if bounds["low"] is None:
+        return
+    for start in range(bounds["low"], bounds["high"] + 1, BACKFILL_CHUNK_SIZE):
+        Booking.objects.filter(pk__gte=start, pk__lt=start + BACKFILL_CHUNK_SIZE).update(**totals)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0004_booking_start_at_end_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="required_cleaners",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="total_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=10
+            ),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
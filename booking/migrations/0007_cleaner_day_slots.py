@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0006_soft_delete_and_deletion_jobs"),
+        ("cleaner", "0004_list_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CleanerDaySlots",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("busy", models.BinaryField(max_length=6)),
+                (
+                    "cleaner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="day_slots",
+                        to="cleaner.cleaner",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "cleaner_day_slots",
+                "indexes": [
+                    models.Index(
+                        fields=["day", "cleaner"], name="cleaner_day_slots_day_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("cleaner", "day"), name="cleaner_day_slots_unique"
+                    )
+                ],
+            },
+        ),
+    ]
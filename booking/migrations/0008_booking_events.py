@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0007_cleaner_day_slots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("booking.created", "Booking created"),
+                            ("booking.updated", "Booking updated"),
+                            ("booking.assigned", "Cleaners assigned"),
+                            ("payment.recorded", "Payment recorded"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("booking_id", models.PositiveBigIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "db_table": "booking_events",
+            },
+        ),
+    ]
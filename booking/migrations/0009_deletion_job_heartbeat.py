@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0008_booking_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deletionjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,8 +1,16 @@
+import datetime
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from customer.models import Customer
 from service.models import Service
 from cleaner.models import Cleaner
 from django.contrib.auth.models import User
+from tricksy.softdelete import SoftDeleteManager, SoftDeleteQuerySet
+
+# Longest booking allowed: overlap checks only scan bookings starting this long before a slot
+MAX_BOOKING_DURATION = datetime.timedelta(days=7)
 
 
 class Booking(models.Model):
@@ -17,10 +25,55 @@ class Booking(models.Model):
     entry_instruction = models.TextField(blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="created_bookings")
     created_at = models.DateTimeField(auto_now_add=True)
+    # start_date/start_time and end_date/end_time combined, so overlaps are one indexed range query
+    start_at = models.DateTimeField(null=True, editable=False)
+    end_at = models.DateTimeField(null=True, editable=False)
+    # Sums over booking_services, maintained by booking.signals / booking.totals
+    required_cleaners = models.PositiveIntegerField(default=0, editable=False)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    # Set by the delete views; a DeletionJob purges the row and its dependents later
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.booking_reference} ({self.customer.full_name})"
 
+    @staticmethod
+    def combine_schedule(day, time):
+        return timezone.make_aware(datetime.datetime.combine(day, time))
+
+    def sync_schedule(self):
+        """
+        Fills start_at/end_at from the separate date and time fields.
+        Called by save(); call it yourself before bulk_create()/bulk_update().
+        """
+        self.start_at = self.combine_schedule(self.start_date, self.start_time)
+        self.end_at = self.combine_schedule(self.end_date, self.end_time)
+
+    def clean(self):
+        super().clean()
+        if None in (self.start_date, self.start_time, self.end_date, self.end_time):
+            return
+        self.sync_schedule()
+        if self.end_at - self.start_at > MAX_BOOKING_DURATION:
+            raise ValidationError(f"A booking can last at most {MAX_BOOKING_DURATION.days} days.")
+
+    def save(self, *args, **kwargs):
+        self.sync_schedule()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "start_at", "end_at"}
+        elif not self._state.adding:
+            # Never write back totals loaded before the services changed, or undo a deletion that
+            # happened since the row was loaded; they're set by UPDATE only
+            skipped = {"required_cleaners", "total_amount", "deleted_at", *self.get_deferred_fields()}
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in skipped and f.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
     def calculate_total_amount(self):
         """
         Calculates total amount based on all assigned services and their cleaner count.
@@ -38,6 +91,12 @@ class Booking(models.Model):
 
     class Meta:
         db_table = 'bookings'
+        indexes = [
+            # Keyset pagination of the booking list: ORDER BY created_at DESC, id DESC
+            models.Index(fields=["created_at", "id"], name="bookings_created_id_idx"),
+            # Overlap checks: :start - MAX_BOOKING_DURATION < start_at < :end AND end_at > :start
+            models.Index(fields=["start_at", "end_at"], name="bookings_schedule_idx"),
+        ]
 
 class BookingService(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="booking_services")
@@ -64,3 +123,109 @@ class BookingCleaner(models.Model):
     class Meta:
         db_table = 'booking_cleaners'
 
+
+
+class CleanerDaySlots(models.Model):
+    """
+    Availability index: one bit per 30-minute slot of a cleaner's day, set when an assignment
+    covers it. Rows exist only for days with work; maintained by booking.availability.
+    """
+    cleaner = models.ForeignKey(Cleaner, on_delete=models.CASCADE, related_name="day_slots")
+    day = models.DateField()
+    busy = models.BinaryField(max_length=6)
+
+    def __str__(self):
+        return f"{self.cleaner_id} @ {self.day}"
+
+    class Meta:
+        db_table = "cleaner_day_slots"
+        constraints = [
+            models.UniqueConstraint(fields=["cleaner", "day"], name="cleaner_day_slots_unique"),
+        ]
+        indexes = [
+            # Grid: every cleaner's row for a range of days
+            models.Index(fields=["day", "cleaner"], name="cleaner_day_slots_day_idx"),
+        ]
+
+class DeletionJob(models.Model):
+    """
+    Purge of a soft-deleted customer or booking and everything hanging off it, run in
+    bounded chunks by `manage.py purge_deleted` instead of one cascade in the request.
+    """
+    CUSTOMER = "customer"
+    BOOKING = "booking"
+    TARGET_CHOICES = [
+        (CUSTOMER, "Customer"),
+        (BOOKING, "Booking"),
+    ]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    object_id = models.PositiveIntegerField()
+    label = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Progress: bookings to purge (counted when the job starts) and purged so far
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Saved by the worker after each chunk; a running job that stops beating is reclaimed
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Delete {self.target} #{self.object_id} ({self.status})"
+
+    @property
+    def percent(self):
+        if self.status == self.DONE:
+            return 100
+        return int(self.processed * 100 / self.total) if self.total else 0
+
+    class Meta:
+        db_table = "deletion_jobs"
+        indexes = [
+            # Worker: oldest pending job first
+            models.Index(fields=["status", "id"], name="deletion_jobs_status_idx"),
+        ]
+
+
+class BookingEvent(models.Model):
+    """
+    One change pushed to open pages by the /events/ stream (see booking/events.py).
+    Only ids travel: pages fetch whatever they display. Rows are pruned after EVENT_RETENTION.
+    """
+    CREATED = "booking.created"
+    UPDATED = "booking.updated"
+    ASSIGNED = "booking.assigned"
+    PAID = "payment.recorded"
+    KIND_CHOICES = [
+        (CREATED, "Booking created"),
+        (UPDATED, "Booking updated"),
+        (ASSIGNED, "Cleaners assigned"),
+        (PAID, "Payment recorded"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # No foreign key: events outlive purged bookings and never block a delete
+    booking_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.booking_id}"
+
+    class Meta:
+        db_table = "booking_events"
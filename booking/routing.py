@@ -0,0 +1,343 @@
+# routing.py
+# Per-vehicle routes for a day's unassigned bookings, from the customers' coordinates.
+#
+# The located bookings go into a spatial grid (square cells of CELL_KM). Connected occupied
+# cells form the day's zones; each vehicle starts in the biggest zone nobody has taken yet
+# and then repeatedly drives to the nearest booking it can still reach in time (Solomon's
+# nearest-neighbour heuristic: travel time plus a fraction of the waiting time), fitting
+# around the jobs its cleaners already have. The grid answers "nearest" by walking rings
+# of cells outward and stopping once no closer cell can beat the best candidate, so a
+# step costs the bookings nearby, not all of them.
+import math
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from cleaner.models import Cleaner
+from customer.geo import haversine_km
+from reports.rollups import schedule_rollups
+from search.index import index_ids
+from .autoassign import AutoAssigner, team_key
+from .availability import booking_cells, day_start, refresh_cells
+from .choices import cleaner_choices
+from .events import publish_events
+from .models import Booking, BookingCleaner, BookingEvent
+from .scheduling import find_cleaner_conflicts, overlapping_assignments
+
+AVERAGE_SPEED_KMH = 30
+CELL_KM = 2.0
+# Minutes of travel one minute of waiting is worth when choosing the next stop
+WAIT_WEIGHT = 0.2
+KM_PER_DEGREE = 111.32
+
+
+def travel_minutes(km, speed_kmh=AVERAGE_SPEED_KMH):
+    return km / speed_kmh * 60
+
+
+class SpatialGrid:
+    """
+    Points bucketed into square cells of ``cell_km`` (equirectangular, fine at city scale).
+    """
+
+    def __init__(self, cell_km=CELL_KM, reference_latitude=0.0):
+        self.cell_km = cell_km
+        self.lng_scale = math.cos(math.radians(reference_latitude))
+        self.cells = defaultdict(dict)  # (row, col) -> {key: (lat, lng)}
+        self.cell_of_key = {}
+        self.bounds = None  # (min row, max row, min col, max col) ever occupied
+
+    def __len__(self):
+        return len(self.cell_of_key)
+
+    def cell(self, lat, lng):
+        return (
+            math.floor(lat * KM_PER_DEGREE / self.cell_km),
+            math.floor(lng * KM_PER_DEGREE * self.lng_scale / self.cell_km),
+        )
+
+    def add(self, key, lat, lng):
+        cell = self.cell(lat, lng)
+        self.cells[cell][key] = (lat, lng)
+        self.cell_of_key[key] = cell
+        row, col = cell
+        if self.bounds is None:
+            self.bounds = (row, row, col, col)
+        else:
+            min_row, max_row, min_col, max_col = self.bounds
+            self.bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+
+    def remove(self, key):
+        cell = self.cell_of_key.pop(key)
+        del self.cells[cell][key]
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def clusters(self):
+        """
+        Keys grouped by connected occupied cells (8-neighbourhood), biggest group first.
+        """
+        seen = set()
+        groups = []
+        for start in self.cells:
+            if start in seen:
+                continue
+            seen.add(start)
+            queue, keys = deque([start]), []
+            while queue:
+                row, col = queue.popleft()
+                keys.extend(self.cells[row, col])
+                for neighbour in ((row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+                    if neighbour in self.cells and neighbour not in seen:
+                        seen.add(neighbour)
+                        queue.append(neighbour)
+            groups.append(keys)
+        return sorted(groups, key=len, reverse=True)
+
+    def nearest(self, lat, lng, cost, lower_bound):
+        """
+        The key with the smallest ``cost(key, km)`` (None = not allowed), or None.
+        ``lower_bound(km)`` must never exceed the cost of a point ``km`` away; rings of cells
+        further out than the best cost allows are not visited.
+        """
+        if not self.cells:
+            return None
+        row, col = self.cell(lat, lng)
+        min_row, max_row, min_col, max_col = self.bounds
+        max_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        best_key, best_cost = None, None
+        for ring in range(max_ring + 1):
+            # Anything in this ring is at least (ring - 1) cells away
+            if best_cost is not None and lower_bound(max(ring - 1, 0) * self.cell_km) >= best_cost:
+                break
+            for cell in self._ring(row, col, ring):
+                for key, (key_lat, key_lng) in self.cells.get(cell, {}).items():
+                    value = cost(key, haversine_km(lat, lng, key_lat, key_lng))
+                    if value is not None and (best_cost is None or value < best_cost):
+                        best_key, best_cost = key, value
+        return best_key
+
+    @staticmethod
+    def _ring(row, col, ring):
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+
+class Stop:
+    def __init__(self, booking_id, reference, start_at, end_at, location, travel_km, fixed=False, booking=None):
+        self.booking_id = booking_id
+        self.reference = reference
+        self.start_at = start_at
+        self.end_at = end_at
+        self.location = location  # (lat, lng) or None
+        self.travel_km = travel_km
+        self.fixed = fixed  # already assigned to this vehicle's cleaners
+        self.booking = booking
+
+
+class RoutePlan:
+    def __init__(self, day):
+        self.day = day
+        self.vehicles = {}  # vehicle code -> [cleaner, ...]
+        self.routes = {}  # vehicle code -> [Stop, ...] in driving order
+        self.zones = []  # [[booking, ...], ...] biggest first
+        self.unrouted = []  # located bookings no vehicle could fit
+        self.unlocated = []  # bookings whose customer has no coordinates
+
+    @property
+    def routed_count(self):
+        return sum(1 for stops in self.routes.values() for stop in stops if not stop.fixed)
+
+    @property
+    def total_km(self):
+        return sum(stop.travel_km for stops in self.routes.values() for stop in stops)
+
+    def rows(self):
+        """
+        (vehicle, cleaners, stops, km) per vehicle with something to do.
+        """
+        for vehicle, stops in self.routes.items():
+            if stops:
+                yield vehicle, self.vehicles[vehicle], stops, sum(stop.travel_km for stop in stops)
+
+
+class RoutePlanner:
+    def __init__(self, day, speed_kmh=AVERAGE_SPEED_KMH, cell_km=CELL_KM):
+        self.day = day
+        self.start = day_start(day)
+        self.end = day_start(day + timedelta(days=1))
+        self.speed_kmh = speed_kmh
+        self.cell_km = cell_km
+
+    def vehicles(self, lock=False):
+        """
+        {vehicle code: [available cleaners]}: the teams that share a vehicle_code.
+        Committing reads the cleaners fresh and row-locks them, in the same order as
+        commit_assignments() and BookingAssignView, instead of using the cached choices.
+        """
+        if lock:
+            cleaners = Cleaner.objects.filter(is_available=True).select_for_update().order_by("pk")
+        else:
+            cleaners = cleaner_choices().objects
+        teams = defaultdict(list)
+        for cleaner in cleaners:
+            kind, code = team_key(cleaner)
+            if cleaner.is_available and kind == "vehicle":
+                teams[code].append(cleaner)
+        return dict(sorted(teams.items()))
+
+    def fixed_stops(self, vehicles):
+        """
+        {vehicle code: [Stop, ...]} of the bookings the vehicles' cleaners already have that day.
+        """
+        vehicle_of = {cleaner.pk: code for code, cleaners in vehicles.items() for cleaner in cleaners}
+        rows = overlapping_assignments(self.start, self.end, cleaner_ids=list(vehicle_of)).values_list(
+            "cleaner_id", "booking_id", "booking__booking_reference", "booking__start_at", "booking__end_at",
+            "booking__customer__latitude", "booking__customer__longitude",
+        )
+        stops = defaultdict(dict)
+        for cleaner_id, booking_id, reference, start_at, end_at, lat, lng in rows:
+            location = (float(lat), float(lng)) if lat is not None and lng is not None else None
+            stops[vehicle_of[cleaner_id]][booking_id] = Stop(
+                booking_id, reference, start_at, end_at, location, 0, fixed=True
+            )
+        return {code: sorted(by_booking.values(), key=lambda s: s.start_at) for code, by_booking in stops.items()}
+
+    def build(self, lock=False):
+        plan = RoutePlan(self.day)
+        bookings = AutoAssigner(self.start, self.end).unassigned_bookings(lock=lock)
+        plan.vehicles = self.vehicles(lock=lock)
+        located = {}
+        for booking in bookings:
+            if booking.customer.has_coordinates:
+                located[booking.pk] = booking
+            else:
+                plan.unlocated.append(booking)
+        if not located or not plan.vehicles:
+            plan.unrouted = list(located.values())
+            return plan
+
+        location = {pk: (float(b.customer.latitude), float(b.customer.longitude)) for pk, b in located.items()}
+        grid = SpatialGrid(self.cell_km, sum(lat for lat, _ in location.values()) / len(location))
+        for pk, (lat, lng) in location.items():
+            grid.add(pk, lat, lng)
+        zones = grid.clusters()
+        plan.zones = [[located[pk] for pk in keys] for keys in zones]
+        # Read after the cleaners are locked: nobody can add to their jobs until we commit
+        fixed = self.fixed_stops(plan.vehicles)
+
+        # Biggest teams first: they can take the bookings that need the most cleaners
+        for code, cleaners in sorted(plan.vehicles.items(), key=lambda item: -len(item[1])):
+            plan.routes[code] = self.route(code, len(cleaners), fixed.get(code, []), located, location, grid, zones)
+
+        plan.unrouted = [located[pk] for pk in grid.cell_of_key]
+        for stops in plan.routes.values():
+            for stop in stops:
+                stop.booking = located.get(stop.booking_id)
+        return plan
+
+    def route(self, code, team_size, fixed, bookings, location, grid, zones):
+        stops = []
+        position, free_at = None, self.start
+        upcoming = deque(fixed)
+
+        def minutes(km):
+            return travel_minutes(km, self.speed_kmh)
+
+        def cost(pk, km):
+            booking = bookings[pk]
+            if booking.required > team_size:
+                return None
+            arrive = free_at + timedelta(minutes=minutes(km))
+            if arrive > booking.start_at:
+                return None
+            if upcoming:
+                # Must still make the next job the team already has
+                after = upcoming[0]
+                back = haversine_km(*location[pk], *after.location) if after.location else 0
+                if booking.end_at + timedelta(minutes=minutes(back)) > after.start_at:
+                    return None
+            waiting = (booking.start_at - arrive).total_seconds() / 60
+            return minutes(km) + WAIT_WEIGHT * waiting
+
+        while True:
+            if position is None:
+                # Start in the biggest zone with a booking this team can reach, earliest first
+                choice = None
+                for zone in sorted(zones, key=lambda keys: -sum(pk in grid.cell_of_key for pk in keys)):
+                    candidates = [
+                        pk for pk in zone
+                        if pk in grid.cell_of_key and cost(pk, 0) is not None
+                    ]
+                    if candidates:
+                        choice = min(candidates, key=lambda pk: (bookings[pk].start_at, pk))
+                        break
+                km = 0
+            else:
+                choice = grid.nearest(*position, cost, minutes)
+                km = haversine_km(*position, *location[choice]) if choice is not None else 0
+
+            if choice is not None:
+                booking = bookings[choice]
+                grid.remove(choice)
+                stops.append(Stop(choice, booking.booking_reference, booking.start_at, booking.end_at,
+                                  location[choice], km))
+                position, free_at = location[choice], booking.end_at
+            elif upcoming:
+                # Nothing fits before the next job the team already has: drive there
+                stop = upcoming.popleft()
+                if position is not None and stop.location is not None:
+                    stop.travel_km = haversine_km(*position, *stop.location)
+                stops.append(stop)
+                position = stop.location or position
+                free_at = max(free_at, stop.end_at)
+            else:
+                return stops
+
+
+def preview_routes(day):
+    return RoutePlanner(day).build()
+
+
+@transaction.atomic
+def commit_routes(day):
+    """
+    Re-plans with the day's unassigned bookings and the available cleaners locked and gives
+    each routed booking the first cleaners of its vehicle's team. A team found double-booked
+    on the final check leaves its booking unrouted. Returns the plan that was written.
+    """
+    plan = RoutePlanner(day).build(lock=True)
+    assignments = {}
+    for code, stops in plan.routes.items():
+        team = [cleaner.pk for cleaner in plan.vehicles[code]]
+        kept = []
+        for stop in stops:
+            if not stop.fixed:
+                cleaner_ids = team[:stop.booking.required]
+                if find_cleaner_conflicts(stop.booking, cleaner_ids):
+                    plan.unrouted.append(stop.booking)
+                    continue
+                assignments[stop.booking] = cleaner_ids
+            kept.append(stop)
+        plan.routes[code] = kept
+    BookingCleaner.objects.bulk_create([
+        BookingCleaner(booking_id=booking.pk, cleaner_id=cleaner_id)
+        for booking, cleaner_ids in assignments.items()
+        for cleaner_id in cleaner_ids
+    ], batch_size=1000)
+    refresh_cells({
+        cell for booking, cleaner_ids in assignments.items() for cell in booking_cells(booking, cleaner_ids)
+    })
+    schedule_rollups(booking_days={timezone.localdate(booking.start_at) for booking in assignments})
+    index_ids(Booking, [booking.pk for booking in assignments])
+    publish_events(BookingEvent.ASSIGNED, [booking.pk for booking in assignments])
+    return plan
@@ -0,0 +1,53 @@
+# scheduling.py
+# Cleaner double-booking detection on the indexed start_at/end_at columns.
+from collections import defaultdict
+
+from cleaner.models import Cleaner
+from .models import MAX_BOOKING_DURATION, BookingCleaner
+
+
+def overlapping_assignments(start_at, end_at, cleaner_ids=None, exclude_booking_id=None):
+    """
+    BookingCleaner rows whose booking overlaps [start_at, end_at).
+    One range query (bookings_schedule_idx) joined to booking_cleaners, whatever its size: no
+    booking lasts longer than MAX_BOOKING_DURATION (Booking.clean), so only those starting that
+    much before ``start_at`` can overlap and the scanned index range stays narrow.
+    """
+    queryset = BookingCleaner.objects.filter(
+        booking__start_at__gt=start_at - MAX_BOOKING_DURATION,
+        booking__start_at__lt=end_at,
+        booking__end_at__gt=start_at,
+        booking__deleted_at__isnull=True,
+    )
+    if cleaner_ids is not None:
+        queryset = queryset.filter(cleaner_id__in=cleaner_ids)
+    if exclude_booking_id is not None:
+        queryset = queryset.exclude(booking_id=exclude_booking_id)
+    return queryset
+
+
+def find_cleaner_conflicts(booking, cleaner_ids=None):
+    """
+    Returns {cleaner_id: [booking_reference, ...]} for cleaners already assigned to another
+    booking overlapping ``booking``. Pass ``cleaner_ids`` to check only those cleaners.
+    """
+    if booking.start_at is None or booking.end_at is None:
+        booking.sync_schedule()
+    if cleaner_ids is not None and not cleaner_ids:
+        return {}
+
+    conflicts = defaultdict(list)
+    rows = overlapping_assignments(
+        booking.start_at, booking.end_at, cleaner_ids=cleaner_ids, exclude_booking_id=booking.pk
+    ).values_list("cleaner_id", "booking__booking_reference")
+    for cleaner_id, reference in rows:
+        conflicts[cleaner_id].append(reference)
+    return dict(conflicts)
+
+
+def describe_conflicts(conflicts):
+    """
+    "Name (BK-1, BK-2), ..." for a find_cleaner_conflicts() result, one query for the names.
+    """
+    names = dict(Cleaner.objects.filter(pk__in=conflicts).values_list("pk", "name"))
+    return ", ".join(f"{names.get(cid, cid)} ({', '.join(refs)})" for cid, refs in conflicts.items())
@@ -0,0 +1,77 @@
+# signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from cleaner.models import Cleaner
+from payment.models import Payment
+from service.models import Service
+from tricksy.cache import bump_cache_version
+from .choices import CLEANER_CHOICES_NAMESPACE, SERVICE_CHOICES_NAMESPACE
+from .events import publish_events
+from .models import Booking, BookingCleaner, BookingEvent, BookingService
+from .totals import recompute_booking_totals, schedule_recompute
+
+
+@receiver([post_save, post_delete], sender=BookingService)
+def booking_service_changed(sender, instance, **kwargs):
+    """
+    Keep Booking.required_cleaners/total_amount in step with its services.
+    bulk_create()/update() bypass this: call recompute_booking_totals() after them.
+    """
+    schedule_recompute([instance.booking_id])
+
+
+@receiver(pre_save, sender=Service)
+def remember_base_price(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_base_price = (
+            Service.objects.filter(pk=instance.pk).values_list("base_price", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Service)
+def service_price_changed(sender, instance, created, **kwargs):
+    """
+    A new base price changes the total of every booking using the service.
+    """
+    if created or getattr(instance, "_previous_base_price", None) == instance.base_price:
+        return
+    recompute_booking_totals(BookingService.objects.filter(service=instance).values("booking_id"))
+
+
+def invalidate_choices(namespace):
+    """
+    Bump now and again on commit, so no request re-caches the pre-commit rows.
+    """
+    bump_cache_version(namespace)
+    transaction.on_commit(lambda: bump_cache_version(namespace))
+
+
+@receiver([post_save, post_delete], sender=Service)
+def service_choices_changed(sender, **kwargs):
+    invalidate_choices(SERVICE_CHOICES_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Cleaner)
+def cleaner_choices_changed(sender, **kwargs):
+    invalidate_choices(CLEANER_CHOICES_NAMESPACE)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, **kwargs):
+    """
+    Push the change to open pages. Bulk writers call publish_events() themselves.
+    """
+    publish_events(BookingEvent.CREATED if created else BookingEvent.UPDATED, [instance.pk])
+
+
+@receiver(post_save, sender=BookingCleaner)
+def booking_cleaner_saved(sender, instance, **kwargs):
+    publish_events(BookingEvent.ASSIGNED, [instance.booking_id])
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, created, **kwargs):
+    if created:
+        publish_events(BookingEvent.PAID, [instance.booking_id])
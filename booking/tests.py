@@ -1,3 +1,1227 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import io
+import json
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import Role
+from account.utils import invalidate_permission_cache
+from cleaner.models import Cleaner
+from customer.models import Customer
+from payment.models import Payment
+from service.models import Service
+
+from tricksy.cache import bump_cache_version
+from tricksy.pagination import InvalidCursor, KeysetPaginator, is_whole_table
+
+from .assignments import replace_booking_cleaners
+from .autoassign import preview_assignments
+from .availability import availability_changes, free_cleaners, rebuild_index
+from .choices import CLEANER_CHOICES_NAMESPACE, SERVICE_CHOICES_NAMESPACE
+from .dashboard import PENDING_DAYS
+from .deletion import STALE_AFTER, claim_next_job, run_deletion_job, schedule_deletion
+from .events import EventBroker, event_stream
+from .export import EXPORT_COLUMNS
+from .forms import BookingForm
+from .importers import BookingImporter
+from .models import MAX_BOOKING_DURATION, Booking, BookingCleaner, BookingEvent, BookingService, CleanerDaySlots, DeletionJob
+from .routing import RoutePlanner
+from .scheduling import find_cleaner_conflicts, overlapping_assignments
+from .views import BookingListView
+
+
+class BookingListQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.services = [
+            Service.objects.create(name="Deep Clean", duration=120, base_price=Decimal("150.00")),
+            Service.objects.create(name="Windows", duration=60, base_price=Decimal("80.00")),
+        ]
+        self.cleaners = [Cleaner.objects.create(name=f"Cleaner {i}") for i in range(3)]
+        self.created = 0
+
+    def create_bookings(self, count):
+        for _ in range(count):
+            i = self.created = self.created + 1
+            customer = Customer.objects.create(full_name=f"Customer {i}", address=f"{i} Street")
+            booking = Booking.objects.create(
+                customer=customer,
+                booking_reference=f"BK-{i:06d}",
+                start_date=datetime.date(2026, 1, 1),
+                start_time=datetime.time(9),
+                end_date=datetime.date(2026, 1, 1),
+                end_time=datetime.time(11),
+                created_by=self.user,
+            )
+            for service in self.services:
+                BookingService.objects.create(booking=booking, service=service, number_of_cleaners=2)
+            if i % 2:
+                BookingCleaner.objects.create(booking=booking, cleaner=self.cleaners[i % 3])
+                Payment.objects.create(booking=booking, payment_method=Payment.CASH, amount=100, net_amount=100)
+
+    def list_queries(self):
+        url = reverse("booking:list")
+        self.client.get(url)  # warm the session and permission caches
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_is_constant(self):
+        self.create_bookings(1)
+        _, single_row = self.list_queries()
+
+        self.create_bookings(9)
+        response, full_page = self.list_queries()
+
+        self.assertEqual(len(response.context["bookings"]), 10)
+        self.assertEqual(single_row, full_page)
+        # session + user + bookings page + services prefetch + cleaners prefetch + total
+        self.assertEqual(full_page, 6)
+
+    def test_rows_are_annotated(self):
+        self.create_bookings(2)
+        response, _ = self.list_queries()
+        bookings = {b.booking_reference: b for b in response.context["bookings"]}
+
+        paid = bookings["BK-000001"]
+        self.assertTrue(paid.is_cleaner_assigned)
+        self.assertEqual(paid.payment_status, "Completed")
+        self.assertEqual(paid.latest_payment_method, Payment.CASH)
+        self.assertEqual(paid.required_cleaners, 4)
+        self.assertEqual(paid.total_amount, Decimal("460.00"))
+
+        unpaid = bookings["BK-000002"]
+        self.assertFalse(unpaid.is_cleaner_assigned)
+        self.assertEqual(unpaid.payment_status, "Pending")
+        self.assertIsNone(unpaid.latest_payment_method)
+
+    def test_list_totals_are_estimated_from_the_table(self):
+        # The soft-delete manager's own filter doesn't force a COUNT(*)
+        self.assertTrue(is_whole_table(BookingListView().get_queryset()))
+        self.assertTrue(is_whole_table(Customer.objects.all()))
+        self.assertFalse(is_whole_table(Booking.objects.filter(booking_reference="BK-000001")))
+        self.assertFalse(is_whole_table(Customer.objects.deleted()))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        for i in range(25):
+            Booking.objects.create(
+                customer=customer,
+                booking_reference=f"BK-{i:06d}",
+                start_date=datetime.date(2026, 1, 1),
+                start_time=datetime.time(9),
+                end_date=datetime.date(2026, 1, 1),
+                end_time=datetime.time(11),
+            )
+        # Ties on created_at (imports create many bookings in the same instant): ids decide
+        tied = list(Booking.objects.order_by("pk").values_list("pk", flat=True)[5:17])
+        Booking.objects.filter(pk__in=tied).update(created_at=timezone.now())
+        self.expected = list(Booking.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+        self.paginator = KeysetPaginator(Booking.objects.all(), 10, ordering=("-created_at", "-id"))
+
+    def test_cursors_round_trip(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([pk for page in pages for pk in (b.pk for b in page)], self.expected)
+        self.assertEqual([(page.has_previous(), page.has_next()) for page in pages],
+                         [(False, True), (True, True), (True, False)])
+        self.assertIsNone(pages[0].previous_cursor)
+        self.assertIsNone(pages[-1].next_cursor)
+
+        # Walking back from the last page gives the same pages
+        back = [pages[-1]]
+        while back[-1].has_previous():
+            back.append(self.paginator.page(back[-1].previous_cursor))
+        self.assertEqual([[b.pk for b in page] for page in reversed(back)], [[b.pk for b in page] for page in pages])
+        self.assertFalse(back[-1].has_previous())
+
+    def test_list_view_pages(self):
+        url = reverse("booking:list")
+        response = self.client.get(url)
+        self.assertEqual([b.pk for b in response.context["bookings"]], self.expected[:10])
+        cursor = response.context["page_obj"].next_cursor
+        response = self.client.get(url, {"cursor": cursor})
+        self.assertEqual([b.pk for b in response.context["bookings"]], self.expected[10:20])
+
+    def test_invalid_cursors_are_404(self):
+        valid = self.paginator.page().next_cursor
+        payload = json.loads(base64.urlsafe_b64decode(valid + "=" * (-len(valid) % 4)))
+
+        def encode(data):
+            return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+        for cursor in [
+            "not-a-cursor!",
+            valid[:-3],
+            encode({**payload, "d": "x"}),
+            encode({**payload, "v": payload["v"][:1]}),
+            encode({**payload, "v": ["yesterday", payload["v"][1]]}),
+            encode([1, 2]),
+        ]:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    self.paginator.decode_cursor(cursor)
+                self.assertEqual(self.client.get(reverse("booking:list"), {"cursor": cursor}).status_code, 404)
+
+
+class BookingAssignWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.service = Service.objects.create(name="Deep Clean", duration=120, base_price=Decimal("50.00"))
+        self.cleaners = [Cleaner.objects.create(name=f"Cleaner {i}") for i in range(30)]
+        customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.booking = Booking.objects.create(
+            customer=customer,
+            booking_reference="BK-000001",
+            start_date=datetime.date(2026, 1, 1),
+            start_time=datetime.time(9),
+            end_date=datetime.date(2026, 1, 1),
+            end_time=datetime.time(11),
+        )
+        BookingService.objects.create(booking=self.booking, service=self.service, number_of_cleaners=20)
+        self.client.get(reverse("booking:assign", args=[self.booking.pk]))  # warm the permission cache
+
+    def assign(self, cleaners, expected_url=None):
+        url = reverse("booking:assign", args=[self.booking.pk])
+        data = {"cleaners": ",".join(str(c.pk) for c in cleaners), "payment_method": Payment.CARD}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, data)
+        self.assertRedirects(response, expected_url or reverse("booking:list"), fetch_redirect_response=False)
+        return len(ctx.captured_queries)
+
+    def assigned_ids(self):
+        return set(self.booking.booking_cleaners.values_list("cleaner_id", flat=True))
+
+    def test_assign_writes_only_the_difference(self):
+        first = self.assign(self.cleaners[:20])
+        self.assertEqual(self.assigned_ids(), {c.pk for c in self.cleaners[:20]})
+        kept = set(BookingCleaner.objects.filter(cleaner__in=self.cleaners[5:20]).values_list("pk", flat=True))
+
+        second = self.assign(self.cleaners[5:25])
+        self.assertEqual(self.assigned_ids(), {c.pk for c in self.cleaners[5:25]})
+        # Cleaners on both lists keep their rows
+        self.assertEqual(
+            kept, set(BookingCleaner.objects.filter(cleaner__in=self.cleaners[5:20]).values_list("pk", flat=True))
+        )
+        # 20 cleaners: no per-cleaner queries; a replacement costs one DELETE more than a first
+        # assignment for the rows and one for the availability days it empties. The rest is a
+        # fixed refresh of the booking's search tokens; the report rollups are refreshed
+        # after the commit.
+        self.assertLessEqual(first, 18)
+        self.assertEqual(second, first + 2)
+
+        payment = self.booking.payments.latest("pk")
+        self.assertEqual(payment.amount, Decimal("1000.00"))
+
+    def test_wrong_count_changes_nothing(self):
+        self.assign(self.cleaners[:19], reverse("booking:assign", args=[self.booking.pk]))
+        self.assertEqual(self.assigned_ids(), set())
+        self.assertFalse(self.booking.payments.exists())
+
+
+class CleanerConflictTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("50.00"))
+        self.customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.morning_cleaner = Cleaner.objects.create(name="Morning")
+        self.overnight_cleaner = Cleaner.objects.create(name="Overnight")
+        # Jan 1 09:00-11:00, and Jan 2 22:00 to Jan 4 06:00
+        self.morning = self.create_booking("BK-000001", (1, 9), (1, 11), self.morning_cleaner)
+        self.overnight = self.create_booking("BK-000002", (2, 22), (4, 6), self.overnight_cleaner)
+
+    def create_booking(self, reference, start, end, cleaner=None):
+        booking = Booking.objects.create(
+            customer=self.customer, booking_reference=reference, **self.schedule(start, end)
+        )
+        BookingService.objects.create(booking=booking, service=self.service, number_of_cleaners=1)
+        if cleaner:
+            BookingCleaner.objects.create(booking=booking, cleaner=cleaner)
+        return booking
+
+    @staticmethod
+    def schedule(start, end):
+        """
+        Booking date/time fields from (day of January 2026, hour) pairs.
+        """
+        return {
+            "start_date": datetime.date(2026, 1, start[0]), "start_time": datetime.time(start[1]),
+            "end_date": datetime.date(2026, 1, end[0]), "end_time": datetime.time(end[1]),
+        }
+
+    def conflicts(self, start, end, cleaner_ids=None):
+        return find_cleaner_conflicts(Booking(**self.schedule(start, end)), cleaner_ids)
+
+    def test_overlapping_and_touching_ranges(self):
+        morning, overnight = self.morning_cleaner.pk, self.overnight_cleaner.pk
+        self.assertEqual(self.conflicts((1, 10), (1, 12)), {morning: ["BK-000001"]})
+        self.assertEqual(self.conflicts((1, 8), (1, 10)), {morning: ["BK-000001"]})
+        self.assertEqual(self.conflicts((1, 9), (1, 11)), {morning: ["BK-000001"]})
+        # Back to back is not a double-booking
+        self.assertEqual(self.conflicts((1, 11), (1, 12)), {})
+        self.assertEqual(self.conflicts((1, 7), (1, 9)), {})
+        # Only the given cleaners are checked
+        self.assertEqual(self.conflicts((1, 10), (1, 12), [overnight]), {})
+        # A booking never conflicts with itself
+        self.assertEqual(find_cleaner_conflicts(self.morning), {})
+
+    def test_multi_day_ranges(self):
+        morning, overnight = self.morning_cleaner.pk, self.overnight_cleaner.pk
+        self.assertEqual(self.conflicts((3, 10), (3, 11)), {overnight: ["BK-000002"]})
+        self.assertEqual(self.conflicts((1, 20), (2, 23)), {overnight: ["BK-000002"]})
+        self.assertEqual(self.conflicts((4, 6), (4, 8)), {})
+        self.assertEqual(self.conflicts((1, 0), (5, 0)), {morning: ["BK-000001"], overnight: ["BK-000002"]})
+        start = Booking.combine_schedule(datetime.date(2026, 1, 3), datetime.time(0))
+        rows = overlapping_assignments(start, start + datetime.timedelta(days=1))
+        self.assertEqual(list(rows.values_list("booking__booking_reference", flat=True)), ["BK-000002"])
+
+    def test_bookings_are_bounded_by_the_maximum_duration(self):
+        Booking(**self.schedule((1, 9), (8, 9))).clean()
+        with self.assertRaisesMessage(ValidationError, "A booking can last at most 7 days."):
+            Booking(**self.schedule((1, 9), (8, 10))).clean()
+        schedule = self.schedule((1, 9), (8, 10))
+        form = BookingForm({key: value.isoformat() for key, value in schedule.items()})
+        self.assertEqual(form.errors["__all__"], ["A booking can last at most 7 days."])
+
+        # The overlap scan starts MAX_BOOKING_DURATION before the slot, which is exact for bookings
+        # that respect it
+        self.create_booking("BK-000003", (10, 9), (17, 9), self.morning_cleaner)
+        self.assertEqual(self.conflicts((17, 8), (17, 10)), {self.morning_cleaner.pk: ["BK-000003"]})
+        self.assertEqual(self.conflicts((17, 9), (17, 10)), {})
+        start = Booking.combine_schedule(datetime.date(2026, 1, 17), datetime.time(8))
+        rows = overlapping_assignments(start, start + datetime.timedelta(hours=1))
+        self.assertIn(str((start - MAX_BOOKING_DURATION).date()), str(rows.query))
+        # Bookings starting earlier are not scanned at all
+        self.create_booking("BK-000004", (20, 9), (29, 9), self.overnight_cleaner)
+        self.assertEqual(self.conflicts((28, 9), (28, 10)), {})
+
+    def test_assign_page_lists_conflicting_cleaners(self):
+        clash = self.create_booking("BK-000003", (1, 10), (1, 12), self.morning_cleaner)
+        response = self.client.get(reverse("booking:assign", args=[clash.pk]))
+        self.assertEqual([(c.name, c.conflicts) for c in response.context["conflicting_cleaners"]],
+                         [("Morning", ["BK-000001"])])
+        response = self.client.get(reverse("booking:assign", args=[self.overnight.pk]))
+        self.assertEqual(response.context["conflicting_cleaners"], [])
+
+    def test_update_checks_the_new_times_and_cleaners(self):
+        booking = self.create_booking("BK-000003", (1, 12), (1, 13), self.morning_cleaner)
+        url = reverse("booking:update", args=[booking.pk])
+        service, cleaner = booking.booking_services.get(), booking.booking_cleaners.get()
+
+        def update(start, end, *new_cleaners):
+            schedule = self.schedule(start, end)
+            data = {
+                "start_date": schedule["start_date"].isoformat(), "start_time": schedule["start_time"].strftime("%H:%M"),
+                "end_date": schedule["end_date"].isoformat(), "end_time": schedule["end_time"].strftime("%H:%M"),
+                "services-TOTAL_FORMS": 1, "services-INITIAL_FORMS": 1,
+                "services-0-id": service.pk, "services-0-service": self.service.pk, "services-0-number_of_cleaners": 1,
+                "cleaners-TOTAL_FORMS": 1 + len(new_cleaners), "cleaners-INITIAL_FORMS": 1,
+                "cleaners-0-id": cleaner.pk, "cleaners-0-cleaner": self.morning_cleaner.pk,
+            }
+            for i, new_cleaner in enumerate(new_cleaners, start=1):
+                data[f"cleaners-{i}-cleaner"] = new_cleaner.pk
+            return self.client.post(url, data)
+
+        # Moved onto the morning cleaner's other booking
+        response = update((1, 10), (1, 12))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Morning (BK-000001)", str(response.context["form"].non_field_errors()))
+        booking.refresh_from_db()
+        self.assertEqual(booking.start_time, datetime.time(12))
+
+        # The overnight cleaner added on a day they are busy
+        response = update((3, 12), (3, 13), self.overnight_cleaner)
+        self.assertIn("Overnight (BK-000002)", str(response.context["form"].non_field_errors()))
+        self.assertEqual(booking.booking_cleaners.count(), 1)
+
+        response = update((1, 11), (1, 12), self.overnight_cleaner)
+        self.assertRedirects(response, reverse("booking:list"), fetch_redirect_response=False)
+        booking.refresh_from_db()
+        self.assertEqual((booking.start_time, booking.booking_cleaners.count()), (datetime.time(11), 2))
+
+
+class AutoAssignTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("50.00"))
+        self.customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.day = datetime.date(2026, 1, 1)
+        self.created = 0
+
+    def create_booking(self, start, end, cleaners=1):
+        self.created += 1
+        booking = Booking.objects.create(
+            customer=self.customer,
+            booking_reference=f"BK-{self.created:06d}",
+            start_date=self.day,
+            start_time=datetime.time(*start),
+            end_date=self.day,
+            end_time=datetime.time(*end),
+        )
+        BookingService.objects.create(booking=booking, service=self.service, number_of_cleaners=cleaners)
+        return booking
+
+    def plan(self):
+        start = Booking.combine_schedule(self.day, datetime.time.min)
+        return preview_assignments(start, start + datetime.timedelta(days=1))
+
+    def test_no_cleaner_is_double_booked(self):
+        cleaners = [Cleaner.objects.create(name=f"Cleaner {i}") for i in range(4)]
+        bookings = [self.create_booking((8 + i % 6, 30 * (i % 2)), (10 + i % 6, 30 * (i % 2)), 1 + i % 3)
+                    for i in range(12)]
+        plan = self.plan()
+        self.assertTrue(plan.assignments)
+        self.assertTrue(plan.unfilled)
+        by_id = {booking.pk: booking for booking in plan.bookings}
+        for cleaner in cleaners:
+            jobs = sorted((by_id[pk].start_at, by_id[pk].end_at)
+                          for pk, cleaner_ids in plan.assignments.items() if cleaner.pk in cleaner_ids)
+            for (_, end), (start, _) in zip(jobs, jobs[1:]):
+                self.assertLessEqual(end, start)
+        self.assertEqual(len(plan.bookings), len(bookings))
+        for booking in plan.bookings:
+            self.assertEqual(len(plan.assignments.get(booking.pk, [])) or plan.unfilled[booking.pk],
+                             booking.required)
+
+    def test_one_team_is_preferred(self):
+        solo = [Cleaner.objects.create(name=f"Solo {i}") for i in range(2)]
+        van = [Cleaner.objects.create(name=f"Van {i}", vehicle_code="v1") for i in range(3)]
+        company = [Cleaner.objects.create(name=f"Company {i}", company="Sparkle") for i in range(2)]
+        pair = self.create_booking((9,), (11,), cleaners=2)
+        trio = self.create_booking((9,), (11,), cleaners=3)
+        single = self.create_booking((9,), (11,), cleaners=1)
+        plan = self.plan()
+        # Smallest team that covers the job: the company pair, then the van, then a solo cleaner
+        self.assertEqual(set(plan.assignments[pair.pk]), {c.pk for c in company})
+        self.assertEqual(set(plan.assignments[trio.pk]), {c.pk for c in van})
+        self.assertIn(plan.assignments[single.pk][0], {c.pk for c in solo})
+
+    def test_existing_assignments_are_respected(self):
+        busy, free = Cleaner.objects.create(name="Busy"), Cleaner.objects.create(name="Free")
+        Cleaner.objects.create(name="Away", is_available=False)
+        existing = self.create_booking((9,), (11,))
+        BookingCleaner.objects.create(booking=existing, cleaner=busy)
+        overlapping = self.create_booking((10,), (12,))
+        later = self.create_booking((11,), (13,), cleaners=2)
+        too_big = self.create_booking((14,), (15,), cleaners=3)
+        plan = self.plan()
+        self.assertNotIn(existing.pk, {booking.pk for booking in plan.bookings})
+        self.assertEqual(plan.assignments[overlapping.pk], [free.pk])
+        self.assertNotIn(later.pk, plan.assignments)  # "Free" is still on the 10:00 job
+        self.assertEqual(plan.unfilled, {later.pk: 2, too_big.pk: 3})
+
+    def test_commit_writes_the_plan(self):
+        cleaners = [Cleaner.objects.create(name=f"Cleaner {i}") for i in range(3)]
+        first = self.create_booking((9,), (11,), cleaners=2)
+        second = self.create_booking((10,), (12,))
+        response = self.client.post(reverse("booking:auto_assign"), {"start": self.day.isoformat()})
+        self.assertRedirects(response, reverse("booking:list"), fetch_redirect_response=False)
+        self.assertEqual(first.booking_cleaners.count(), 2)
+        self.assertEqual(second.booking_cleaners.count(), 1)
+        self.assertEqual(set(BookingCleaner.objects.values_list("cleaner_id", flat=True)), {c.pk for c in cleaners})
+        cleaner_ids = list(first.booking_cleaners.values_list("cleaner_id", flat=True))
+        self.assertEqual(find_cleaner_conflicts(first, cleaner_ids), {})
+        self.assertEqual(free_cleaners(first.start_at, first.end_at), [])
+        # Nothing is left to assign
+        self.assertEqual(self.plan().bookings, [])
+
+
+class BookingUpdateFormsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.services = [
+            Service.objects.create(name=f"Service {i}", duration=60, base_price=Decimal("10.00")) for i in range(16)
+        ]
+        self.cleaners = [Cleaner.objects.create(name=f"Cleaner {i}") for i in range(16)]
+        self.customer = Customer.objects.create(full_name="Customer", address="1 Street")
+
+    def create_booking(self, lines):
+        # One day per size, so bookings sharing cleaners don't overlap
+        booking = Booking.objects.create(
+            customer=self.customer,
+            booking_reference=f"BK-{lines:06d}",
+            start_date=datetime.date(2026, 1, lines),
+            start_time=datetime.time(9),
+            end_date=datetime.date(2026, 1, lines),
+            end_time=datetime.time(11),
+        )
+        for i in range(lines):
+            BookingService.objects.create(booking=booking, service=self.services[i], number_of_cleaners=1)
+            BookingCleaner.objects.create(booking=booking, cleaner=self.cleaners[i])
+        return booking
+
+    def post_data(self, booking):
+        """
+        Every service line gets 2 cleaners, the first line of each formset is removed and
+        one new line is added to each.
+        """
+        data = {
+            "start_date": booking.start_date.isoformat(),
+            "start_time": "09:00",
+            "end_date": booking.end_date.isoformat(),
+            "end_time": "11:00",
+        }
+        services = list(booking.booking_services.order_by("pk"))
+        cleaners = list(booking.booking_cleaners.order_by("pk"))
+        for prefix, rows in (("services", services), ("cleaners", cleaners)):
+            data[f"{prefix}-TOTAL_FORMS"] = len(rows) + 1
+            data[f"{prefix}-INITIAL_FORMS"] = len(rows)
+            for i, row in enumerate(rows):
+                data[f"{prefix}-{i}-id"] = row.pk
+                if i == 0:
+                    data[f"{prefix}-{i}-DELETE"] = "on"
+        for i, row in enumerate(services):
+            data[f"services-{i}-service"] = row.service_id
+            data[f"services-{i}-number_of_cleaners"] = 2
+        for i, row in enumerate(cleaners):
+            data[f"cleaners-{i}-cleaner"] = row.cleaner_id
+        data[f"services-{len(services)}-service"] = self.services[len(services)].pk
+        data[f"services-{len(services)}-number_of_cleaners"] = 3
+        data[f"cleaners-{len(cleaners)}-cleaner"] = self.cleaners[len(cleaners)].pk
+        return data
+
+    def update(self, booking):
+        url = reverse("booking:update", args=[booking.pk])
+        self.client.get(url)  # warm the permission cache
+        data = self.post_data(booking)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, data)
+        self.assertRedirects(response, reverse("booking:list"), fetch_redirect_response=False)
+        return [q["sql"].split()[0] for q in ctx.captured_queries]
+
+    def test_update_applies_every_change(self):
+        booking = self.create_booking(3)
+        self.update(booking)
+        booking.refresh_from_db()
+
+        lines = dict(booking.booking_services.values_list("service_id", "number_of_cleaners"))
+        self.assertEqual(lines, {self.services[1].pk: 2, self.services[2].pk: 2, self.services[3].pk: 3})
+        self.assertEqual(
+            set(booking.booking_cleaners.values_list("cleaner_id", flat=True)),
+            {c.pk for c in self.cleaners[1:4]},
+        )
+        self.assertEqual(booking.required_cleaners, 7)
+        self.assertEqual(booking.total_amount, Decimal("70.00"))
+
+    def test_write_count_is_constant(self):
+        small = self.update(self.create_booking(3))
+        large = self.update(self.create_booking(15))
+        writes = [sql for sql in small if sql in ("INSERT", "UPDATE", "DELETE")]
+        self.assertEqual(writes, [sql for sql in large if sql in ("INSERT", "UPDATE", "DELETE")])
+        # booking, services (delete/update/insert), cleaners (delete/insert), search tokens
+        # (replaced), availability (upsert/emptied days), stored totals; the rollups are
+        # refreshed after the commit
+        self.assertEqual(writes, [
+            "UPDATE", "DELETE", "UPDATE", "INSERT", "DELETE", "INSERT", "DELETE", "INSERT",
+            "INSERT", "DELETE", "UPDATE",
+        ])
+
+    def choice_queries(self, booking):
+        url = reverse("booking:update", args=[booking.pk])
+        self.client.get(url)  # warm the permission cache
+        bump_cache_version(SERVICE_CHOICES_NAMESPACE)
+        bump_cache_version(CLEANER_CHOICES_NAMESPACE)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith(('SELECT "services"', 'SELECT "cleaners"'))
+        ]
+
+    def test_edit_page_loads_each_choice_list_once(self):
+        self.assertEqual(len(self.choice_queries(self.create_booking(15))), 2)
+
+        # Warm cache: no choice queries at all, and new rows show up straight away
+        Service.objects.create(name="Brand New", duration=30, base_price=Decimal("5.00"))
+        url = reverse("booking:update", args=[self.create_booking(3).pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, "Brand New")
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith('SELECT "services"')])
+
+    def test_update_validates_against_cached_choices(self):
+        booking = self.create_booking(15)
+        url = reverse("booking:update", args=[booking.pk])
+        self.client.get(url)  # warm the permission and choice caches
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, self.post_data(booking))
+        self.assertRedirects(response, reverse("booking:list"), fetch_redirect_response=False)
+        # Only the conflict check's row lock (ids) reads the cleaners table
+        self.assertFalse([
+            q for q in ctx.captured_queries
+            if 'FROM "services"' in q["sql"]
+            or 'FROM "cleaners"' in q["sql"] and not q["sql"].startswith('SELECT "cleaners"."id" AS "pk" FROM')
+        ])
+
+
+class BookingCleanerSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.booking, self.other = [
+            Booking.objects.create(
+                customer=customer,
+                booking_reference=reference,
+                start_date=datetime.date(2026, 1, 1),
+                start_time=datetime.time(9),
+                end_date=datetime.date(2026, 1, 1),
+                end_time=datetime.time(11),
+            )
+            for reference in ("BK-000001", "BK-000002")
+        ]
+        self.cleaners = [
+            Cleaner.objects.create(name=f"Cleaner {i:02d}", company="Sparkle" if i % 2 else "Shine",
+                                   vehicle_code=f"V{i % 3}")
+            for i in range(25)
+        ]
+        self.cleaners.append(Cleaner.objects.create(name="Off Duty", is_available=False))
+        BookingCleaner.objects.create(booking=self.booking, cleaner=self.cleaners[20])
+        BookingCleaner.objects.create(booking=self.other, cleaner=self.cleaners[0])
+
+    def search(self, **params):
+        response = self.client.get(reverse("booking:cleaner_search", args=[self.booking.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_assigned_first_and_busy_last(self):
+        results, cursor = [], None
+        while True:
+            data = self.search(available="1", **({"cursor": cursor} if cursor else {}))
+            results += data["results"]
+            cursor = data["next"]
+            if not cursor:
+                break
+
+        ids = [row["id"] for row in results]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+        self.assertEqual(ids[0], self.cleaners[20].pk)
+        self.assertTrue(results[0]["assigned"])
+        self.assertEqual(ids[-1], self.cleaners[0].pk)
+        self.assertEqual(results[-1]["conflicts"], ["BK-000002"])
+
+    def test_prefix_search(self):
+        names = {row["name"] for row in self.search(q="sparkle")["results"]}
+        self.assertEqual(names, {f"Cleaner {i:02d}" for i in range(1, 25, 2)})
+        self.assertEqual(len(self.search(q="v2")["results"]), 8)
+        self.assertEqual([row["name"] for row in self.search(q="off", available="0")["results"]], ["Off Duty"])
+        self.assertEqual(self.search(q="duty")["results"], [])
+
+
+class BookingCustomerReuseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("10.00"))
+        self.customer = Customer.objects.create(
+            full_name="Fatima Khan", address="Dubai Marina", building="Ocean Tower", unit="1204"
+        )
+
+    def post_booking(self, **customer):
+        data = {
+            "full_name": "Fatima Khan",
+            "address": "Dubai Marina",
+            "building": "Ocean Tower",
+            "unit": "1204",
+            "start_date": "2026-01-01",
+            "start_time": "09:00",
+            "end_date": "2026-01-01",
+            "end_time": "11:00",
+            "form-TOTAL_FORMS": 1,
+            "form-INITIAL_FORMS": 0,
+            "form-0-service": self.service.pk,
+            "form-0-number_of_cleaners": 2,
+            **customer,
+        }
+        response = self.client.post(reverse("booking:create"), data)
+        self.assertRedirects(response, reverse("booking:list"), fetch_redirect_response=False)
+        return Booking.objects.latest("pk")
+
+    def test_repeat_client_is_reused(self):
+        booking = self.post_booking(full_name="fatima  khan", region="Dubai")
+        self.assertEqual(booking.customer_id, self.customer.pk)
+        self.assertEqual(Customer.objects.count(), 1)
+        # Blank details are filled in from the form
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.region, "Dubai")
+
+    def test_new_address_creates_a_customer(self):
+        booking = self.post_booking(unit="1205")
+        self.assertNotEqual(booking.customer_id, self.customer.pk)
+        self.assertEqual(Customer.objects.count(), 2)
+
+    def test_import_reuses_existing_and_repeated_customers(self):
+        csv_file = io.StringIO(
+            "full_name,address,building,unit,start_date,start_time,end_date,end_time,services\n"
+            "Fatima Khan,Dubai Marina,Ocean Tower,1204,2026-01-01,09:00,2026-01-01,11:00,Deep Clean\n"
+            "Omar Ali,JLT,Cluster A,12,2026-01-01,09:00,2026-01-01,11:00,Deep Clean\n"
+            "OMAR ALI,JLT,Cluster A,12,2026-01-02,09:00,2026-01-02,11:00,Deep Clean\n"
+        )
+        result = BookingImporter(user=self.user).import_csv(csv_file)
+        self.assertEqual((result.created, result.errors), (3, []))
+        self.assertEqual(Customer.objects.count(), 2)
+        customers = list(Booking.objects.order_by("pk").values_list("customer_id", flat=True))
+        self.assertEqual(customers[0], self.customer.pk)
+        self.assertEqual(customers[1], customers[2])
+
+
+class BookingExportTests(TestCase):
+    def setUp(self):
+        service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("10.00"))
+        cleaner = Cleaner.objects.create(name="Cleaner")
+        customer = Customer.objects.create(full_name="Customer", address="1 Street", region="Marina")
+        for i in range(3):
+            booking = Booking.objects.create(
+                customer=customer,
+                booking_reference=f"BK-00000{i}",
+                start_date=datetime.date(2026, 1, i + 1),
+                start_time=datetime.time(9),
+                end_date=datetime.date(2026, 1, i + 1),
+                end_time=datetime.time(11),
+            )
+            BookingService.objects.create(booking=booking, service=service, number_of_cleaners=2)
+            BookingCleaner.objects.create(booking=booking, cleaner=cleaner)
+            Payment.objects.create(booking=booking, payment_method=Payment.CASH, amount=Decimal("15.00"))
+
+    def export(self, **options):
+        stdout = io.StringIO()
+        call_command("export_bookings", chunk_size=2, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(start="2026-01-02"))))
+        self.assertEqual([row["booking_reference"] for row in rows], ["BK-000001", "BK-000002"])
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS)
+        self.assertEqual(
+            (rows[0]["start"], rows[0]["services"], rows[0]["cleaners"], rows[0]["paid_total"]),
+            ("2026-01-02 09:00:00", "Deep Clean x2", "Cleaner", "15.00"),
+        )
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export(format="ndjson").splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            {(row["booking_reference"], row["required_cleaners"], row["payments"]) for row in rows},
+            {(f"BK-00000{i}", 2, 1) for i in range(3)},
+        )
+
+    def test_chunk_size_must_be_positive(self):
+        for chunk_size in (0, -1):
+            with self.assertRaisesMessage(CommandError, "--chunk-size must be at least 1."):
+                call_command("export_bookings", chunk_size=chunk_size, stdout=io.StringIO())
+
+
+class BookingImportTests(TestCase):
+    header = "full_name,address,start_date,start_time,end_date,end_time,services\n"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="admin", password="pass")
+        self.deep = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("50.00"))
+        self.sofa = Service.objects.create(name="Sofa", duration=60, base_price=Decimal("30.00"))
+
+    def import_csv(self, rows, chunk_size=2):
+        return BookingImporter(user=self.user, chunk_size=chunk_size).import_csv(io.StringIO(self.header + rows))
+
+    def test_bad_rows_are_reported_and_the_rest_imported(self):
+        result = self.import_csv(
+            "Fatima,Marina,2026-01-01,09:00,2026-01-01,11:00,Deep Clean:2; Sofa\n"
+            "Omar,JLT,2026-01-01,09:00,2026-01-01,11:00,Carpet\n"
+            "Omar,JLT,2026-01-02,09:00,2026-01-02,11:00,Sofa:3\n"
+        )
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [(3, "Unknown service 'Carpet'.")])
+
+        bookings = list(Booking.objects.order_by("start_date"))
+        self.assertEqual(len({booking.booking_reference for booking in bookings}), 2)
+        self.assertTrue(all(booking.booking_reference for booking in bookings))
+        self.assertEqual(
+            [(b.required_cleaners, b.total_amount, b.created_by_id) for b in bookings],
+            [(3, Decimal("130.00"), self.user.pk), (3, Decimal("90.00"), self.user.pk)],
+        )
+        self.assertEqual(
+            sorted(BookingService.objects.filter(booking=bookings[0]).values_list("service__name", "number_of_cleaners")),
+            [("Deep Clean", 2), ("Sofa", 1)],
+        )
+
+    def test_end_before_start_is_rejected_like_the_form(self):
+        row = {"start_date": "2026-01-01", "start_time": "11:00", "end_date": "2026-01-01", "end_time": "09:00"}
+        form = BookingForm(row)
+        self.assertFalse(form.is_valid())
+
+        result = self.import_csv("Fatima,Marina,2026-01-01,11:00,2026-01-01,09:00,Sofa\n")
+        self.assertEqual(result.errors, [(2, form.non_field_errors()[0])])
+        self.assertFalse(Booking.objects.exists())
+
+        result = self.import_csv("Fatima,Marina,2026-01-01,09:00,2026-01-09,09:00,Sofa\n")
+        self.assertEqual(result.errors, [(2, "A booking can last at most 7 days.")])
+
+    def test_chunk_size_must_be_positive(self):
+        for chunk_size in (0, -1):
+            with self.assertRaisesMessage(CommandError, "--chunk-size must be at least 1."):
+                call_command("import_bookings", "bookings.csv", chunk_size=chunk_size)
+
+
+class BookingTotalsTests(TestCase):
+    def setUp(self):
+        self.deep = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("50.00"))
+        self.sofa = Service.objects.create(name="Sofa", duration=60, base_price=Decimal("30.00"))
+        customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.both, self.sofa_only = [
+            Booking.objects.create(
+                customer=customer,
+                booking_reference=reference,
+                start_date=datetime.date(2026, 1, 1),
+                start_time=datetime.time(9),
+                end_date=datetime.date(2026, 1, 1),
+                end_time=datetime.time(11),
+            )
+            for reference in ("BK-000001", "BK-000002")
+        ]
+        BookingService.objects.create(booking=self.both, service=self.deep, number_of_cleaners=2)
+        BookingService.objects.create(booking=self.both, service=self.sofa, number_of_cleaners=1)
+        BookingService.objects.create(booking=self.sofa_only, service=self.sofa, number_of_cleaners=3)
+
+    def totals(self):
+        return list(Booking.objects.order_by("pk").values_list("required_cleaners", "total_amount"))
+
+    def test_price_change_updates_the_bookings_using_the_service(self):
+        self.assertEqual(self.totals(), [(3, Decimal("130.00")), (3, Decimal("90.00"))])
+        self.deep.base_price = Decimal("60.00")
+        self.deep.save()
+        self.assertEqual(self.totals(), [(3, Decimal("150.00")), (3, Decimal("90.00"))])
+
+    def test_command_repairs_corrupted_totals(self):
+        Booking.objects.filter(pk=self.both.pk).update(required_cleaners=0, total_amount=Decimal("1.00"))
+        call_command("recompute_booking_totals", batch_size=1, stdout=io.StringIO())
+        self.assertEqual(self.totals(), [(3, Decimal("130.00")), (3, Decimal("90.00"))])
+
+        for batch_size in (0, -1):
+            with self.assertRaisesMessage(CommandError, "--batch-size must be at least 1."):
+                call_command("recompute_booking_totals", batch_size=batch_size)
+
+
+class BookingDeletionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("10.00"))
+        self.cleaner = Cleaner.objects.create(name="Cleaner")
+        self.customer = Customer.objects.create(full_name="Corporate", address="1 Street")
+        self.bookings = []
+        for i in range(5):
+            booking = Booking.objects.create(
+                customer=self.customer,
+                booking_reference=f"BK-{i:06d}",
+                start_date=datetime.date(2026, 1, 1),
+                start_time=datetime.time(9),
+                end_date=datetime.date(2026, 1, 1),
+                end_time=datetime.time(11),
+            )
+            BookingService.objects.create(booking=booking, service=service, number_of_cleaners=1)
+            BookingCleaner.objects.create(booking=booking, cleaner=self.cleaner)
+            Payment.objects.create(booking=booking, payment_method=Payment.CASH, amount=Decimal("10.00"))
+            self.bookings.append(booking)
+
+    def delete(self, url):
+        response = self.client.delete(url, headers={"x-requested-with": "XMLHttpRequest"})
+        self.assertTrue(response.json()["success"])
+        return DeletionJob.objects.get(pk=response.json()["job"])
+
+    def test_customer_is_hidden_at_once_and_purged_in_chunks(self):
+        job = self.delete(reverse("customer:delete", args=[self.customer.pk]))
+        self.assertEqual(job.status, DeletionJob.PENDING)
+        self.assertFalse(Customer.objects.filter(pk=self.customer.pk).exists())
+        self.assertFalse(Booking.objects.filter(customer_id=self.customer.pk).exists())
+        self.assertEqual(Booking.all_objects.filter(customer_id=self.customer.pk).count(), 5)
+        # The cleaner is free again straight away
+        self.assertEqual(find_cleaner_conflicts(Booking(start_date=datetime.date(2026, 1, 1),
+                                                        start_time=datetime.time(10),
+                                                        end_date=datetime.date(2026, 1, 1),
+                                                        end_time=datetime.time(12))), {})
+
+        out = io.StringIO()
+        call_command("purge_deleted", "--chunk-size", "2", stdout=out)
+        self.assertIn("2/5 bookings purged (40%)", out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.total, job.percent), (DeletionJob.DONE, 5, 5, 100))
+        self.assertFalse(Customer.all_objects.filter(pk=self.customer.pk).exists())
+        self.assertFalse(Booking.all_objects.exists())
+        self.assertFalse(BookingService.objects.exists())
+        self.assertFalse(BookingCleaner.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+
+    def test_booking_delete(self):
+        booking = self.bookings[0]
+        job = self.delete(reverse("booking:delete", args=[booking.pk]))
+        self.assertEqual(self.client.get(reverse("booking:deletion_job", args=[job.pk])).json()["status"], "pending")
+        call_command("purge_deleted", stdout=io.StringIO())
+        self.assertEqual(self.client.get(reverse("booking:deletion_job", args=[job.pk])).json()["percent"], 100)
+        self.assertFalse(Booking.all_objects.filter(pk=booking.pk).exists())
+        self.assertEqual(Booking.objects.count(), 4)
+        self.assertEqual(Payment.objects.count(), 4)
+
+    def test_post_schedules_the_purge_too(self):
+        booking = self.bookings[0]
+        response = self.client.post(reverse("booking:delete", args=[booking.pk]))
+        self.assertRedirects(response, reverse("booking:list"), fetch_redirect_response=False)
+        self.assertTrue(DeletionJob.objects.filter(target=DeletionJob.BOOKING, object_id=booking.pk).exists())
+        self.assertTrue(Booking.all_objects.filter(pk=booking.pk).exists())
+        self.assertEqual(Payment.objects.filter(booking=booking).count(), 1)
+
+        response = self.client.post(reverse("customer:delete", args=[self.customer.pk]))
+        job = DeletionJob.objects.get(pk=response.json()["job"])
+        self.assertEqual(job.target, DeletionJob.CUSTOMER)
+        self.assertTrue(Customer.all_objects.filter(pk=self.customer.pk).exists())
+        self.assertEqual(Booking.all_objects.filter(customer_id=self.customer.pk).count(), 5)
+
+
+    def test_jobs_of_dead_workers_are_reclaimed(self):
+        job = schedule_deletion(self.bookings[0])
+        self.assertEqual(claim_next_job(), job)
+        # Still beating: another worker leaves it alone
+        self.assertIsNone(claim_next_job())
+
+        DeletionJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - STALE_AFTER)
+        reclaimed = claim_next_job()
+        self.assertEqual(reclaimed, job)
+        run_deletion_job(reclaimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (DeletionJob.DONE, 1))
+        self.assertFalse(Booking.all_objects.filter(pk=self.bookings[0].pk).exists())
+
+
+class CleanerAvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("10.00"))
+        self.cleaners = [Cleaner.objects.create(name=f"Cleaner {i}") for i in range(3)]
+        Cleaner.objects.create(name="Off duty", is_available=False)
+        self.customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.booking = self.create_booking("BK-000001", datetime.time(9), datetime.time(11))
+
+    def create_booking(self, reference, start, end):
+        return Booking.objects.create(
+            customer=self.customer,
+            booking_reference=reference,
+            start_date=datetime.date(2026, 1, 1),
+            start_time=start,
+            end_date=datetime.date(2026, 1, 1),
+            end_time=end,
+        )
+
+    def at(self, hour, minute=0):
+        return Booking.combine_schedule(datetime.date(2026, 1, 1), datetime.time(hour, minute))
+
+    def free(self, start, end):
+        return {c.name for c in free_cleaners(start, end)}
+
+    def test_bitsets_follow_assignment_changes(self):
+        with availability_changes([self.booking.pk]):
+            replace_booking_cleaners(self.booking, [self.cleaners[0].pk, self.cleaners[1].pk])
+        self.assertEqual(self.free(self.at(10), self.at(10, 30)), {"Cleaner 2"})
+        self.assertEqual(self.free(self.at(11), self.at(12)), {"Cleaner 0", "Cleaner 1", "Cleaner 2"})
+        self.assertEqual(self.free(self.at(8), self.at(9, 15)), {"Cleaner 2"})
+
+        # Moving the booking clears the old slots
+        with availability_changes([self.booking.pk]):
+            self.booking.start_time, self.booking.end_time = datetime.time(14), datetime.time(15)
+            self.booking.save()
+            replace_booking_cleaners(self.booking, [self.cleaners[1].pk])
+        self.assertEqual(self.free(self.at(10), self.at(10, 30)), {"Cleaner 0", "Cleaner 1", "Cleaner 2"})
+        self.assertEqual(self.free(self.at(14, 30), self.at(16)), {"Cleaner 0", "Cleaner 2"})
+        self.assertEqual(CleanerDaySlots.objects.count(), 1)
+
+        # A rebuild from scratch gives the same bits
+        before = list(CleanerDaySlots.objects.values_list("cleaner_id", "day", "busy"))
+        rebuild_index()
+        self.assertEqual(
+            [(c, d, bytes(b)) for c, d, b in before],
+            [(c, d, bytes(b)) for c, d, b in CleanerDaySlots.objects.values_list("cleaner_id", "day", "busy")],
+        )
+
+    def test_assign_view_and_grid(self):
+        self.booking.booking_services.create(service=Service.objects.get(), number_of_cleaners=1)
+        self.client.post(reverse("booking:assign", args=[self.booking.pk]),
+                         {"cleaners": str(self.cleaners[2].pk), "payment_method": Payment.CASH})
+        response = self.client.get(reverse("booking:availability"), {"start": "2026-01-01", "days": 2})
+        grid = response.context["grid"]
+        counts = grid.free_counts[datetime.date(2026, 1, 1)]
+        self.assertEqual((counts[17], counts[18], counts[21], counts[22]), (3, 2, 2, 3))
+        self.assertEqual(grid.free_counts[datetime.date(2026, 1, 2)], [3] * 48)
+
+        response = self.client.get(reverse("booking:free_cleaners"),
+                                   {"start": "2026-01-01T10:00", "end": "2026-01-01T12:00"})
+        self.assertEqual([row["name"] for row in response.json()["results"]], ["Cleaner 0", "Cleaner 1"])
+
+
+class BookingRoutesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("10.00"))
+        self.van = [Cleaner.objects.create(name=f"Van {i}", vehicle_code="V1") for i in range(2)]
+        self.car = Cleaner.objects.create(name="Car", vehicle_code="v2")
+        Cleaner.objects.create(name="Walker")
+        self.marina = [self.customer(f"Marina {i}", 25.0800 + i * 0.002, 55.1400) for i in range(3)]
+        self.deira = [self.customer(f"Deira {i}", 25.2700, 55.3100 + i * 0.002) for i in range(3)]
+
+        self.a1 = self.create_booking("BK-A1", self.marina[0], 9, 10)
+        self.a2 = self.create_booking("BK-A2", self.marina[1], 10, 11, minute=30)
+        self.a3 = self.create_booking("BK-A3", self.marina[2], 12, 13, cleaners=2)
+        self.b1 = self.create_booking("BK-B1", self.deira[0], 8, 9)
+        self.b2 = self.create_booking("BK-B2", self.deira[1], 11, 12)
+        # The car already has a job in Deira between the two
+        self.fixed = self.create_booking("BK-F1", self.deira[2], 9, 10, minute=30)
+        self.fixed.booking_cleaners.create(cleaner=self.car)
+        self.nowhere = self.create_booking("BK-C1", Customer.objects.create(full_name="No link", address="x"), 9, 10)
+
+    def customer(self, name, lat, lng):
+        return Customer.objects.create(full_name=name, address=name, google_location=f"https://maps.google.com/?q={lat},{lng}")
+
+    def create_booking(self, reference, customer, start, end, minute=0, cleaners=1):
+        booking = Booking.objects.create(
+            customer=customer,
+            booking_reference=reference,
+            start_date=datetime.date(2026, 1, 1),
+            start_time=datetime.time(start, minute),
+            end_date=datetime.date(2026, 1, 1),
+            end_time=datetime.time(end, minute),
+        )
+        booking.booking_services.create(service=self.service, number_of_cleaners=cleaners)
+        return booking
+
+    def test_preview_orders_each_vehicle_by_area_and_time(self):
+        response = self.client.get(reverse("booking:routes"), {"day": "2026-01-01"})
+        plan = response.context["plan"]
+        routes = {vehicle: [stop.reference for stop in stops] for vehicle, _, stops, _ in plan.rows()}
+        self.assertEqual(routes, {"V1": ["BK-A1", "BK-A2", "BK-A3"], "V2": ["BK-B1", "BK-F1", "BK-B2"]})
+        self.assertEqual(len(plan.zones), 2)
+        self.assertEqual([b.booking_reference for b in plan.unlocated], ["BK-C1"])
+        self.assertEqual(plan.unrouted, [])
+        self.assertLess(plan.total_km, 5)
+
+    def test_post_assigns_the_vehicle_teams(self):
+        self.client.post(reverse("booking:routes"), {"day": "2026-01-01"})
+        assigned = {
+            reference: sorted(names)
+            for reference, names in (
+                (b.booking_reference, [bc.cleaner.name for bc in b.booking_cleaners.all()])
+                for b in Booking.objects.exclude(pk=self.fixed.pk).prefetch_related("booking_cleaners__cleaner")
+            )
+        }
+        self.assertEqual(assigned, {
+            "BK-A1": ["Van 0"], "BK-A2": ["Van 0"], "BK-A3": ["Van 0", "Van 1"],
+            "BK-B1": ["Car"], "BK-B2": ["Car"], "BK-C1": [],
+        })
+        self.assertEqual({c.name for c in free_cleaners(self.a3.start_at, self.a3.end_at)}, {"Car", "Walker"})
+
+    def test_post_rechecks_the_cleaners(self):
+        # Marked unavailable without a save: the cached choices still list the cleaner
+        self.client.get(reverse("booking:routes"), {"day": "2026-01-01"})
+        Cleaner.objects.filter(pk=self.van[1].pk).update(is_available=False)
+        # A job the plan didn't see (e.g. written by a concurrent assignment)
+        clash = self.create_booking("BK-X1", self.marina[0], 9, 10)
+        clash.booking_cleaners.create(cleaner=self.van[0])
+        with mock.patch.object(RoutePlanner, "fixed_stops", return_value={}):
+            self.client.post(reverse("booking:routes"), {"day": "2026-01-01"})
+
+        self.assertFalse(BookingCleaner.objects.filter(cleaner=self.van[1]).exists())
+        self.assertFalse(self.a1.booking_cleaners.exists())
+        self.assertEqual(overlapping_assignments(self.a1.start_at, self.a1.end_at, [self.van[0].pk]).count(), 1)
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.service = Service.objects.create(name="Deep Clean", duration=120, base_price=Decimal("50.00"))
+        self.cleaner = Cleaner.objects.create(name="Busy")
+        Cleaner.objects.create(name="Idle")
+        self.customer = Customer.objects.create(full_name="Client", address="1 Street", region="Marina")
+        today = timezone.localdate()
+        # The rollups the dashboard reads are refreshed once the writes commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assigned = self.create_booking("BK-000001", today)
+            self.unassigned = self.create_booking("BK-000002", today)
+            self.later = self.create_booking("BK-000003", today + datetime.timedelta(days=40))
+            self.old = self.create_booking("BK-000004", today - datetime.timedelta(days=PENDING_DAYS + 1))
+            BookingCleaner.objects.create(booking=self.assigned, cleaner=self.cleaner)
+            Payment.objects.create(booking=self.assigned, payment_method=Payment.CARD, amount=Decimal("100.00"), net_amount=0)
+
+    def create_booking(self, reference, day):
+        booking = Booking.objects.create(
+            customer=self.customer,
+            booking_reference=reference,
+            start_date=day,
+            start_time=datetime.time(9),
+            end_date=day,
+            end_time=datetime.time(13),
+        )
+        booking.booking_services.create(service=self.service, number_of_cleaners=2)
+        return booking
+
+    def test_kpis(self):
+        dashboard = self.client.get(reverse("booking:home")).context["dashboard"]
+        self.assertEqual(dashboard["bookings"], {"today": 2, "week": 2, "unassigned": 2})
+        # BK-000002 only: BK-000004 is older than the window
+        self.assertEqual(dashboard["pending_payments"], {"count": 1, "amount": Decimal("100.00"), "days": PENDING_DAYS})
+        self.assertEqual(dashboard["revenue"]["today"], Decimal("100.00"))
+        self.assertEqual(dashboard["revenue"]["year"], Decimal("100.00"))
+        # 4 of 2 x 8 available hours today
+        self.assertEqual(dashboard["utilization"]["today"], 25)
+        self.assertEqual(dashboard["cleaners"][0], {"name": "Busy", "bookings": 1, "hours": 4.0, "is_available": True})
+
+    def test_reloads_are_served_from_the_cache(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse("booking:home"))
+        with CaptureQueriesContext(connection) as second:
+            self.client.get(reverse("booking:home"))
+        # Session, user and role, five KPI aggregates and the (then cached) cleaner list
+        self.assertEqual(len(first), 9)
+        # Session and user only
+        self.assertEqual(len(second), 2)
+
+
+class BookingEventTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        service = Service.objects.create(name="Deep Clean", duration=120, base_price=Decimal("50.00"))
+        self.cleaner = Cleaner.objects.create(name="Cleaner")
+        customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.booking = Booking.objects.create(
+            customer=customer,
+            booking_reference="BK-000001",
+            start_date=datetime.date(2026, 1, 1),
+            start_time=datetime.time(9),
+            end_date=datetime.date(2026, 1, 1),
+            end_time=datetime.time(11),
+        )
+        BookingService.objects.create(booking=self.booking, service=service, number_of_cleaners=1)
+
+    def test_writes_publish_events_and_rows_can_be_refetched(self):
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse("booking:assign", args=[self.booking.pk]),
+            {"cleaners": str(self.cleaner.pk), "payment_method": Payment.CARD},
+        )
+        self.assertEqual(
+            list(BookingEvent.objects.order_by("id").values_list("kind", "booking_id")),
+            [(kind, self.booking.pk) for kind in (BookingEvent.CREATED, BookingEvent.ASSIGNED, BookingEvent.PAID)],
+        )
+
+        response = self.client.get(reverse("booking:row", args=[self.booking.pk]))
+        self.assertContains(response, f'<tr data-booking-id="{self.booking.pk}">')
+        self.assertContains(response, "Cleaner")
+        self.assertEqual(self.client.get(reverse("booking:row", args=[0])).status_code, 404)
+
+    @mock.patch("booking.events.POLL_INTERVAL", 0.05)
+    @mock.patch("booking.events.STREAM_LIFETIME", 0.5)
+    async def test_stream_replays_missed_events_then_pushes_new_ones(self):
+        seen = await BookingEvent.objects.aget(kind=BookingEvent.CREATED)
+        missed = await BookingEvent.objects.acreate(kind=BookingEvent.UPDATED, booking_id=self.booking.pk)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("booking:events"), headers={"Last-Event-ID": str(seen.pk)})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk.decode())
+            if len(chunks) == 2:
+                live = await BookingEvent.objects.acreate(kind=BookingEvent.PAID, booking_id=self.booking.pk)
+        events = [chunk for chunk in chunks if chunk.startswith("id:")]
+        self.assertEqual(events, [
+            f'id: {missed.pk}\nevent: booking.updated\ndata: {{"kind":"booking.updated","booking":{self.booking.pk}}}\n\n',
+            f'id: {live.pk}\nevent: payment.recorded\ndata: {{"kind":"payment.recorded","booking":{self.booking.pk}}}\n\n',
+        ])
+
+    @mock.patch("booking.events.POLL_INTERVAL", 0.05)
+    @mock.patch("booking.events.STREAM_LIFETIME", 2)
+    async def test_events_committed_late_are_still_delivered(self):
+        broker = EventBroker()
+        stream = event_stream(broker=broker)
+        self.assertTrue((await anext(stream)).startswith("retry:"))
+        base = broker.last_id
+        # base + 1 was handed to a writer that commits after the one that got base + 2
+        await BookingEvent.objects.acreate(id=base + 2, kind=BookingEvent.UPDATED, booking_id=self.booking.pk)
+        delivered = []
+        async for chunk in stream:
+            if not chunk.startswith("id:"):
+                continue
+            delivered.append(chunk)
+            if len(delivered) == 1:
+                await BookingEvent.objects.acreate(id=base + 1, kind=BookingEvent.PAID, booking_id=self.booking.pk)
+            else:
+                break
+        await stream.aclose()
+        self.assertIn("event: booking.updated", delivered[0])
+        # Sent with the highest id so far, so a reconnect doesn't replay base + 2
+        self.assertTrue(delivered[1].startswith(f"id: {base + 2}\nevent: payment.recorded\n"))
+        self.assertFalse(await broker.refresh())
@@ -0,0 +1,73 @@
+# totals.py
+# Booking.required_cleaners / Booking.total_amount are denormalized from booking_services.
+# They are recomputed with one set-based UPDATE per batch of bookings, never row by row.
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Booking, BookingService
+
+TOTAL_FIELDS = ("required_cleaners", "total_amount")
+
+# Booking ids waiting for a recompute inside deferred_totals(), None outside it
+_pending_totals = ContextVar("pending_booking_totals", default=None)
+
+
+def booking_totals_expressions():
+    """
+    {field: expression} computing each booking's totals from its services, for update()/annotate().
+    """
+    services = BookingService.objects.filter(booking=OuterRef("pk")).values("booking")
+    amount_field = DecimalField(max_digits=10, decimal_places=2)
+    return {
+        "required_cleaners": Coalesce(
+            Subquery(services.annotate(total=Sum("number_of_cleaners")).values("total")),
+            0,
+        ),
+        "total_amount": Coalesce(
+            Subquery(
+                services.annotate(total=Sum(F("service__base_price") * F("number_of_cleaners"))).values("total"),
+                output_field=amount_field,
+            ),
+            Value(Decimal("0")),
+            output_field=amount_field,
+        ),
+    }
+
+
+def recompute_booking_totals(bookings):
+    """
+    Recomputes the stored totals for ``bookings`` (ids or a queryset of ids) in one UPDATE.
+    Runs in the caller's transaction, so the totals commit together with the service rows.
+    """
+    return Booking.objects.filter(pk__in=bookings).update(**booking_totals_expressions())
+
+
+def schedule_recompute(booking_ids):
+    """
+    Recomputes now, or once at the end of the enclosing deferred_totals() block.
+    """
+    pending = _pending_totals.get()
+    if pending is None:
+        recompute_booking_totals(list(booking_ids))
+    else:
+        pending.update(booking_ids)
+
+
+@contextmanager
+def deferred_totals():
+    """
+    Collects the bookings touched inside the block (signals, or ids added to the yielded set)
+    and recomputes them with one UPDATE when the block exits without an error.
+    """
+    pending = set()
+    token = _pending_totals.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_totals.reset(token)
+    if pending:
+        recompute_booking_totals(pending)
@@ -4,10 +4,20 @@ from . import views
 app_name = 'booking'
 
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', views.DashboardView.as_view(), name='home'),
     path('list/', views.BookingListView.as_view(), name='list'),
+    path('list/rows/<int:pk>/', views.BookingRowView.as_view(), name='row'),
+    path('events/', views.BookingEventStreamView.as_view(), name='events'),
+    path('export/', views.BookingExportView.as_view(), name='export'),
+    path('import/', views.BookingImportView.as_view(), name='import'),
     path('create/', views.BookingCreateView.as_view(), name='create'),
     path('update/<int:booking_id>/', views.BookingUpdateView.as_view(), name='update'),
     path('delete/<int:booking_id>/', views.BookingDeleteView.as_view(), name='delete'),
     path("booking/<int:pk>/assign/", views.BookingAssignView.as_view(), name="assign"),
+    path("booking/<int:pk>/cleaners/", views.BookingCleanerSearchView.as_view(), name="cleaner_search"),
+    path("auto-assign/", views.BookingAutoAssignView.as_view(), name="auto_assign"),
+    path("routes/", views.BookingRoutesView.as_view(), name="routes"),
+    path("availability/", views.CleanerAvailabilityView.as_view(), name="availability"),
+    path("availability/free/", views.FreeCleanersView.as_view(), name="free_cleaners"),
+    path("deletion-jobs/<int:pk>/", views.DeletionJobStatusView.as_view(), name="deletion_job"),
 ]
\ No newline at end of file
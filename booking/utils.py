@@ -0,0 +1,27 @@
+# utils.py
+import uuid
+
+from .models import Booking
+
+
+def generate_booking_reference():
+    return f"BK-{uuid.uuid4().hex[:8].upper()}"
+
+
+def generate_booking_references(count):
+    """
+    Returns ``count`` distinct booking references not yet used in the database
+    (one lookup query per round; collisions are rare so this is usually one round).
+    """
+    references = set()
+    while len(references) < count:
+        candidates = set()
+        while len(references) + len(candidates) < count:
+            reference = generate_booking_reference()
+            if reference not in references:
+                candidates.add(reference)
+        taken = set(
+            Booking.all_objects.filter(booking_reference__in=candidates).values_list("booking_reference", flat=True)
+        )
+        references |= candidates - taken
+    return list(references)
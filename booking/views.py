@@ -1,5 +1,7 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseForbidden, JsonResponse
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.views import View
 from django.forms import modelformset_factory
@@ -7,72 +9,190 @@ from django.contrib import messages
 from django.views.generic import ListView, DeleteView
 from django.urls import reverse_lazy
 
-from django.db.models import Count, Prefetch
-from .models import Booking, BookingService, BookingCleaner
-from .forms import BookingForm, BookingServiceForm, BookingCleanerForm
+import io
+
+from django.db.models import Exists, OuterRef, Prefetch, Q, Subquery
+from .models import Booking, BookingService, BookingCleaner, BookingEvent, DeletionJob
+from .forms import (
+    BookingForm, BookingServiceForm, BookingCleanerForm, BookingExportForm, AutoAssignForm, AvailabilityForm,
+    FreeCleanersForm, RoutesForm,
+)
+from .autoassign import commit_assignments, preview_assignments
+from .export import NDJSON, export_queryset, iter_export
+from .importers import IMPORT_COLUMNS, BookingImporter
+from .scheduling import describe_conflicts, find_cleaner_conflicts, overlapping_assignments
+from .assignments import lock_cleaners, replace_booking_cleaners
+from .formsets import save_formset
+from .choices import cleaner_choices, service_choices
+from .totals import deferred_totals
+from .deletion import schedule_deletion
+from .routing import commit_routes, preview_routes
+from .dashboard import get_dashboard
+from .events import event_stream, publish_events
+from .availability import AvailabilityGrid, availability_changes, booking_cells, free_cleaners, refresh_cells
 from customer.forms import CustomerForm
+from reports.rollups import rollup_changes
+from search.index import index_ids
 from payment.models import Payment
 from cleaner.models import Cleaner
 from django.db import transaction
-from account.utils import user_has_access
+from django.utils import timezone
+from account.mixins import PermissionRequiredMixin, render_forbidden, resolve_request_permissions
+from account.utils import get_user_permissions
+from tricksy.pagination import InvalidCursor, KeysetPaginationMixin, KeysetPaginator
 
 
-def home(request):
-    return render(request, 'booking/home.html')
+class DashboardView(LoginRequiredMixin, View):
+    template_name = "booking/home.html"
 
-
-class BookingListView(LoginRequiredMixin, ListView):
+    def get(self, request):
+        # Everyone lands here after login; only dashboard_access sees the figures
+        context = {}
+        if "dashboard_access" in resolve_request_permissions(request):
+            context["dashboard"] = get_dashboard()
+            if request.GET.get("format") == "json":
+                # Refetched by the page when the event stream reports a change
+                return JsonResponse({"success": True, "dashboard": context["dashboard"]})
+        return render(request, self.template_name, context)
+
+
+class BookingEventStreamView(View):
+    """
+    Server-sent events (text/event-stream) for the booking list and the dashboard: one
+    compact event per booking created, updated, assigned or paid. Async, so serve it with
+    the ASGI app (tricksy/asgi.py); an open stream holds no thread or database connection.
+    """
+    permissions = ("view_bookings", "dashboard_access")
+
+    async def get(self, request):
+        # LoginRequiredMixin/PermissionRequiredMixin are sync: check by hand
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if (await sync_to_async(get_user_permissions)(user)).isdisjoint(self.permissions):
+            return render_forbidden(request)
+
+        after = request.headers.get("Last-Event-ID") or request.GET.get("after")
+        after = int(after) if after and after.isdigit() else None
+        response = StreamingHttpResponse(event_stream(after), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Don't let nginx buffer the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class BookingListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     model = Booking
     template_name = "booking/list.html"
     context_object_name = "bookings"
     paginate_by = 10
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "view_bookings"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+    permission_required = "view_bookings"
+    # Cursor pagination on (created_at, id): no COUNT(*), deep pages cost the same as page 1
+    keyset_ordering = ("-created_at", "-id")
+    approximate_total = True
 
     def get_queryset(self):
         """
-        Prefetch all related objects to minimize database hits.
+        One annotated queryset for the whole page: payment info and the assignment flag
+        come from subqueries (totals are stored columns), so the query count doesn't grow with the rows.
         """
+        latest_payment = Payment.objects.filter(booking=OuterRef("pk")).order_by("-paid_at", "-id")
         return (
             Booking.objects.select_related("customer", "created_by")
             .prefetch_related(
                 Prefetch("booking_services", queryset=BookingService.objects.select_related("service")),
                 Prefetch("booking_cleaners", queryset=BookingCleaner.objects.select_related("cleaner")),
-                Prefetch("payments", queryset=Payment.objects.order_by("-paid_at")),
+            )
+            .annotate(
+                is_cleaner_assigned=Exists(BookingCleaner.objects.filter(booking=OuterRef("pk"))),
+                has_payment=Exists(Payment.objects.filter(booking=OuterRef("pk"))),
+                latest_payment_method=Subquery(latest_payment.values("payment_method")[:1]),
+                latest_payment_amount=Subquery(latest_payment.values("net_amount")[:1]),
             )
             .order_by("-created_at")
         )
 
-    def get_context_data(self, **kwargs):
+    @staticmethod
+    def set_payment_status(bookings):
         """
-        Adds latest payment info and cleaner assignment status to each booking.
+        Adds payment status to each booking (from the annotations, no extra queries).
         """
+        for booking in bookings:
+            booking.payment_status = "Completed" if booking.has_payment else "Pending"
+
+    def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        for booking in context["bookings"]:
-            payments = booking.payments.all()
-            booking.latest_payment = payments[0] if payments else None
-            booking.is_cleaner_assigned = booking.booking_cleaners.exists()
-            booking.payment_status = "Completed" if payments.exists() else "Pending"
-            # booking.total_cleaners = sum(bs.number_of_cleaners for bs in booking.booking_services.all())
+        self.set_payment_status(context["bookings"])
         return context
 
-class BookingCreateView(LoginRequiredMixin, View):
 
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_bookings"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+class BookingRowView(BookingListView):
+    """
+    One row of the booking list, fetched by the list page when the event stream reports a
+    change to it (404 once the booking is deleted).
+    """
+
+    def get(self, request, pk):
+        booking = get_object_or_404(self.get_queryset(), pk=pk)
+        self.set_payment_status([booking])
+        return render(request, "booking/row.html", {"booking": booking})
+
+class BookingExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Streams the full booking history (?format=csv|ndjson&start=&end=&region=).
+    Rows are fetched and prefetched chunk by chunk, so memory stays flat.
+    """
+    permission_required = "view_bookings"
+
+    def get(self, request):
+        form = BookingExportForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"success": False, "errors": form.errors}, status=400)
+
+        data = form.cleaned_data
+        fmt = data["format"] or "csv"
+        queryset = export_queryset(data["start"], data["end"], data["region"])
+        content_type = "application/x-ndjson" if fmt == NDJSON else "text/csv"
+        response = StreamingHttpResponse(iter_export(fmt, queryset), content_type=content_type)
+        filename = f"bookings-{timezone.localdate():%Y%m%d}.{fmt}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class BookingImportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Upload a CSV of bookings (corporate contracts); rows are validated with the
+    booking/customer forms and inserted in bulk, invalid rows are reported.
+    """
+    template_name = "booking/import.html"
+    permission_required = "manage_bookings"
+    max_errors_shown = 200
+
+    def get(self, request):
+        return render(request, self.template_name, {"columns": IMPORT_COLUMNS})
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if not upload:
+            messages.error(request, "Please choose a CSV file to import.")
+            return render(request, self.template_name, {"columns": IMPORT_COLUMNS})
+
+        fh = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        result = BookingImporter(user=request.user).import_csv(fh)
+
+        if result.created:
+            messages.success(request, f"Imported {result.created} bookings.")
+        if result.errors:
+            messages.error(request, f"{result.failed} rows were rejected.")
+        return render(request, self.template_name, {
+            "columns": IMPORT_COLUMNS,
+            "result": result,
+            "errors": result.errors[: self.max_errors_shown],
+        })
+
+
+class BookingCreateView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = "manage_bookings"
 
     def get(self, request):
         booking_form = BookingForm()
@@ -82,7 +202,9 @@ class BookingCreateView(LoginRequiredMixin, View):
         ServiceFormSet = modelformset_factory(
             BookingService, form=BookingServiceForm, extra=1, can_delete=True
         )
-        service_formset = ServiceFormSet(queryset=BookingService.objects.none())
+        service_formset = ServiceFormSet(
+            queryset=BookingService.objects.none(), form_kwargs={"service_choices": service_choices()}
+        )
 
         return render(request, "booking/create.html", {
             "booking_form": booking_form,
@@ -97,26 +219,30 @@ class BookingCreateView(LoginRequiredMixin, View):
         ServiceFormSet = modelformset_factory(
             BookingService, form=BookingServiceForm, extra=1, can_delete=True
         )
-        service_formset = ServiceFormSet(request.POST, queryset=BookingService.objects.none())
+        service_formset = ServiceFormSet(
+            request.POST, queryset=BookingService.objects.none(), form_kwargs={"service_choices": service_choices()}
+        )
         try:
             if all([booking_form.is_valid(), customer_form.is_valid(), service_formset.is_valid()]):
-                # Save customer
-                customer = customer_form.save()
-
-                # Save booking linked to customer
-                booking = booking_form.save(commit=False, user=request.user)
-                booking.customer = customer
-                booking.created_by = request.user
-                booking.save()
-
-
-                # Save services
-                for sf in service_formset:
-                    service = sf.save(commit=False)
-                    service.booking = booking
-                    service.save()
-
-                messages.success(request, "Booking and customer created successfully!")
+                with transaction.atomic(), deferred_totals() as touched, rollup_changes() as changed:
+                    # Attach a repeat client to their existing record instead of duplicating it
+                    customer, customer_created = customer_form.save_or_reuse()
+
+                    # Save booking linked to customer
+                    booking = booking_form.save(commit=False, user=request.user)
+                    booking.customer = customer
+                    booking.created_by = request.user
+                    booking.save()
+
+                    # Save services
+                    save_formset(service_formset, booking=booking)
+                    touched.add(booking.pk)
+                    changed.add(booking.pk)
+
+                if customer_created:
+                    messages.success(request, "Booking and customer created successfully!")
+                else:
+                    messages.success(request, f"Booking created for existing customer {customer.full_name}.")
                 return redirect("booking:list")  # redirect to booking list page
         except Exception as e:
             print(e)
@@ -128,16 +254,8 @@ class BookingCreateView(LoginRequiredMixin, View):
         })
 
 
-class BookingUpdateView(LoginRequiredMixin, View):
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_bookings"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+class BookingUpdateView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = "manage_bookings"
 
     def get(self, request, booking_id):
         booking = get_object_or_404(Booking, pk=booking_id)
@@ -145,8 +263,14 @@ class BookingUpdateView(LoginRequiredMixin, View):
         ServiceFormSet = modelformset_factory(BookingService, form=BookingServiceForm, extra=0, can_delete=True)
         CleanerFormSet = modelformset_factory(BookingCleaner, form=BookingCleanerForm, extra=0, can_delete=True)
 
-        service_formset = ServiceFormSet(queryset=booking.booking_services.all())
-        cleaner_formset = CleanerFormSet(queryset=booking.booking_cleaners.all())
+        service_formset = ServiceFormSet(
+            queryset=booking.booking_services.all(), prefix="services",
+            form_kwargs={"service_choices": service_choices()},
+        )
+        cleaner_formset = CleanerFormSet(
+            queryset=booking.booking_cleaners.all(), prefix="cleaners",
+            form_kwargs={"cleaner_choices": cleaner_choices()},
+        )
 
         return render(request, "booking/update.html", {
             "form": form,
@@ -155,38 +279,58 @@ class BookingUpdateView(LoginRequiredMixin, View):
             "booking": booking,
         })
 
+    @staticmethod
+    def kept_cleaner_ids(cleaner_formset):
+        """
+        Cleaner ids the booking has once the (valid) formset is saved.
+        """
+        return list(dict.fromkeys(
+            row["cleaner"].pk for row in cleaner_formset.cleaned_data
+            if row.get("cleaner") and not row.get("DELETE")
+        ))
+
     def post(self, request, booking_id):
         booking = get_object_or_404(Booking, pk=booking_id)
         form = BookingForm(request.POST, instance=booking)
         ServiceFormSet = modelformset_factory(BookingService, form=BookingServiceForm, extra=0, can_delete=True)
         CleanerFormSet = modelformset_factory(BookingCleaner, form=BookingCleanerForm, extra=0, can_delete=True)
 
-        service_formset = ServiceFormSet(request.POST, queryset=booking.booking_services.all())
-        cleaner_formset = CleanerFormSet(request.POST, queryset=booking.booking_cleaners.all())
+        service_formset = ServiceFormSet(
+            request.POST, queryset=booking.booking_services.all(), prefix="services",
+            form_kwargs={"service_choices": service_choices()},
+        )
+        cleaner_formset = CleanerFormSet(
+            request.POST, queryset=booking.booking_cleaners.all(), prefix="cleaners",
+            form_kwargs={"cleaner_choices": cleaner_choices()},
+        )
 
         if form.is_valid() and service_formset.is_valid() and cleaner_formset.is_valid():
-            booking = form.save(user=request.user)
-
-            for sf in service_formset:
-                if sf.cleaned_data:
-                    if sf.cleaned_data.get("DELETE") and sf.instance.pk:
-                        sf.instance.delete()
-                    else:
-                        booking_service = sf.save(commit=False)
-                        booking_service.booking = booking
-                        booking_service.save()
-
-            for cf in cleaner_formset:
-                if cf.cleaned_data:
-                    if cf.cleaned_data.get("DELETE") and cf.instance.pk:
-                        cf.instance.delete()
-                    else:
-                        booking_cleaner = cf.save(commit=False)
-                        booking_cleaner.booking = booking
-                        booking_cleaner.save()
-
-            messages.success(request, "Booking updated successfully!")
-            return redirect("booking:list")
+            with transaction.atomic():
+                # The cleaners the booking ends up with must be free at its (possibly new) times;
+                # locked like BookingAssignView so concurrent assignments see each other
+                cleaner_ids = self.kept_cleaner_ids(cleaner_formset)
+                lock_cleaners(cleaner_ids)
+                form.instance.sync_schedule()
+                conflicts = find_cleaner_conflicts(form.instance, cleaner_ids)
+                if not conflicts:
+                    # All or nothing; each formset is one bulk write per kind of change, and the
+                    # stored totals are recomputed once at the end
+                    with (
+                        deferred_totals() as touched,
+                        availability_changes([booking.pk]),
+                        rollup_changes([booking.pk]),
+                    ):
+                        booking = form.save(user=request.user)
+                        if save_formset(service_formset, booking=booking):
+                            touched.add(booking.pk)
+                        if save_formset(cleaner_formset, booking=booking):
+                            # Bookings are searchable by their cleaners' names
+                            index_ids(Booking, [booking.pk])
+
+            if not conflicts:
+                messages.success(request, "Booking updated successfully!")
+                return redirect("booking:list")
+            form.add_error(None, f"These cleaners are already booked at that time: {describe_conflicts(conflicts)}.")
 
         return render(request, "booking/update.html", {
             "form": form,
@@ -196,89 +340,279 @@ class BookingUpdateView(LoginRequiredMixin, View):
         })
 
 
-class BookingDeleteView(LoginRequiredMixin, DeleteView):
+class BookingDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Booking
     success_url = reverse_lazy("booking:list")
+    permission_required = "manage_bookings"
+    pk_url_kwarg = "booking_id"
 
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_bookings"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+    def form_valid(self, form):
+        # Hidden at once; services, cleaners and payments are purged by the purge_deleted worker
+        job = schedule_deletion(self.object, self.request.user)
+        if self.request.headers.get("x-requested-with") == "XMLHttpRequest":
+            return JsonResponse({"success": True, "message": "Booking deleted successfully!", "job": job.pk})
+        messages.success(self.request, "Booking deleted successfully!")
+        return redirect(self.success_url)
 
     def delete(self, request, *args, **kwargs):
+        # DELETE schedules the purge like POST does (DeletionMixin.delete would cascade inline)
         self.object = self.get_object()
-        self.object.delete()
-        if request.headers.get("x-requested-with") == "XMLHttpRequest":
-            return JsonResponse({"success": True, "message": "Booking deleted successfully!"})
-        messages.success(request, "Booking deleted successfully!")
-        return super().delete(request, *args, **kwargs)
+        return self.form_valid(None)
+
+
+class DeletionJobStatusView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Progress of a background purge, for polling after a delete.
+    """
+    permission_required = ("manage_bookings", "manage_customers")
+
+    def has_permission(self):
+        return not resolve_request_permissions(self.request).isdisjoint(self.permission_required)
+
+    def get(self, request, pk):
+        job = get_object_or_404(DeletionJob, pk=pk)
+        return JsonResponse({
+            "success": True,
+            "status": job.status,
+            "processed": job.processed,
+            "total": job.total,
+            "percent": job.percent,
+            "error": job.error,
+        })
     
-class BookingAssignView(LoginRequiredMixin, View):
+class BookingAssignView(LoginRequiredMixin, PermissionRequiredMixin, View):
     template_name = "booking/assign.html"
+    permission_required = "assign_cleaners"
 
-    def dispatch(self, request, *args, **kwargs):
+    @staticmethod
+    def selected_cleaner_ids(request):
         """
-        Override dispatch() to check permission before processing the view.
+        Cleaner ids from the form: the page posts one comma-separated "cleaners" value.
         """
-        if not user_has_access(request.user, "assign_cleaners"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+        ids = []
+        for value in request.POST.getlist("cleaners"):
+            ids.extend(int(part) for part in value.split(",") if part.strip())
+        return list(dict.fromkeys(ids))
 
     def get(self, request, pk):
         booking = get_object_or_404(Booking, pk=pk)
-        cleaners = Cleaner.objects.all()
-        assigned_cleaners = list(booking.booking_cleaners.values_list("cleaner_id", flat=True))
+        # Candidates are loaded page by page from BookingCleanerSearchView; only the
+        # current assignment is rendered here
+        assigned = list(Cleaner.objects.filter(cleaner_bookings__booking=booking).order_by("name", "pk"))
+        assigned_cleaners = [cleaner.id for cleaner in assigned]
+
+        # Assigned cleaners already booked elsewhere during this booking (one range query)
+        conflicts = find_cleaner_conflicts(booking, assigned_cleaners)
+        for cleaner in assigned:
+            cleaner.conflicts = conflicts.get(cleaner.id, [])
 
-        total_required_cleaners = booking.total_required_cleaners()
-        total_amount = booking.calculate_total_amount()
+        total_required_cleaners, total_amount = booking.required_cleaners, booking.total_amount
 
         return render(request, self.template_name, {
             "booking": booking,
-            "cleaners": cleaners,
             "assigned_cleaners": assigned_cleaners,
+            "conflicting_cleaners": [c for c in assigned if c.conflicts],
             "total_required_cleaners": total_required_cleaners,
             "total_amount": total_amount,
+            "price_per_cleaner": total_amount / total_required_cleaners if total_required_cleaners else 0,
         })
 
-    @transaction.atomic
     def post(self, request, pk):
-        booking = get_object_or_404(Booking, pk=pk)
-        cleaner_ids = request.POST.getlist("cleaners")
-        payment_method = request.POST.get("payment_method")
-
-        # Validation 1: Check cleaner count
-        required_cleaners = booking.total_required_cleaners()
-        if len(cleaner_ids) != required_cleaners:
-            messages.error(
-                request,
-                f"You must assign exactly {required_cleaners} cleaners (selected {len(cleaner_ids)})."
-            )
+        try:
+            cleaner_ids = self.selected_cleaner_ids(request)
+        except ValueError:
+            messages.error(request, "Invalid cleaner selection.")
             return redirect("booking:assign", pk=pk)
+        payment_method = request.POST.get("payment_method")
 
-        # Validation 2: Payment method required
+        # Validation 1: Payment method required
         if not payment_method:
             messages.error(request, "Please select a payment method.")
             return redirect("booking:assign", pk=pk)
 
-        # Assign cleaners
-        BookingCleaner.objects.filter(booking=booking).delete()
-        for cid in cleaner_ids:
-            BookingCleaner.objects.create(booking=booking, cleaner_id=cid)
-
-        # Calculate and save payment
-        amount = booking.calculate_total_amount()
-        Payment.objects.create(
-            booking=booking,
-            payment_method=payment_method,
-            amount=amount,
-            discount=0,
-            net_amount=amount,
-        )
+        with transaction.atomic():
+            # Concurrent assignments of this booking (or of these cleaners) wait here
+            booking = get_object_or_404(Booking.objects.select_for_update(), pk=pk)
+            lock_cleaners(cleaner_ids)
+            required_cleaners, amount = booking.required_cleaners, booking.total_amount
+
+            # Validation 2: Check cleaner count
+            if len(cleaner_ids) != required_cleaners:
+                messages.error(
+                    request,
+                    f"You must assign exactly {required_cleaners} cleaners (selected {len(cleaner_ids)})."
+                )
+                return redirect("booking:assign", pk=pk)
+
+            # Validation 3: No cleaner may be double-booked
+            conflicts = find_cleaner_conflicts(booking, cleaner_ids)
+            if conflicts:
+                messages.error(
+                    request, f"These cleaners are already booked at that time: {describe_conflicts(conflicts)}."
+                )
+                return redirect("booking:assign", pk=pk)
+
+            with rollup_changes() as changed:
+                # Assign cleaners: only the rows that changed
+                added, removed = replace_booking_cleaners(booking, cleaner_ids)
+                refresh_cells(booking_cells(booking, [*added, *removed]))
+                index_ids(Booking, [booking.pk])
+                changed.add(booking.pk)
+                publish_events(BookingEvent.ASSIGNED, [booking.pk])
+
+                Payment.objects.create(
+                    booking=booking,
+                    payment_method=payment_method,
+                    amount=amount,
+                    discount=0,
+                    net_amount=amount,
+                )
 
         messages.success(request, "✅ Cleaners assigned and payment recorded successfully!")
         return redirect("booking:list")
+
+
+class BookingCleanerSearchView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    JSON page of cleaner candidates for the assign page.
+    ?q= prefix-matches name, company or vehicle code; ?available=1/0 filters on is_available.
+    Cleaners already on the booking come first, then free ones, then double-booked ones.
+    """
+    permission_required = "assign_cleaners"
+    paginate_by = 20
+    ordering = ("-is_assigned", "is_busy", "name", "pk")
+
+    def get_queryset(self, booking):
+        if booking.start_at is None or booking.end_at is None:
+            booking.sync_schedule()
+        busy = overlapping_assignments(booking.start_at, booking.end_at, exclude_booking_id=booking.pk)
+        queryset = Cleaner.objects.annotate(
+            is_assigned=Exists(BookingCleaner.objects.filter(booking=booking, cleaner=OuterRef("pk"))),
+            is_busy=Exists(busy.filter(cleaner=OuterRef("pk"))),
+        )
+        term = self.request.GET.get("q", "").strip()
+        if term:
+            queryset = queryset.filter(
+                Q(name__istartswith=term) | Q(company__istartswith=term) | Q(vehicle_code__istartswith=term)
+            )
+        available = self.request.GET.get("available")
+        if available in ("0", "1"):
+            queryset = queryset.filter(is_available=available == "1")
+        return queryset
+
+    def get(self, request, pk):
+        booking = get_object_or_404(Booking, pk=pk)
+        paginator = KeysetPaginator(self.get_queryset(booking), self.paginate_by, ordering=self.ordering)
+        try:
+            page = paginator.page(request.GET.get("cursor"))
+        except InvalidCursor:
+            return JsonResponse({"success": False, "message": "Invalid cursor."}, status=400)
+
+        busy_ids = [cleaner.pk for cleaner in page if cleaner.is_busy]
+        conflicts = find_cleaner_conflicts(booking, busy_ids) if busy_ids else {}
+        return JsonResponse({
+            "success": True,
+            "results": [
+                {
+                    "id": cleaner.pk,
+                    "name": cleaner.name,
+                    "company": cleaner.company,
+                    "vehicle_code": cleaner.vehicle_code,
+                    "is_available": cleaner.is_available,
+                    "assigned": cleaner.is_assigned,
+                    "conflicts": conflicts.get(cleaner.pk, []),
+                }
+                for cleaner in page
+            ],
+            "next": page.next_cursor,
+        })
+
+
+class BookingAutoAssignView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Fills every unassigned booking in a date range from the available cleaners.
+    GET shows a dry-run preview, POST re-plans with the bookings locked and saves it.
+    """
+    template_name = "booking/auto_assign.html"
+    permission_required = "assign_cleaners"
+
+    def get(self, request):
+        form = AutoAssignForm(request.GET or {"start": timezone.localdate()})
+        plan = preview_assignments(*form.window()) if form.is_valid() else None
+        return render(request, self.template_name, {"form": form, "plan": plan})
+
+    def post(self, request):
+        form = AutoAssignForm(request.POST)
+        if not form.is_valid():
+            return render(request, self.template_name, {"form": form, "plan": None})
+
+        plan = commit_assignments(*form.window())
+        if plan.assigned_count:
+            messages.success(request, f"✅ Assigned cleaners to {plan.assigned_count} bookings.")
+        if plan.unfilled:
+            messages.error(request, f"{len(plan.unfilled)} bookings could not be fully staffed.")
+        if not plan.bookings:
+            messages.error(request, "No unassigned bookings in that period.")
+        return redirect("booking:list")
+
+
+class BookingRoutesView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    A day's unassigned bookings grouped into zones and ordered into a route per vehicle team.
+    GET shows the plan, POST re-plans with the bookings locked and assigns the teams.
+    """
+    template_name = "booking/routes.html"
+    permission_required = "assign_cleaners"
+
+    def get(self, request):
+        form = RoutesForm(request.GET or {"day": timezone.localdate()})
+        plan = preview_routes(form.cleaned_data["day"]) if form.is_valid() else None
+        return render(request, self.template_name, {"form": form, "plan": plan})
+
+    def post(self, request):
+        form = RoutesForm(request.POST)
+        if not form.is_valid():
+            return render(request, self.template_name, {"form": form, "plan": None})
+
+        plan = commit_routes(form.cleaned_data["day"])
+        if plan.routed_count:
+            messages.success(request, f"✅ Routed {plan.routed_count} bookings across {len(list(plan.rows()))} vehicles.")
+        if plan.unrouted or plan.unlocated:
+            messages.error(request, f"{len(plan.unrouted) + len(plan.unlocated)} bookings were left unassigned.")
+        return redirect("booking:list")
+
+
+class CleanerAvailabilityView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Week-at-a-glance grid: how many cleaners are free in each 30-minute slot, read from the
+    cleaner_day_slots bitsets (one query for the whole grid).
+    """
+    template_name = "booking/availability.html"
+    permission_required = "assign_cleaners"
+
+    def get(self, request):
+        form = AvailabilityForm(request.GET or {"start": timezone.localdate(), "days": 7})
+        grid = None
+        if form.is_valid():
+            grid = AvailabilityGrid(form.cleaned_data["start"], form.cleaned_data["days"] or 7)
+        return render(request, self.template_name, {"form": form, "grid": grid})
+
+
+class FreeCleanersView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    JSON: the available cleaners with nothing booked between ``start`` and ``end``.
+    """
+    permission_required = "assign_cleaners"
+
+    def get(self, request):
+        form = FreeCleanersForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"success": False, "message": form.errors.as_text()}, status=400)
+        cleaners = free_cleaners(form.cleaned_data["start"], form.cleaned_data["end"])
+        return JsonResponse({
+            "success": True,
+            "results": [
+                {"id": c.pk, "name": c.name, "company": c.company, "vehicle_code": c.vehicle_code}
+                for c in cleaners
+            ],
+        })
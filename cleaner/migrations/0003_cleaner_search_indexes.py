@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cleaner", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cleaner",
+            index=models.Index(fields=["name"], name="cleaners_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cleaner",
+            index=models.Index(fields=["company"], name="cleaners_company_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cleaner",
+            index=models.Index(
+                fields=["vehicle_code"], name="cleaners_vehicle_code_idx"
+            ),
+        ),
+    ]
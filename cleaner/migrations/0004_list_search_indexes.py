@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cleaner", "0003_cleaner_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="cleaner",
+            name="cleaners_company_idx",
+        ),
+        migrations.AddIndex(
+            model_name="cleaner",
+            index=models.Index(
+                fields=["company", "name"], name="cleaners_company_name_idx"
+            ),
+        ),
+    ]
@@ -10,4 +10,11 @@ class Cleaner(models.Model):
         return f"{self.name} ({'Available' if self.is_available else 'Unavailable'})"
 
     class Meta:
-        db_table = 'cleaners'
\ No newline at end of file
+        db_table = 'cleaners'
+        indexes = [
+            # Prefix search (LIKE 'term%') on the assign page and the cleaner list
+            models.Index(fields=["name"], name="cleaners_name_idx"),
+            # Also the cleaner list's company sort: ORDER BY company, name, id
+            models.Index(fields=["company", "name"], name="cleaners_company_name_idx"),
+            models.Index(fields=["vehicle_code"], name="cleaners_vehicle_code_idx"),
+        ]
@@ -1,4 +1,3 @@
-from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib import messages
@@ -6,71 +5,51 @@ from django.http import JsonResponse
 from .models import Cleaner
 from .forms import CleanerForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from account.utils import user_has_access
+from account.mixins import PermissionRequiredMixin
+from tricksy.pagination import KeysetSearchMixin
 
-class CleanerListView(LoginRequiredMixin, ListView):
+class CleanerListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetSearchMixin, ListView):
     model = Cleaner
     template_name = "cleaner/list.html"
     context_object_name = "cleaners"
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "view_cleaners"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-
-        # ✅ This line is essential:
-        return super().dispatch(request, *args, **kwargs)
-
-class CleanerCreateView(LoginRequiredMixin, CreateView):
+    permission_required = "view_cleaners"
+    paginate_by = 25
+    approximate_total = True
+    search_fields = ("name", "company", "vehicle_code")
+    sort_options = {
+        "name": ("name", "id"),
+        "-name": ("-name", "-id"),
+        "company": ("company", "name", "id"),
+        "newest": ("-id",),
+    }
+    default_sort = "name"
+
+class CleanerCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     model = Cleaner
     form_class = CleanerForm
     template_name = "cleaner/create.html"
     success_url = reverse_lazy("cleaner:list")
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_cleaners"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
+    permission_required = "manage_cleaners"
 
     def form_valid(self, form):
         messages.success(self.request, "Cleaner added successfully!")
         return super().form_valid(form)
 
-class CleanerUpdateView(LoginRequiredMixin, UpdateView):
+class CleanerUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     model = Cleaner
     form_class = CleanerForm
     template_name = "cleaner/update.html"
     success_url = reverse_lazy("cleaner:list")
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_cleaners"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
+    permission_required = "manage_cleaners"
 
     def form_valid(self, form):
         messages.success(self.request, "Cleaner updated successfully!")
         return super().form_valid(form)
 
-class CleanerDeleteView(LoginRequiredMixin, DeleteView):
+class CleanerDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Cleaner
     success_url = reverse_lazy("cleaner:list")
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_cleaners"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
+    permission_required = "manage_cleaners"
 
     def delete(self, request, *args, **kwargs):
         self.object = self.get_object()
@@ -0,0 +1,220 @@
+# dedupe.py
+# Finds duplicate customers and merges them into the oldest record (`manage.py dedupe_customers`).
+# Candidates are found by blocking: only customers that share a blocking key (normalized
+# address, or the same region + building + unit) are ever compared, so the work grows with
+# the size of the blocks, not with the square of the table.
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, Q, Value, When
+
+from booking.models import Booking
+from reports.rollups import rollup_changes
+from search.index import index_ids, index_objects
+from tricksy.batching import chunked
+from .lookup import normalize
+from .models import Customer
+
+DEFAULT_NAME_THRESHOLD = 0.85
+# Blocks bigger than this are placeholder addresses ("N/A", a tower's reception), not people
+DEFAULT_MAX_BLOCK_SIZE = 50
+DEFAULT_BATCH_SIZE = 500
+
+# Details copied from a duplicate onto the surviving record when it has them blank
+FILL_BLANK_FIELDS = ("region", "google_location", "location_notes")
+
+
+def names_match(first, second, threshold=DEFAULT_NAME_THRESHOLD):
+    """
+    Compares two normalized names: equal, same words in another order, or close enough
+    (typos, a dropped initial).
+    """
+    if first == second or sorted(first.split()) == sorted(second.split()):
+        return True
+    return SequenceMatcher(None, first, second).ratio() >= threshold
+
+
+class DisjointSet:
+    """
+    Union-find over customer ids; the root of every set is its smallest (oldest) id.
+    """
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        while parent != item:
+            grandparent = self.parent[parent]
+            self.parent[item] = grandparent
+            item, parent = parent, grandparent
+        return item
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+    def groups(self):
+        groups = defaultdict(list)
+        for item in self.parent:
+            groups[self.find(item)].append(item)
+        return [sorted(members) for members in groups.values() if len(members) > 1]
+
+
+class DedupePlan:
+    def __init__(self):
+        self.blocks = 0
+        self.skipped_blocks = []  # (description, size)
+        self.clusters = []  # sorted customer ids, the first one survives
+        self.names = {}  # customer id -> full name, for the report
+
+    @property
+    def duplicate_count(self):
+        return sum(len(cluster) - 1 for cluster in self.clusters)
+
+    def pairs(self):
+        """
+        (duplicate id, survivor id) for every customer to merge away.
+        """
+        for survivor, *duplicates in self.clusters:
+            for duplicate in duplicates:
+                yield duplicate, survivor
+
+
+class CustomerDeduplicator:
+    def __init__(
+        self,
+        name_threshold=DEFAULT_NAME_THRESHOLD,
+        max_block_size=DEFAULT_MAX_BLOCK_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+    ):
+        self.name_threshold = name_threshold
+        self.max_block_size = max_block_size
+        self.batch_size = batch_size
+
+    def _blocks(self, group_fields, queryset, plan):
+        """
+        Yields the rows of every block (customers sharing ``group_fields``) with more than
+        one member. The blocks are found with one GROUP BY on an index; their members are
+        fetched a batch of blocks at a time.
+        """
+        sizes = (
+            queryset.order_by()
+            .values(*group_fields)
+            .annotate(size=Count("pk"))
+            .filter(size__gt=1)
+            .values_list(*group_fields, "size")
+        )
+        keys = []
+        for *key, size in sizes:
+            if size > self.max_block_size:
+                description = ", ".join(f"{field}={value!r}" for field, value in zip(group_fields, key))
+                plan.skipped_blocks.append((description, size))
+            else:
+                keys.append(key)
+        for batch in chunked(keys, self.batch_size):
+            if len(group_fields) == 1:
+                members = queryset.filter(**{f"{group_fields[0]}__in": [key[0] for key in batch]})
+            else:
+                members = queryset.filter(reduce(or_, (Q(**dict(zip(group_fields, key))) for key in batch)))
+            blocks = defaultdict(list)
+            for pk, full_name, *key in members.values_list("pk", "full_name", *group_fields):
+                blocks[tuple(normalize(value) for value in key)].append((pk, full_name))
+            plan.blocks += len(blocks)
+            yield from blocks.values()
+
+    def plan(self):
+        """
+        Clusters duplicate customers. Within a block, customers whose names match are linked;
+        links across blocks join clusters (union-find), so A~B by address and B~C by unit
+        become one cluster.
+        """
+        plan = DedupePlan()
+        links = DisjointSet()
+        block_sources = (
+            (("address_key",), Customer.objects.all()),
+            (("region", "building", "unit"), Customer.objects.exclude(building="").exclude(unit="")),
+        )
+        for group_fields, queryset in block_sources:
+            for block in self._blocks(group_fields, queryset, plan):
+                names = [(pk, normalize(full_name)) for pk, full_name in block]
+                for i, (pk, name) in enumerate(names):
+                    for other_pk, other_name in names[i + 1:]:
+                        if names_match(name, other_name, self.name_threshold):
+                            links.union(pk, other_pk)
+                            plan.names.update((member, full_name) for member, full_name in block
+                                              if member in (pk, other_pk))
+        plan.clusters = sorted(links.groups())
+        return plan
+
+    def count_bookings(self, plan):
+        """
+        Bookings that merging ``plan`` would re-point (one COUNT per batch).
+        """
+        return sum(
+            Booking.objects.filter(customer_id__in=[duplicate for duplicate, _ in batch]).count()
+            for batch in chunked(plan.pairs(), self.batch_size)
+        )
+
+    def merge(self, plan, progress=None):
+        """
+        Merges every cluster of ``plan``, one short transaction per batch of duplicates:
+        lock the rows, re-point their bookings with one UPDATE, fill in the survivors' blank
+        details and delete the duplicates. Returns (customers merged, bookings re-pointed).
+        """
+        merged = repointed = 0
+        for batch in chunked(plan.pairs(), self.batch_size):
+            batch_merged, batch_repointed = self._merge_batch(dict(batch))
+            merged += batch_merged
+            repointed += batch_repointed
+            if progress:
+                progress(merged, repointed)
+        return merged, repointed
+
+    def _merge_batch(self, survivor_of):
+        # Re-pointed bookings take the survivor's region in the reports
+        with transaction.atomic(), rollup_changes(Booking.objects.filter(customer_id__in=list(survivor_of)).values("pk")):
+            # Locking the duplicates makes a booking being created for one of them wait, so the
+            # delete below can never cascade to a booking the UPDATE didn't see.
+            duplicates = Customer.objects.select_for_update().in_bulk(list(survivor_of))
+            survivors = Customer.objects.select_for_update().in_bulk(set(survivor_of.values()))
+            # Skip rows deleted or merged since the plan was made
+            survivor_of = {
+                duplicate: survivor for duplicate, survivor in survivor_of.items()
+                if duplicate in duplicates and survivor in survivors
+            }
+            if not survivor_of:
+                return 0, 0
+
+            repointed = Booking.objects.filter(customer_id__in=list(survivor_of)).update(
+                customer_id=Case(
+                    *(When(customer_id=duplicate, then=Value(survivor)) for duplicate, survivor in survivor_of.items())
+                )
+            )
+
+            filled = set()
+            changed = {}
+            for duplicate, survivor in survivor_of.items():
+                for name in FILL_BLANK_FIELDS:
+                    value = getattr(duplicates[duplicate], name)
+                    if value and not getattr(survivors[survivor], name):
+                        setattr(survivors[survivor], name, value)
+                        filled.add(name)
+                        changed[survivor] = survivors[survivor]
+            if changed:
+                if "google_location" in filled:
+                    for customer in changed.values():
+                        customer.sync_coordinates()
+                    filled.update(("latitude", "longitude"))
+                Customer.objects.bulk_update(list(changed.values()), sorted(filled))
+                index_objects(Customer, changed.values())
+            # Bookings are searchable by their customer's name, building and unit
+            survivor_bookings = Booking.objects.filter(customer_id__in=set(survivor_of.values()))
+            index_ids(Booking, survivor_bookings.values_list("pk", flat=True))
+
+            Customer.objects.filter(pk__in=list(survivor_of)).delete()
+        return len(survivor_of), repointed
@@ -2,6 +2,9 @@ from django import forms
 from .models import Customer
 
 class CustomerForm(forms.ModelForm):
+    # Copied onto a repeat client's record when it has them blank
+    FILL_BLANK_FIELDS = ("region", "google_location", "location_notes")
+
     class Meta:
         model = Customer
         fields = [
@@ -23,3 +26,21 @@ class CustomerForm(forms.ModelForm):
         for field_name, field in self.fields.items():
             existing_classes = field.widget.attrs.get("class", "")
             field.widget.attrs["class"] = f"{existing_classes} form-control".strip()
+
+    def save_or_reuse(self):
+        """
+        Returns (customer, created): the oldest customer with the same normalized name and
+        address if there is one, otherwise the newly saved form instance.
+        """
+        existing = Customer.objects.matching(self.instance).first()
+        if existing is None:
+            return self.save(), True
+        filled = [
+            name for name in self.FILL_BLANK_FIELDS
+            if self.cleaned_data.get(name) and not getattr(existing, name)
+        ]
+        for name in filled:
+            setattr(existing, name, self.cleaned_data[name])
+        if filled:
+            existing.save(update_fields=filled)
+        return existing, False
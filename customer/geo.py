@@ -0,0 +1,55 @@
+# geo.py
+# Coordinates from the customers' Google Maps links, and distances between them.
+import math
+import re
+from decimal import Decimal
+from urllib.parse import parse_qs, unquote, urlsplit
+
+EARTH_RADIUS_KM = 6371.0
+COORDINATE = r"(-?\d{1,3}(?:\.\d+)?)"
+PAIR_RE = re.compile(rf"^\s*{COORDINATE}\s*,\s*{COORDINATE}\s*$")
+# ".../place/Marina/@25.0805,55.1403,17z" (the map view) and "!3d25.0805!4d55.1403" (the pin)
+PIN_RE = re.compile(rf"!3d{COORDINATE}!4d{COORDINATE}")
+VIEW_RE = re.compile(rf"@{COORDINATE},{COORDINATE}")
+QUERY_KEYS = ("q", "query", "ll", "destination", "center")
+PRECISION = Decimal("0.000001")
+
+
+def _valid(lat, lng):
+    lat, lng = float(lat), float(lng)
+    if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat, lng) != (0, 0):
+        return (
+            Decimal(str(lat)).quantize(PRECISION),
+            Decimal(str(lng)).quantize(PRECISION),
+        )
+    return None
+
+
+def parse_coordinates(url):
+    """
+    (latitude, longitude) as Decimals from a Google Maps link, or None when the link has no
+    coordinates in it (short maps.app.goo.gl links, place names). Checks the dropped pin
+    first, then "q=lat,lng"-style parameters, then the map view centre.
+    """
+    if not url:
+        return None
+    url = unquote(url)
+    match = PIN_RE.search(url)
+    if match:
+        return _valid(*match.groups())
+    params = parse_qs(urlsplit(url).query)
+    for key in QUERY_KEYS:
+        for value in params.get(key, ()):
+            match = PAIR_RE.match(value)
+            if match:
+                return _valid(*match.groups())
+    match = VIEW_RE.search(url)
+    if match:
+        return _valid(*match.groups())
+    return None
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,33 @@
+# lookup.py
+# Normalized identity of a customer, used to find repeat clients instead of creating duplicates.
+import hashlib
+
+LOOKUP_FIELDS = ("full_name", "address", "building", "unit")
+ADDRESS_FIELDS = ("address", "building", "unit")
+
+
+def normalize(value):
+    """
+    Case- and whitespace-insensitive form of a field: "  Ocean  Tower " -> "ocean tower".
+    """
+    return " ".join((value or "").lower().split())
+
+
+def _digest(*values):
+    # SHA-1 hex: 40 chars whatever the input, so the index stays narrow
+    normalized = "\x1f".join(normalize(value) for value in values)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def lookup_key(full_name, address, building="", unit=""):
+    """
+    The normalized name, address, building and unit: same key, same customer.
+    """
+    return _digest(full_name, address, building, unit)
+
+
+def address_key(address, building="", unit=""):
+    """
+    The normalized address, building and unit: same key, possibly the same customer.
+    """
+    return _digest(address, building, unit)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from customer.models import Customer
+from tricksy.batching import iter_queryset_chunks
+
+
+class Command(BaseCommand):
+    help = "Parse latitude/longitude from the customers' google_location links, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--all", action="store_true",
+                            help="Re-parse every customer, not only those without coordinates.")
+
+    def handle(self, *args, **options):
+        customers = Customer.all_objects.exclude(google_location="")
+        if not options["all"]:
+            customers = customers.filter(latitude__isnull=True)
+        scanned = located = 0
+        for chunk in iter_queryset_chunks(customers.only("pk", "google_location"), options["batch_size"]):
+            for customer in chunk:
+                customer.sync_coordinates()
+            with transaction.atomic():
+                Customer.all_objects.bulk_update(chunk, ["latitude", "longitude"])
+            scanned += len(chunk)
+            located += sum(customer.has_coordinates for customer in chunk)
+            self.stdout.write(f"Parsed {scanned} customers...")
+        self.stdout.write(self.style.SUCCESS(
+            f"Located {located} of {scanned} customers ({scanned - located} links without coordinates)."
+        ))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from customer.dedupe import (
+    DEFAULT_BATCH_SIZE, DEFAULT_MAX_BLOCK_SIZE, DEFAULT_NAME_THRESHOLD, CustomerDeduplicator,
+)
+
+SKIPPED_BLOCKS_SHOWN = 20
+
+
+class Command(BaseCommand):
+    help = "Find duplicate customers by address/unit blocks and merge each group into its oldest record."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report the duplicates without merging them.")
+        parser.add_argument("--name-threshold", type=float, default=DEFAULT_NAME_THRESHOLD,
+                            help="Minimum name similarity (0-1) within a block.")
+        parser.add_argument("--max-block-size", type=int, default=DEFAULT_MAX_BLOCK_SIZE,
+                            help="Skip blocks with more customers than this (placeholder addresses).")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Duplicates merged per transaction.")
+
+    def handle(self, *args, **options):
+        deduplicator = CustomerDeduplicator(
+            name_threshold=options["name_threshold"],
+            max_block_size=options["max_block_size"],
+            batch_size=options["batch_size"],
+        )
+        plan = deduplicator.plan()
+        self.stdout.write(
+            f"Compared {plan.blocks} blocks: {len(plan.clusters)} groups, {plan.duplicate_count} duplicate customers."
+        )
+        shown = plan.skipped_blocks if options["verbosity"] > 1 else plan.skipped_blocks[:SKIPPED_BLOCKS_SHOWN]
+        for description, size in shown:
+            self.stdout.write(self.style.WARNING(f"Skipped block of {size} customers ({description})."))
+        if len(shown) < len(plan.skipped_blocks):
+            self.stdout.write(self.style.WARNING(
+                f"...and {len(plan.skipped_blocks) - len(shown)} more oversized blocks (use -v 2 to list them)."
+            ))
+        if options["verbosity"] > 1 or options["dry_run"]:
+            for survivor, *duplicates in plan.clusters:
+                merged = ", ".join(f"#{pk} {plan.names[pk]}" for pk in duplicates)
+                self.stdout.write(f"  keep #{survivor} {plan.names[survivor]} <- {merged}")
+
+        if options["dry_run"]:
+            bookings = deduplicator.count_bookings(plan)
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run: would merge {plan.duplicate_count} customers and re-point {bookings} bookings."
+            ))
+            return
+
+        def progress(merged, repointed):
+            self.stdout.write(f"Merged {merged}/{plan.duplicate_count} customers...")
+
+        merged, repointed = deduplicator.merge(plan, progress)
+        self.stdout.write(self.style.SUCCESS(f"Merged {merged} customers and re-pointed {repointed} bookings."))
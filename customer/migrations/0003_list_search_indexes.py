@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("customer", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["full_name", "customer_id"], name="customers_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["region", "full_name", "customer_id"],
+                name="customers_region_name_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+from customer.lookup import LOOKUP_FIELDS, lookup_key
+
+BACKFILL_CHUNK_SIZE = 2000
+
+
+def backfill_lookup_keys(apps, schema_editor):
+    """
+    Keys are hashes computed in Python: walk the table by primary key and bulk_update each chunk.
+    """
+    Customer = apps.get_model("customer", "Customer")
+    last = 0
+    while True:
+        chunk = list(
+            Customer.objects.filter(pk__gt=last)
+            .order_by("pk")
+            .only("pk", *LOOKUP_FIELDS)[:BACKFILL_CHUNK_SIZE]
+        )
+        if not chunk:
+            return
+        for customer in chunk:
+            customer.lookup_key = lookup_key(*(getattr(customer, field) for field in LOOKUP_FIELDS))
+        Customer.objects.bulk_update(chunk, ["lookup_key"])
+        last = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("customer", "0003_list_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="lookup_key",
+            field=models.CharField(default="", editable=False, max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(fields=["lookup_key"], name="customers_lookup_key_idx"),
+        ),
+        migrations.RunPython(backfill_lookup_keys, migrations.RunPython.noop),
+    ]
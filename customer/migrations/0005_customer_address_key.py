@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+from customer.lookup import ADDRESS_FIELDS, address_key
+
+BACKFILL_CHUNK_SIZE = 2000
+
+
+def backfill_address_keys(apps, schema_editor):
+    Customer = apps.get_model("customer", "Customer")
+    last = 0
+    while True:
+        chunk = list(
+            Customer.objects.filter(pk__gt=last)
+            .order_by("pk")
+            .only("pk", *ADDRESS_FIELDS)[:BACKFILL_CHUNK_SIZE]
+        )
+        if not chunk:
+            return
+        for customer in chunk:
+            customer.address_key = address_key(*(getattr(customer, field) for field in ADDRESS_FIELDS))
+        Customer.objects.bulk_update(chunk, ["address_key"])
+        last = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("customer", "0004_customer_lookup_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="address_key",
+            field=models.CharField(default="", editable=False, max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["address_key"], name="customers_address_key_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["region", "building", "unit"], name="customers_region_unit_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_address_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("customer", "0005_customer_address_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("customer", "0006_customer_deleted_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="latitude",
+            field=models.DecimalField(
+                blank=True, decimal_places=6, editable=False, max_digits=9, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="longitude",
+            field=models.DecimalField(
+                blank=True, decimal_places=6, editable=False, max_digits=9, null=True
+            ),
+        ),
+    ]
@@ -1,5 +1,18 @@
 from django.db import models
 
+from tricksy.softdelete import SoftDeleteManager, SoftDeleteQuerySet
+from .geo import parse_coordinates
+from .lookup import ADDRESS_FIELDS, LOOKUP_FIELDS, address_key, lookup_key
+
+
+class CustomerQuerySet(SoftDeleteQuerySet):
+    def matching(self, customer):
+        """
+        Existing customers with the same normalized name and address as ``customer``, oldest first.
+        """
+        customer.sync_lookup_keys()
+        return self.filter(lookup_key=customer.lookup_key).order_by("customer_id")
+
 
 class Customer(models.Model):
     customer_id = models.AutoField(primary_key=True)
@@ -10,8 +23,57 @@ class Customer(models.Model):
     building = models.CharField(max_length=100, blank=True)
     unit = models.CharField(max_length=50, blank=True)
     location_notes = models.TextField(blank=True)
+    lookup_key = models.CharField(max_length=40, default="", editable=False)
+    address_key = models.CharField(max_length=40, default="", editable=False)
+    # Parsed from google_location on save (None when the link has no coordinates)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, editable=False)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, editable=False)
+    # Set by the delete view; a DeletionJob purges the row and its bookings later
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager.from_queryset(CustomerQuerySet)()
+    all_objects = CustomerQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.full_name} ({self.region})"
+
+    def sync_lookup_keys(self):
+        """
+        Fills lookup_key and address_key from the name and address fields.
+        Called by save(); call it yourself before bulk_create()/bulk_update().
+        """
+        self.lookup_key = lookup_key(*(getattr(self, field) for field in LOOKUP_FIELDS))
+        self.address_key = address_key(*(getattr(self, field) for field in ADDRESS_FIELDS))
+
+    def sync_coordinates(self):
+        """
+        Fills latitude/longitude from google_location.
+        Called by save(); call it yourself before bulk_create()/bulk_update().
+        """
+        self.latitude, self.longitude = parse_coordinates(self.google_location) or (None, None)
+
+    @property
+    def has_coordinates(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def save(self, *args, **kwargs):
+        self.sync_lookup_keys()
+        self.sync_coordinates()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {
+                *kwargs["update_fields"], "lookup_key", "address_key", "latitude", "longitude"
+            }
+        super().save(*args, **kwargs)
+
     class Meta:
-        db_table = 'customers'
\ No newline at end of file
+        db_table = 'customers'
+        indexes = [
+            # Customer list: prefix search and keyset sort by name or region
+            models.Index(fields=["full_name", "customer_id"], name="customers_name_idx"),
+            models.Index(fields=["region", "full_name", "customer_id"], name="customers_region_name_idx"),
+            # Repeat-client lookup when creating or importing bookings
+            models.Index(fields=["lookup_key"], name="customers_lookup_key_idx"),
+            # dedupe_customers blocking keys
+            models.Index(fields=["address_key"], name="customers_address_key_idx"),
+            models.Index(fields=["region", "building", "unit"], name="customers_region_unit_idx"),
+        ]
@@ -1,3 +1,155 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from account.models import Role
+from account.utils import invalidate_permission_cache
+from booking.models import Booking
+
+from .geo import parse_coordinates
+from .models import Customer
+
+
+class CustomerListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        Customer.objects.bulk_create([
+            Customer(full_name=f"{'Alpha' if i % 2 else 'Beta'} {i:02d}", region=f"R{i % 3}", address="Street")
+            for i in range(60)
+        ])
+
+    def walk(self, **params):
+        names, cursor = [], None
+        while True:
+            response = self.client.get(reverse("customer:list"), {**params, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            names += [customer.full_name for customer in response.context["customers"]]
+            cursor = response.context["page_obj"].next_cursor
+            if not cursor:
+                return names, response
+
+    def test_pages_cover_every_customer_in_order(self):
+        names, response = self.walk(sort="-name")
+        self.assertEqual(names, sorted(Customer.objects.values_list("full_name", flat=True), reverse=True))
+        self.assertEqual(response.context["approximate_total"], 60)
+
+    def test_prefix_search(self):
+        names, response = self.walk(q="alpha", sort="region")
+        self.assertEqual(len(names), 30)
+        self.assertTrue(all(name.startswith("Alpha") for name in names))
+        self.assertIsNone(response.context["approximate_total"])
+        self.assertEqual(self.walk(q="r1")[0], sorted(
+            Customer.objects.filter(region="R1").values_list("full_name", flat=True)
+        ))
+
+
+class CustomerLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.customer = Customer.objects.create(
+            full_name="Fatima Khan", address="Dubai Marina", building="Ocean Tower", unit="1204", region="Dubai"
+        )
+
+    def test_lookup_key_ignores_case_and_spacing(self):
+        repeat = Customer(full_name="  fatima  KHAN", address="dubai marina ", building="OCEAN TOWER", unit="1204")
+        self.assertEqual(list(Customer.objects.matching(repeat)), [self.customer])
+        other = Customer(full_name="Fatima Khan", address="Dubai Marina", building="Ocean Tower", unit="1205")
+        self.assertFalse(Customer.objects.matching(other).exists())
+
+    def test_lookup_key_follows_updates(self):
+        self.customer.unit = "1205"
+        self.customer.save(update_fields=["unit"])
+        self.assertEqual(
+            Customer.objects.get(pk=self.customer.pk).lookup_key,
+            Customer.objects.matching(Customer(full_name="Fatima Khan", address="Dubai Marina",
+                                               building="Ocean Tower", unit="1205")).get().lookup_key,
+        )
+
+    def test_autocomplete(self):
+        url = reverse("customer:autocomplete")
+        results = self.client.get(url, {"q": "fat"}).json()["results"]
+        self.assertEqual([row["customer_id"] for row in results], [self.customer.pk])
+        self.assertEqual(results[0]["building"], "Ocean Tower")
+        self.assertEqual(self.client.get(url, {"q": "khan"}).json()["results"], [])
+        self.assertEqual(self.client.get(url, {"q": "f"}).json()["results"], [])
+
+    def test_coordinates_from_google_location(self):
+        self.assertEqual(
+            parse_coordinates("https://www.google.com/maps/place/Marina/@25.08,55.14,17z/data=!3d25.0805!4d55.1403"),
+            (Decimal("25.080500"), Decimal("55.140300")),
+        )
+        self.assertEqual(parse_coordinates("https://maps.google.com/?q=25.2048,55.2708"),
+                         (Decimal("25.204800"), Decimal("55.270800")))
+        self.assertIsNone(parse_coordinates("https://maps.app.goo.gl/abc123"))
+
+        self.assertFalse(self.customer.has_coordinates)
+        self.customer.google_location = "https://maps.google.com/?q=25.2048,55.2708"
+        self.customer.save(update_fields=["google_location"])
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.latitude, self.customer.longitude), (Decimal("25.204800"), Decimal("55.270800")))
+
+        # Rows written around save() are picked up by the backfill
+        Customer.objects.filter(pk=self.customer.pk).update(latitude=None, longitude=None)
+        call_command("backfill_customer_coordinates", stdout=StringIO())
+        self.customer.refresh_from_db()
+        self.assertTrue(self.customer.has_coordinates)
+
+
+class CustomerDedupeTests(TestCase):
+    def booking(self, customer, reference):
+        return Booking.objects.create(
+            customer=customer,
+            booking_reference=reference,
+            start_date=datetime.date(2026, 1, 1),
+            start_time=datetime.time(9),
+            end_date=datetime.date(2026, 1, 1),
+            end_time=datetime.time(11),
+        )
+
+    def test_merges_blocks_into_the_oldest_record(self):
+        original = Customer.objects.create(full_name="Fatima Khan", address="Dubai Marina", building="Ocean Tower",
+                                           unit="1204", region="Dubai")
+        # Same address, name typo and other case
+        typo = Customer.objects.create(full_name="FATIMA KAHN", address="dubai  marina", building="Ocean Tower",
+                                       unit="1204", location_notes="Gate 2")
+        # Different address text, same region/building/unit, names swapped
+        swapped = Customer.objects.create(full_name="Khan Fatima", address="Marina Walk", building="Ocean Tower",
+                                          unit="1204", region="Dubai")
+        neighbour = Customer.objects.create(full_name="Omar Ali", address="Dubai Marina", building="Ocean Tower",
+                                            unit="1204")
+        bookings = [self.booking(customer, f"BK-{i}") for i, customer in enumerate([original, typo, swapped])]
+
+        out = StringIO()
+        call_command("dedupe_customers", "--dry-run", stdout=out)
+        self.assertIn("would merge 2 customers and re-point 2 bookings", out.getvalue())
+        self.assertEqual(Customer.objects.count(), 4)
+
+        call_command("dedupe_customers", "--batch-size", "1", stdout=StringIO())
+        self.assertEqual(set(Customer.objects.values_list("pk", flat=True)), {original.pk, neighbour.pk})
+        self.assertEqual({b.customer_id for b in Booking.objects.filter(pk__in=[b.pk for b in bookings])},
+                         {original.pk})
+        original.refresh_from_db()
+        self.assertEqual(original.location_notes, "Gate 2")
 
-# Create your tests here.
+    def test_oversized_blocks_are_skipped(self):
+        Customer.objects.bulk_create([
+            Customer(full_name="Guest", address="N/A", address_key="same") for _ in range(3)
+        ])
+        out = StringIO()
+        call_command("dedupe_customers", "--max-block-size", "2", stdout=out)
+        self.assertIn("Skipped block of 3 customers", out.getvalue())
+        self.assertEqual(Customer.objects.count(), 3)
@@ -8,5 +8,6 @@ urlpatterns = [
     path('create/', views.CustomerCreateView.as_view(), name='create'),
     path('edit/<int:pk>/', views.CustomerUpdateView.as_view(), name='edit'),
     path('delete/<int:pk>/', views.CustomerDeleteView.as_view(), name='delete'),
+    path('autocomplete/', views.CustomerAutocompleteView.as_view(), name='autocomplete'),
     # path('detail/<int:pk>/', views.CustomerDetailView.as_view(), name='detail'),
 ]
\ No newline at end of file
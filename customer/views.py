@@ -1,84 +1,93 @@
-from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib import messages
 
-from account.utils import user_has_access
+from django.views import View
+
+from account.mixins import PermissionRequiredMixin, resolve_request_permissions
+from booking.deletion import schedule_deletion
+from tricksy.pagination import KeysetSearchMixin
 from .models import Customer
 from .forms import CustomerForm
 from django.http import JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 # List View with DataTable
-class CustomerListView(LoginRequiredMixin, ListView):
+class CustomerListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetSearchMixin, ListView):
     model = Customer 
     template_name = "customer/list.html"
     context_object_name = "customers"
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "view_customers"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+    permission_required = "view_customers"
+    paginate_by = 25
+    approximate_total = True
+    search_fields = ("full_name", "region")
+    sort_options = {
+        "name": ("full_name", "customer_id"),
+        "-name": ("-full_name", "-customer_id"),
+        "region": ("region", "full_name", "customer_id"),
+        "newest": ("-customer_id",),
+    }
+    default_sort = "name"
 
 # Create View
-class CustomerCreateView(LoginRequiredMixin, CreateView):
+class CustomerCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     model = Customer
     form_class = CustomerForm
     template_name = "customer/create.html"
     success_url = reverse_lazy("customer:list")
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_customers"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+    permission_required = "manage_customers"
 
     def form_valid(self, form):
         messages.success(self.request, "Customer created successfully!")
         return super().form_valid(form)
 
 # Update View
-class CustomerUpdateView(LoginRequiredMixin, UpdateView):
+class CustomerUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     model = Customer
     form_class = CustomerForm
     template_name = "customer/update.html"
     success_url = reverse_lazy("customer:list")
-
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_customers"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+    permission_required = "manage_customers"
 
     def form_valid(self, form):
         messages.success(self.request, "Customer updated successfully!")
         return super().form_valid(form)
 
 # Delete View
-class CustomerDeleteView(LoginRequiredMixin, DeleteView):
+class CustomerDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Customer
     success_url = reverse_lazy("customer:list")
+    permission_required = "manage_customers"
 
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Override dispatch() to check permission before processing the view.
-        """
-        if not user_has_access(request.user, "manage_customers"):
-            context = {"message": "🚫 Access denied: Superadmins only!"}
-            return render(request, "errors/forbidden_alert.html", context, status=403)
-        return super().dispatch(request, *args, **kwargs)
+    def form_valid(self, form):
+        # Hidden at once with its bookings; the purge_deleted worker removes them in chunks
+        job = schedule_deletion(self.object, self.request.user)
+        return JsonResponse({"success": True, "message": "Customer deleted successfully!", "job": job.pk})
 
     def delete(self, request, *args, **kwargs):
+        # DELETE schedules the purge like POST does (DeletionMixin.delete would cascade inline)
         self.object = self.get_object()
-        self.object.delete()
-        return JsonResponse({"success": True, "message": "Customer deleted successfully!"})
+        return self.form_valid(None)
+
+
+# Autocomplete for the booking create page: prefix match on the customers_name_idx index
+class CustomerAutocompleteView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = ("view_customers", "manage_bookings")
+    limit = 10
+    min_length = 2
+    fields = ("customer_id", "full_name", "region", "address", "google_location", "building", "unit", "location_notes")
+
+    def has_permission(self):
+        # Booking managers pick customers without needing the customer pages
+        return not resolve_request_permissions(self.request).isdisjoint(self.permission_required)
+
+    def get(self, request):
+        query = " ".join(request.GET.get("q", "").split())
+        if len(query) < self.min_length:
+            return JsonResponse({"success": True, "results": []})
+        results = list(
+            Customer.objects.filter(full_name__istartswith=query)
+            .order_by("full_name", "customer_id")
+            .values(*self.fields)[:self.limit]
+        )
+        return JsonResponse({"success": True, "results": results})
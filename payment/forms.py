@@ -0,0 +1,44 @@
+from django import forms
+from .models import Payment
+
+
+class PaymentForm(forms.ModelForm):
+    class Meta:
+        model = Payment
+        fields = ["payment_method", "amount", "discount"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name, field in self.fields.items():
+            css = "form-select" if field_name == "payment_method" else "form-control"
+            field.widget.attrs["class"] = css
+
+    def clean(self):
+        cleaned_data = super().clean()
+        amount, discount = cleaned_data.get("amount"), cleaned_data.get("discount")
+        if amount is not None and amount <= 0:
+            self.add_error("amount", "Amount must be greater than zero.")
+        if amount is not None and discount is not None and not 0 <= discount <= amount:
+            self.add_error("discount", "Discount must be between zero and the amount.")
+        return cleaned_data
+
+
+class PaymentFilterForm(forms.Form):
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+    method = forms.ChoiceField(
+        required=False,
+        choices=[("", "All methods"), *Payment.PAYMENT_METHOD_CHOICES],
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    reference = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Booking reference"}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if start and end and start > end:
+            raise forms.ValidationError("Start date must be on or before the end date.")
+        return cleaned_data
@@ -0,0 +1,46 @@
+# ledger.py
+# Per-booking payment totals as SQL annotations. Each total is a correlated Sum/Max over the
+# booking's payments, resolved on the payments_booking_paid_idx index, so a page of bookings
+# or payments gets its totals in the same query without loading any other Payment row.
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Payment
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def payment_totals(booking_ref="pk"):
+    """
+    Annotations for the booking referenced by ``booking_ref`` (OuterRef name):
+    paid_total (0 when unpaid) and last_paid_at.
+    """
+    payments = Payment.objects.filter(booking_id=OuterRef(booking_ref)).order_by().values("booking_id")
+    return {
+        "paid_total": Coalesce(
+            Subquery(payments.annotate(total=Sum("net_amount")).values("total")[:1]),
+            Value(Decimal("0")),
+            output_field=MONEY,
+        ),
+        "last_paid_at": Subquery(payments.annotate(last=Max("paid_at")).values("last")[:1]),
+    }
+
+
+def with_payment_totals(bookings):
+    """
+    Bookings annotated with paid_total, last_paid_at and outstanding (total_amount - paid_total).
+    """
+    return bookings.annotate(**payment_totals()).annotate(
+        outstanding=ExpressionWrapper(F("total_amount") - F("paid_total"), output_field=MONEY)
+    )
+
+
+def with_booking_totals(payments):
+    """
+    Payments annotated with their booking's paid_total, last_paid_at and outstanding.
+    """
+    return payments.annotate(**payment_totals("booking_id")).annotate(
+        outstanding=ExpressionWrapper(F("booking__total_amount") - F("paid_total"), output_field=MONEY)
+    )
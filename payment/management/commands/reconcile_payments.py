@@ -0,0 +1,40 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payment.reconciliation import DEFAULT_BATCH_SIZE, DEFAULT_WINDOW_DAYS, LineError, PaymentReconciler
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile a card/UPI settlement CSV against recorded payments; matched, mismatched and "
+        "missing results are written to the reconciliation tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Settlement CSV with a header row.")
+        parser.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS,
+                            help="Days of payments loaded (and held in memory) at a time.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Results per INSERT.")
+
+    def handle(self, *args, **options):
+        if options["window_days"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--window-days and --batch-size must be at least 1.")
+
+        def progress(run, first, last):
+            self.stdout.write(f"Reconciled {first}..{last}: {run.matched} matched so far.")
+
+        reconciler = PaymentReconciler(options["window_days"], options["batch_size"], progress)
+        with open(options["path"], newline="", encoding="utf-8-sig") as fh:
+            try:
+                run = reconciler.reconcile_csv(fh, source=os.path.basename(options["path"]))
+            except LineError as exc:
+                raise CommandError(str(exc))
+
+        for line, message in reconciler.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciliation #{run.pk}: {run.lines} lines ({run.rejected} rejected), {run.matched} matched, "
+            f"{run.mismatched} amount mismatches, {run.missing_payment} missing payments, "
+            f"{run.missing_settlement} payments missing from the file."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("booking", "0007_cleaner_day_slots"),
+        ("payment", "0003_alter_payment_options"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["booking", "paid_at"], name="payments_booking_paid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["paid_at", "id"], name="payments_paid_at_idx"),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payment", "0004_payment_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Reconciliation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(blank=True, max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=10,
+                    ),
+                ),
+                ("first_day", models.DateField(blank=True, null=True)),
+                ("last_day", models.DateField(blank=True, null=True)),
+                ("lines", models.PositiveIntegerField(default=0)),
+                ("rejected", models.PositiveIntegerField(default=0)),
+                ("matched", models.PositiveIntegerField(default=0)),
+                ("mismatched", models.PositiveIntegerField(default=0)),
+                ("missing_payment", models.PositiveIntegerField(default=0)),
+                ("missing_settlement", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "payment_reconciliations",
+            },
+        ),
+        migrations.CreateModel(
+            name="ReconciliationItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("matched", "Matched"),
+                            ("mismatch", "Amount mismatch"),
+                            ("missing_payment", "Missing payment"),
+                            ("missing_settlement", "Missing settlement"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("line", models.PositiveIntegerField(blank=True, null=True)),
+                ("booking_reference", models.CharField(max_length=50)),
+                (
+                    "payment_method",
+                    models.CharField(
+                        choices=[("cash", "Cash"), ("card", "Card"), ("upi", "UPI")],
+                        max_length=10,
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "settled_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                (
+                    "recorded_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("settlement_id", models.CharField(blank=True, max_length=100)),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="payment.payment",
+                    ),
+                ),
+                (
+                    "reconciliation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="payment.reconciliation",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "payment_reconciliation_items",
+                "indexes": [
+                    models.Index(
+                        fields=["reconciliation", "status", "id"],
+                        name="recon_items_status_idx",
+                    )
+                ],
+            },
+        ),
+    ]
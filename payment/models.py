@@ -35,4 +35,86 @@ class Payment(models.Model):
     
     class Meta:
         db_table = "payments"
-        ordering = ["-paid_at"]
\ No newline at end of file
+        ordering = ["-paid_at"]
+        indexes = [
+            # A booking's payments in order, and its Sum/Max totals (payment.ledger)
+            models.Index(fields=["booking", "paid_at"], name="payments_booking_paid_idx"),
+            # The ledger's keyset pagination and date ranges: ORDER BY paid_at, id
+            models.Index(fields=["paid_at", "id"], name="payments_paid_at_idx"),
+        ]
+
+class Reconciliation(models.Model):
+    """
+    One run of `manage.py reconcile_payments` over a card/UPI settlement file
+    (see payment/reconciliation.py); its results are the ReconciliationItem rows.
+    """
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    source = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    # Days covered by the file's transactions
+    first_day = models.DateField(null=True, blank=True)
+    last_day = models.DateField(null=True, blank=True)
+    lines = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    matched = models.PositiveIntegerField(default=0)
+    mismatched = models.PositiveIntegerField(default=0)
+    missing_payment = models.PositiveIntegerField(default=0)
+    missing_settlement = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Reconciliation #{self.pk} of {self.source or 'settlements'} ({self.status})"
+
+    class Meta:
+        db_table = "payment_reconciliations"
+
+
+class ReconciliationItem(models.Model):
+    MATCHED = "matched"
+    MISMATCH = "mismatch"
+    # A settlement line with no recorded payment
+    MISSING_PAYMENT = "missing_payment"
+    # A recorded card/UPI payment absent from the settlement file
+    MISSING_SETTLEMENT = "missing_settlement"
+    STATUS_CHOICES = [
+        (MATCHED, "Matched"),
+        (MISMATCH, "Amount mismatch"),
+        (MISSING_PAYMENT, "Missing payment"),
+        (MISSING_SETTLEMENT, "Missing settlement"),
+    ]
+
+    reconciliation = models.ForeignKey(Reconciliation, on_delete=models.CASCADE, related_name="items")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    # No constraint: purging a deleted booking's payments stays a plain DELETE, and the
+    # result keeps its own copy of what was compared
+    payment = models.ForeignKey(
+        Payment, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name="+"
+    )
+    # Line in the settlement file (None for missing settlements)
+    line = models.PositiveIntegerField(null=True, blank=True)
+    booking_reference = models.CharField(max_length=50)
+    payment_method = models.CharField(max_length=10, choices=Payment.PAYMENT_METHOD_CHOICES)
+    day = models.DateField()
+    settled_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    recorded_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    settlement_id = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return f"{self.booking_reference} {self.payment_method} {self.day}: {self.status}"
+
+    class Meta:
+        db_table = "payment_reconciliation_items"
+        indexes = [
+            # A run's results by status (the exceptions finance works through)
+            models.Index(fields=["reconciliation", "status", "id"], name="recon_items_status_idx"),
+        ]
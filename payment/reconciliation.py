@@ -0,0 +1,254 @@
+# reconciliation.py
+# Card/UPI settlement files against Payment rows (`manage.py reconcile_payments`).
+#
+# A partitioned (Grace) hash join in bounded memory. The file is streamed once and each
+# valid line is spilled to a temp file for its window of days. Then, window by window, the
+# window's card/UPI payments are loaded (one range query per day on payments_paid_at_idx)
+# into a hash table keyed by (booking reference, method, day), the window's lines probe
+# it, and the results are bulk-inserted as they come. Memory holds one window of payments and one
+# batch of results, whatever the size or order of the file.
+import csv
+import os
+from collections import OrderedDict, defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from tempfile import TemporaryDirectory
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from booking.availability import day_start
+from .models import Payment, Reconciliation, ReconciliationItem
+
+# Expected CSV header; settlement_id (the acquirer's transaction id) is optional.
+# transaction_date is the day the customer paid (YYYY-MM-DD, a time after it is ignored).
+SETTLEMENT_COLUMNS = ["transaction_date", "booking_reference", "payment_method", "amount", "settlement_id"]
+REQUIRED_COLUMNS = SETTLEMENT_COLUMNS[:4]
+SETTLED_METHODS = {Payment.CARD, Payment.UPI}
+
+DEFAULT_WINDOW_DAYS = 1
+DEFAULT_BATCH_SIZE = 1000
+# Partition files kept open while spilling; the others are reopened for append
+MAX_OPEN_PARTITIONS = 64
+MAX_ERRORS = 200
+
+EPOCH = date(2000, 1, 1)
+CENT = Decimal("0.01")
+_AMOUNT_FIELD = ReconciliationItem._meta.get_field("settled_amount")
+# Amounts must fit the item columns, or the raw bulk INSERT would fail the whole run
+MAX_AMOUNT = Decimal(10) ** (_AMOUNT_FIELD.max_digits - _AMOUNT_FIELD.decimal_places)
+COUNTERS = {
+    ReconciliationItem.MATCHED: "matched",
+    ReconciliationItem.MISMATCH: "mismatched",
+    ReconciliationItem.MISSING_PAYMENT: "missing_payment",
+    ReconciliationItem.MISSING_SETTLEMENT: "missing_settlement",
+}
+
+
+INSERT_ITEM = "INSERT INTO {} ({}) VALUES ({})".format(
+    connection.ops.quote_name(ReconciliationItem._meta.db_table),
+    ", ".join(connection.ops.quote_name(column) for column in (
+        "reconciliation_id", "status", "payment_id", "line", "booking_reference", "payment_method", "day",
+        "settled_amount", "recorded_amount", "settlement_id",
+    )),
+    ", ".join(["%s"] * 10),
+)
+
+
+class LineError(ValueError):
+    pass
+
+
+def parse_line(row):
+    """
+    (day, booking reference, method, amount, settlement id) from one CSV row.
+    """
+    try:
+        day = date.fromisoformat((row.get("transaction_date") or "").strip()[:10])
+    except ValueError:
+        raise LineError(f"transaction_date: invalid date {row.get('transaction_date')!r}")
+    reference = (row.get("booking_reference") or "").strip().upper()
+    if not reference:
+        raise LineError("booking_reference: missing")
+    method = (row.get("payment_method") or "").strip().lower()
+    if method not in SETTLED_METHODS:
+        raise LineError(f"payment_method: expected card or upi, got {row.get('payment_method')!r}")
+    try:
+        amount = Decimal((row.get("amount") or "").replace(",", "").strip())
+        if not amount.is_finite():
+            raise InvalidOperation
+        amount = amount.quantize(CENT)
+    except InvalidOperation:
+        raise LineError(f"amount: invalid amount {row.get('amount')!r}")
+    if abs(amount) >= MAX_AMOUNT:
+        raise LineError(f"amount: {row.get('amount')!r} is out of range")
+    return day, reference, method, amount, (row.get("settlement_id") or "").strip()[:100]
+
+
+class Partitions:
+    """
+    Settlement lines spilled to one CSV file per window under ``directory``.
+    """
+
+    def __init__(self, directory, window_days):
+        self.directory = directory
+        self.window_days = window_days
+        self.open_files = OrderedDict()  # window -> (file, writer), least recently used first
+        self.windows = set()
+
+    def window(self, day):
+        return (day - EPOCH).days // self.window_days
+
+    def bounds(self, window):
+        first = EPOCH + timedelta(days=window * self.window_days)
+        return first, first + timedelta(days=self.window_days)
+
+    def path(self, window):
+        return os.path.join(self.directory, f"{window}.csv")
+
+    def write(self, day, values):
+        window = self.window(day)
+        if window in self.open_files:
+            self.open_files.move_to_end(window)
+        else:
+            if len(self.open_files) >= MAX_OPEN_PARTITIONS:
+                self.open_files.popitem(last=False)[1][0].close()
+            fh = open(self.path(window), "a", newline="", encoding="utf-8")
+            self.open_files[window] = (fh, csv.writer(fh))
+            self.windows.add(window)
+        self.open_files[window][1].writerow(values)
+
+    def close(self):
+        while self.open_files:
+            self.open_files.popitem()[1][0].close()
+
+    def read(self, window):
+        """
+        The window's lines: (line, day, reference, method, amount, settlement id).
+        """
+        if window not in self.windows:
+            return
+        with open(self.path(window), newline="", encoding="utf-8") as fh:
+            for line, day, reference, method, amount, settlement_id in csv.reader(fh):
+                yield int(line), date.fromisoformat(day), reference, method, Decimal(amount), settlement_id
+
+
+class PaymentReconciler:
+    def __init__(self, window_days=DEFAULT_WINDOW_DAYS, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        self.window_days = window_days
+        self.batch_size = batch_size
+        self.progress = progress
+        self.errors = []  # [(line number, message)], the first MAX_ERRORS
+        self.items = []
+        self.ops = connection.ops
+
+    def reconcile_csv(self, fh, source=""):
+        """
+        Reconciles a settlement file (text file object with a header row) and returns the
+        finished Reconciliation. A failed run is kept with its error and re-raised.
+        """
+        run = Reconciliation.objects.create(source=source)
+        try:
+            with TemporaryDirectory(prefix="reconcile-") as directory:
+                partitions = Partitions(directory, self.window_days)
+                try:
+                    self.partition(run, fh, partitions)
+                finally:
+                    partitions.close()
+                if run.first_day is not None:
+                    for window in range(partitions.window(run.first_day), partitions.window(run.last_day) + 1):
+                        first, end = partitions.bounds(window)
+                        first, end = max(first, run.first_day), min(end, run.last_day + timedelta(days=1))
+                        with transaction.atomic():
+                            self.join(run, first, end, partitions.read(window))
+                            run.save(update_fields=list(COUNTERS.values()))
+                        if self.progress:
+                            self.progress(run, first, end - timedelta(days=1))
+        except Exception as exc:
+            run.status, run.error, run.finished_at = Reconciliation.FAILED, str(exc), timezone.now()
+            run.save(update_fields=["status", "error", "finished_at"])
+            raise
+        run.status, run.finished_at = Reconciliation.DONE, timezone.now()
+        run.save(update_fields=["status", "finished_at"])
+        return run
+
+    def partition(self, run, fh, partitions):
+        reader = csv.DictReader(fh)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise LineError(f"Missing columns: {', '.join(missing)}")
+        for row in reader:
+            line = reader.line_num
+            run.lines += 1
+            try:
+                day, reference, method, amount, settlement_id = parse_line(row)
+            except LineError as exc:
+                run.rejected += 1
+                if len(self.errors) < MAX_ERRORS:
+                    self.errors.append((line, str(exc)))
+                continue
+            partitions.write(day, (line, day.isoformat(), reference, method, amount, settlement_id))
+            run.first_day = min(run.first_day or day, day)
+            run.last_day = max(run.last_day or day, day)
+        run.save(update_fields=["lines", "rejected", "first_day", "last_day"])
+
+    def load_payments(self, first, end):
+        """
+        {(booking reference, method, day): [[payment id, net amount, matched], ...]} for the
+        card/UPI payments received from ``first`` up to ``end`` (exclusive), leaving out
+        those of soft-deleted bookings (hidden from the ledger until purged).
+        """
+        payments = defaultdict(list)
+        day = first
+        while day < end:
+            # One range per day: the day comes from the query, not from converting each paid_at
+            rows = Payment.objects.filter(
+                paid_at__gte=day_start(day), paid_at__lt=day_start(day + timedelta(days=1)),
+                payment_method__in=SETTLED_METHODS, booking__deleted_at__isnull=True,
+            ).order_by("paid_at", "id").values_list("pk", "booking__booking_reference", "payment_method", "net_amount")
+            for pk, reference, method, amount in rows:
+                payments[reference.upper(), method, day].append([pk, amount, False])
+            day += timedelta(days=1)
+        return payments
+
+    def join(self, run, first, end, lines):
+        payments = self.load_payments(first, end)
+        counts = dict.fromkeys(COUNTERS, 0)
+        for line, day, reference, method, amount, settlement_id in lines:
+            unmatched = [payment for payment in payments.get((reference, method, day), ()) if not payment[2]]
+            # Same amount first; otherwise the booking's earliest unmatched payment that day
+            payment = next((p for p in unmatched if p[1] == amount), unmatched[0] if unmatched else None)
+            if payment is None:
+                status, payment_id, recorded = ReconciliationItem.MISSING_PAYMENT, None, None
+            else:
+                payment[2] = True
+                payment_id, recorded = payment[0], payment[1]
+                status = ReconciliationItem.MATCHED if recorded == amount else ReconciliationItem.MISMATCH
+            counts[status] += 1
+            self.add(run, status, payment_id, line, reference, method, day, amount, recorded, settlement_id)
+
+        for (reference, method, day), rows in payments.items():
+            for payment_id, recorded, matched in rows:
+                if not matched:
+                    counts[ReconciliationItem.MISSING_SETTLEMENT] += 1
+                    self.add(run, ReconciliationItem.MISSING_SETTLEMENT, payment_id, None, reference, method, day,
+                             None, recorded, "")
+        self.flush()
+        for status, count in counts.items():
+            setattr(run, COUNTERS[status], getattr(run, COUNTERS[status]) + count)
+
+    def add(self, run, status, payment_id, line, reference, method, day, settled, recorded, settlement_id):
+        # Plain rows, not model instances: building and saving millions of those would
+        # take longer than the join itself
+        self.items.append((
+            run.pk, status, payment_id, line, reference, method, self.ops.adapt_datefield_value(day),
+            self.ops.adapt_decimalfield_value(settled), self.ops.adapt_decimalfield_value(recorded), settlement_id,
+        ))
+        if len(self.items) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.items:
+            with connection.cursor() as cursor:
+                cursor.executemany(INSERT_ITEM, self.items)
+            self.items = []
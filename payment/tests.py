@@ -1,3 +1,179 @@
+import datetime
+import io
+import os
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import Role
+from account.utils import invalidate_permission_cache
+from booking.deletion import schedule_deletion
+from booking.models import Booking
+from customer.models import Customer
+from service.models import Service
+
+from .ledger import with_payment_totals
+from .models import Payment, Reconciliation, ReconciliationItem
+
+
+class PaymentLedgerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("100.00"))
+        customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.bookings = []
+        for i in range(2):
+            booking = Booking.objects.create(
+                customer=customer,
+                booking_reference=f"BK-00000{i}",
+                start_date=datetime.date(2026, 1, 1),
+                start_time=datetime.time(9),
+                end_date=datetime.date(2026, 1, 1),
+                end_time=datetime.time(10),
+            )
+            booking.booking_services.create(service=service, number_of_cleaners=2)
+            self.bookings.append(booking)
+        # 30 payments on the first booking spread over January, one on the second
+        start = timezone.make_aware(datetime.datetime(2026, 1, 1, 12))
+        for day in range(30):
+            self.pay(self.bookings[0], "5.00", start + datetime.timedelta(days=day))
+        self.pay(self.bookings[1], "200.00", start + datetime.timedelta(days=40), method=Payment.CARD)
+
+    def pay(self, booking, amount, paid_at, method=Payment.CASH):
+        payment = Payment.objects.create(booking=booking, payment_method=method, amount=Decimal(amount), net_amount=0)
+        Payment.objects.filter(pk=payment.pk).update(paid_at=paid_at)
+        return payment
+
+    def test_totals_are_annotated(self):
+        totals = {
+            b.booking_reference: (b.paid_total, b.outstanding)
+            for b in with_payment_totals(Booking.objects.order_by("pk"))
+        }
+        self.assertEqual(totals, {
+            "BK-000000": (Decimal("150.00"), Decimal("50.00")),
+            "BK-000001": (Decimal("200.00"), Decimal("0.00")),
+        })
+
+    def test_list_pages_with_constant_queries(self):
+        url = reverse("payment:list")
+        # Session, user, role, the page with its totals, the (estimated) row count
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        first = [p.pk for p in response.context["payments"]]
+        self.assertEqual(len(first), 25)
+        self.assertEqual(response.context["payments"][0].booking.booking_reference, "BK-000001")
+        cursor = response.context["page_obj"].next_cursor
+        second = [p.pk for p in self.client.get(url, {"cursor": cursor}).context["payments"]]
+        self.assertEqual(len(second), 6)
+        self.assertFalse(set(first) & set(second))
+
+        response = self.client.get(url, {"start": "2026-01-10", "end": "2026-01-19", "method": Payment.CASH})
+        self.assertEqual(len(response.context["payments"]), 10)
+        self.assertEqual(response.context["summary"], {"count": 10, "total": Decimal("50.00")})
+        self.assertEqual(response.context["payments"][0].outstanding, Decimal("50.00"))
+
+    def test_deleted_bookings_are_left_out(self):
+        payment = self.bookings[1].payments.get()
+        schedule_deletion(self.bookings[1])
+        response = self.client.get(reverse("payment:list"))
+        self.assertEqual(len(response.context["payments"]), 25)
+        self.assertNotIn(payment, response.context["payments"])
+        response = self.client.get(reverse("payment:list"), {"method": Payment.CARD})
+        self.assertEqual(response.context["summary"], {"count": 0, "total": None})
+        self.assertEqual(self.client.get(reverse("payment:detail", args=[payment.pk])).status_code, 404)
+
+    def test_record_payment(self):
+        url = reverse("payment:record", args=[self.bookings[0].pk])
+        self.assertEqual(self.client.get(url).context["form"].initial["amount"], Decimal("50.00"))
+        response = self.client.post(url, {"payment_method": Payment.UPI, "amount": "60.00", "discount": "10.00"})
+        payment = Payment.objects.get(payment_method=Payment.UPI)
+        self.assertRedirects(response, reverse("payment:detail", args=[payment.pk]))
+        self.assertEqual(payment.net_amount, Decimal("50.00"))
+        detail = self.client.get(reverse("payment:detail", args=[payment.pk]))
+        self.assertEqual(detail.context["payment"].outstanding, Decimal("0.00"))
+        self.assertEqual(len(detail.context["booking_payments"]), 31)
+
+        response = self.client.post(url, {"payment_method": Payment.CASH, "amount": "10.00", "discount": "20.00"})
+        self.assertIn("discount", response.context["form"].errors)
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(full_name="Customer", address="1 Street")
+        self.first = self.create_booking(customer, "BK-000001")
+        self.second = self.create_booking(customer, "BK-000002")
+        self.card = self.pay(self.first, Payment.CARD, "100.00", 5)
+        self.upi = self.pay(self.first, Payment.UPI, "50.00", 5)
+        self.unsettled = self.pay(self.second, Payment.CARD, "80.00", 6)
+        self.pay(self.first, Payment.CASH, "30.00", 6)  # cash is never settled
+        self.pay(self.second, Payment.CARD, "20.00", 4)  # before the file's first day
+        # A deleted booking's payment awaiting the purge is left out
+        deleted = self.create_booking(customer, "BK-000003")
+        self.pay(deleted, Payment.CARD, "70.00", 5)
+        schedule_deletion(deleted)
+
+    def create_booking(self, customer, reference):
+        return Booking.objects.create(
+            customer=customer,
+            booking_reference=reference,
+            start_date=datetime.date(2026, 1, 5),
+            start_time=datetime.time(9),
+            end_date=datetime.date(2026, 1, 5),
+            end_time=datetime.time(10),
+        )
+
+    def pay(self, booking, method, amount, day):
+        payment = Payment.objects.create(booking=booking, payment_method=method, amount=Decimal(amount), net_amount=0)
+        paid_at = timezone.make_aware(datetime.datetime(2026, 1, day, 14))
+        Payment.objects.filter(pk=payment.pk).update(paid_at=paid_at)
+        return payment
+
+    def test_settlements_are_matched_by_booking_method_and_day(self):
+        settlements = (
+            "transaction_date,booking_reference,payment_method,amount,settlement_id\n"
+            "2026-01-07,BK-000002,card,60.00,S1\n"
+            "2026-01-05 18:30:00,BK-000001,UPI,45.00,S2\n"
+            "2026-01-05,BK-000001,card,abc,S3\n"
+            "2026-01-05,bk-000001,card,\"100.00\",S4\n"
+            "2026-01-05,BK-000001,card,100.00,S5\n"
+            "2026-01-05,BK-000001,card,NaN,S6\n"
+            "2026-01-05,BK-000001,card,123456789.00,S7\n"
+            "2026-01-05,BK-000003,card,70.00,S8\n"
+        )
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "settlements.csv")
+            with open(path, "w") as fh:
+                fh.write(settlements)
+            call_command("reconcile_payments", path, window_days=2, batch_size=2, stdout=stdout, stderr=stderr)
 
-# Create your tests here.
+        run = Reconciliation.objects.get()
+        self.assertEqual(run.status, Reconciliation.DONE)
+        self.assertEqual((run.lines, run.rejected, run.first_day, run.last_day),
+                         (8, 3, datetime.date(2026, 1, 5), datetime.date(2026, 1, 7)))
+        self.assertEqual(
+            sorted(run.items.values_list("status", "line", "booking_reference", "payment_id", "settled_amount", "recorded_amount"),
+                   key=lambda item: item[1] or 0),
+            [
+                (ReconciliationItem.MISSING_SETTLEMENT, None, "BK-000002", self.unsettled.pk, None, Decimal("80.00")),
+                (ReconciliationItem.MISSING_PAYMENT, 2, "BK-000002", None, Decimal("60.00"), None),
+                (ReconciliationItem.MISMATCH, 3, "BK-000001", self.upi.pk, Decimal("45.00"), Decimal("50.00")),
+                (ReconciliationItem.MATCHED, 5, "BK-000001", self.card.pk, Decimal("100.00"), Decimal("100.00")),
+                (ReconciliationItem.MISSING_PAYMENT, 6, "BK-000001", None, Decimal("100.00"), None),
+                (ReconciliationItem.MISSING_PAYMENT, 9, "BK-000003", None, Decimal("70.00"), None),
+            ],
+        )
+        self.assertEqual((run.matched, run.mismatched, run.missing_payment, run.missing_settlement), (1, 1, 3, 1))
+        self.assertIn("Line 4: amount: invalid amount 'abc'", stderr.getvalue())
+        self.assertIn("Line 7: amount: invalid amount 'NaN'", stderr.getvalue())
+        self.assertIn("Line 8: amount: '123456789.00' is out of range", stderr.getvalue())
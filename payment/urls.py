@@ -4,5 +4,7 @@ from . import views
 app_name = 'payment'
 
 urlpatterns = [
-    # path('', views.payment_home, name='payment_home'),
-]
\ No newline at end of file
+    path('', views.PaymentListView.as_view(), name='list'),
+    path('<int:pk>/', views.PaymentDetailView.as_view(), name='detail'),
+    path('record/<int:booking_id>/', views.PaymentRecordView.as_view(), name='record'),
+]
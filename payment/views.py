@@ -1,3 +1,113 @@
-from django.shortcuts import render
+from datetime import timedelta
 
-# Create your views here.
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Count, Sum
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views import View
+from django.views.generic import ListView
+
+from account.mixins import PermissionRequiredMixin
+from booking.availability import day_start
+from booking.models import Booking
+from tricksy.pagination import KeysetPaginationMixin, approximate_count
+from .forms import PaymentFilterForm, PaymentForm
+from .ledger import with_booking_totals, with_payment_totals
+from .models import Payment
+
+
+class PaymentListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetPaginationMixin, ListView):
+    """
+    The payments ledger, newest first. Pages are keyset ranges on payments_paid_at_idx and
+    each row's booking totals are correlated subqueries, so a year of payments pages at the
+    cost of its first page.
+    """
+    model = Payment
+    template_name = "payment/list.html"
+    context_object_name = "payments"
+    paginate_by = 25
+    permission_required = "manage_payments"
+    keyset_ordering = ("-paid_at", "-id")
+    approximate_total = True
+
+    def get_filter_form(self):
+        if not hasattr(self, "_filter_form"):
+            self._filter_form = PaymentFilterForm(self.request.GET)
+            self._filter_form.is_valid()
+        return self._filter_form
+
+    def get_filters(self):
+        return {name: value for name, value in getattr(self.get_filter_form(), "cleaned_data", {}).items() if value}
+
+    def get_filtered_queryset(self):
+        data = self.get_filters()
+        # Payments of soft-deleted bookings stay hidden until the purge worker removes them
+        queryset = Payment.objects.filter(booking__deleted_at__isnull=True)
+        if data.get("start"):
+            queryset = queryset.filter(paid_at__gte=day_start(data["start"]))
+        if data.get("end"):
+            queryset = queryset.filter(paid_at__lt=day_start(data["end"] + timedelta(days=1)))
+        if data.get("method"):
+            queryset = queryset.filter(payment_method=data["method"])
+        if data.get("reference"):
+            queryset = queryset.filter(booking__booking_reference=data["reference"].strip())
+        return queryset
+
+    def get_queryset(self):
+        return with_booking_totals(self.get_filtered_queryset().select_related("booking__customer"))
+
+    def get_approximate_total(self):
+        # The summary below counts a filtered ledger; only the whole table has a cheap estimate
+        # (which includes the payments of deleted bookings awaiting the purge)
+        return None if self.get_filters() else approximate_count(Payment.objects.all())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filter_form"] = self.get_filter_form()
+        if self.get_filters():
+            # One aggregate in the database, however many payments match
+            context["summary"] = self.get_filtered_queryset().order_by().aggregate(
+                count=Count("pk"), total=Sum("net_amount")
+            )
+        return context
+
+
+class PaymentDetailView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    template_name = "payment/detail.html"
+    permission_required = "manage_payments"
+
+    def get(self, request, pk):
+        payment = get_object_or_404(
+            with_booking_totals(Payment.objects.select_related("booking__customer")),
+            pk=pk, booking__deleted_at__isnull=True,
+        )
+        booking_payments = payment.booking.payments.order_by("paid_at", "id")
+        return render(request, self.template_name, {"payment": payment, "booking_payments": booking_payments})
+
+
+class PaymentRecordView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Records a payment against a booking, defaulting the amount to what is still outstanding.
+    """
+    template_name = "payment/record.html"
+    permission_required = "manage_payments"
+
+    def get_booking(self, booking_id):
+        return get_object_or_404(with_payment_totals(Booking.objects.select_related("customer")), pk=booking_id)
+
+    def get(self, request, booking_id):
+        booking = self.get_booking(booking_id)
+        form = PaymentForm(initial={"amount": max(booking.outstanding, 0) or None, "discount": 0})
+        return render(request, self.template_name, {"form": form, "booking": booking})
+
+    def post(self, request, booking_id):
+        booking = self.get_booking(booking_id)
+        form = PaymentForm(request.POST)
+        if not form.is_valid():
+            return render(request, self.template_name, {"form": form, "booking": booking})
+
+        form.instance.booking = booking
+        payment = form.save()
+
+        messages.success(request, f"✅ Payment of {payment.net_amount} AED recorded for {booking.booking_reference}.")
+        return redirect("payment:detail", pk=payment.pk)
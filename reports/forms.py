@@ -0,0 +1,21 @@
+from django import forms
+
+from .models import Rollup
+
+
+class ReportForm(forms.Form):
+    MAX_DAYS = 366
+
+    start = forms.DateField(widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+    end = forms.DateField(widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+    grain = forms.ChoiceField(choices=Rollup.GRAINS, widget=forms.Select(attrs={"class": "form-select"}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if start and end:
+            if start > end:
+                raise forms.ValidationError("Start date must be on or before the end date.")
+            if cleaned_data.get("grain") == Rollup.DAY and (end - start).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f"Daily reports cover at most {self.MAX_DAYS} days.")
+        return cleaned_data
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reports.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the revenue and cleaner-hours rollup tables from payments, booking services and cleaners."
+
+    def handle(self, *args, **options):
+        months = rebuild_rollups(progress=lambda month: self.stdout.write(f"Rolled up {month:%Y-%m}..."))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the reports for {months} months."))
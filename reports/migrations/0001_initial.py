@@ -0,0 +1,138 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("cleaner", "0004_list_search_indexes"),
+        ("service", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "grain",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("period", models.DateField()),
+                ("region", models.CharField(blank=True, max_length=100)),
+                ("payment_method", models.CharField(max_length=10)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("payments", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "report_payment_rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("grain", "period", "region", "payment_method"),
+                        name="report_payment_rollups_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="CleanerRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "grain",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("period", models.DateField()),
+                ("minutes", models.PositiveIntegerField(default=0)),
+                ("bookings", models.PositiveIntegerField(default=0)),
+                (
+                    "cleaner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="cleaner.cleaner",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "report_cleaner_rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("grain", "period", "cleaner"),
+                        name="report_cleaner_rollups_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ServiceRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "grain",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("period", models.DateField()),
+                ("region", models.CharField(blank=True, max_length=100)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("bookings", models.PositiveIntegerField(default=0)),
+                ("cleaners", models.PositiveIntegerField(default=0)),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="service.service",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "report_service_rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("grain", "period", "service", "region"),
+                        name="report_service_rollups_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.db import models
+
+from cleaner.models import Cleaner
+from service.models import Service
+
+
+class Rollup(models.Model):
+    """
+    One pre-aggregated row per period and dimension values, maintained by reports.rollups.
+    Daily rows are recomputed from the raw tables for the days that changed, after the
+    writes commit; monthly rows are summed from the daily ones.
+    """
+    DAY = "day"
+    MONTH = "month"
+    GRAINS = [
+        (DAY, "Day"),
+        (MONTH, "Month"),
+    ]
+
+    grain = models.CharField(max_length=5, choices=GRAINS)
+    period = models.DateField()  # the day, or the first day of the month
+
+    class Meta:
+        abstract = True
+
+
+class PaymentRollup(Rollup):
+    """
+    Money received (payments.net_amount) by region and payment method.
+    """
+    DIMENSIONS = ("region", "payment_method")
+    MEASURES = ("amount", "payments")
+
+    region = models.CharField(max_length=100, blank=True)
+    payment_method = models.CharField(max_length=10)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "report_payment_rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["grain", "period", "region", "payment_method"], name="report_payment_rollups_uniq"
+            ),
+        ]
+
+
+class ServiceRollup(Rollup):
+    """
+    Booked revenue (base price x cleaners) by service and region, on the booking's start day.
+    """
+    DIMENSIONS = ("service_id", "region")
+    MEASURES = ("amount", "bookings", "cleaners")
+
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="+")
+    region = models.CharField(max_length=100, blank=True)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    bookings = models.PositiveIntegerField(default=0)
+    cleaners = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "report_service_rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["grain", "period", "service", "region"], name="report_service_rollups_uniq"),
+        ]
+
+
+class CleanerRollup(Rollup):
+    """
+    Assigned minutes per cleaner, on the booking's start day.
+    """
+    DIMENSIONS = ("cleaner_id",)
+    MEASURES = ("minutes", "bookings")
+
+    cleaner = models.ForeignKey(Cleaner, on_delete=models.CASCADE, related_name="+")
+    minutes = models.PositiveIntegerField(default=0)
+    bookings = models.PositiveIntegerField(default=0)
+
+    @property
+    def hours(self):
+        return round(self.minutes / 60, 1)
+
+    class Meta:
+        db_table = "report_cleaner_rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["grain", "period", "cleaner"], name="report_cleaner_rollups_uniq"),
+        ]
+
+
+class RollupLock(models.Model):
+    """
+    One marker row per month. A refresh locks its months' rows (SELECT ... FOR UPDATE)
+    before reading the raw tables, so refreshes of the same month run one after another.
+    """
+    month = models.DateField(unique=True)
+
+    class Meta:
+        db_table = "report_rollup_locks"
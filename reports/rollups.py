@@ -0,0 +1,324 @@
+# rollups.py
+# Revenue and workload rollups. Writes mark the days they touch (a booking's start day, a
+# payment's local day); once the writer's transaction commits, those days' rows are
+# recomputed from the raw tables and the months containing them are re-summed from the
+# daily rows. Reports then read a few hundred pre-aggregated rows instead of grouping the
+# raw tables.
+#
+# The refresh runs in its own short transaction after the commit, so request transactions
+# never wait on each other for the rollups. Two refreshes of the same month still lock
+# its RollupLock row first, so the later one recomputes from what the earlier one saw plus
+# its own writer's rows; reading what the previous holder committed relies on READ
+# COMMITTED (tricksy/settings.py). A refresh lost to a crash between the commit and the
+# callback is repaired by `manage.py rebuild_reports`.
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.utils import timezone
+
+from booking.availability import day_start
+from booking.models import Booking, BookingCleaner, BookingService
+from payment.models import Payment
+from .models import CleanerRollup, PaymentRollup, Rollup, RollupLock, ServiceRollup
+
+# The changes collected by the enclosing rollup_changes() block, None outside it
+_pending = ContextVar("pending_rollups", default=None)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def day_ranges(days):
+    """
+    Sorted days as [first, last] runs of consecutive days.
+    """
+    ranges = []
+    for day in sorted(days):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return ranges
+
+
+def in_days(field, days):
+    """
+    Q() for ``field`` (a datetime) falling on one of ``days``: one index range per run of days.
+    """
+    return reduce(or_, (
+        Q(**{f"{field}__gte": day_start(first), f"{field}__lt": day_start(last + timedelta(days=1))})
+        for first, last in day_ranges(days)
+    ))
+
+
+def touched_days(booking_ids):
+    """
+    (booking days, payment days) that the rollups of ``booking_ids`` (ids or a values("pk")
+    queryset) cover: their start days, and the days their payments were received.
+    """
+    booking_days = set(
+        Booking.all_objects.filter(pk__in=booking_ids).order_by().values_list("start_date", flat=True).distinct()
+    )
+    payment_days = {
+        timezone.localdate(paid_at)
+        for paid_at in Payment.objects.filter(booking_id__in=booking_ids).values_list("paid_at", flat=True)
+    }
+    booking_days.discard(None)
+    return booking_days, payment_days
+
+
+# --- Recompute ---------------------------------------------------------------------------------
+
+def _replace(model, day_rows, days):
+    """
+    Swaps the daily rows of ``days`` for ``day_rows`` and re-sums their months.
+    """
+    model.objects.filter(grain=Rollup.DAY, period__in=days).delete()
+    model.objects.bulk_create(day_rows, batch_size=1000)
+
+    dimensions, measures = model.DIMENSIONS, model.MEASURES
+    months = {month_start(day) for day in days}
+    model.objects.filter(grain=Rollup.MONTH, period__in=months).delete()
+    month_rows = []
+    for first, last in day_ranges(months):
+        end = (last + timedelta(days=32)).replace(day=1)
+        totals = defaultdict(lambda: dict.fromkeys(measures, 0))
+        rows = model.objects.filter(grain=Rollup.DAY, period__gte=first, period__lt=end).values_list(
+            "period", *dimensions, *measures
+        )
+        for period, *values in rows:
+            key = (month_start(period), *values[:len(dimensions)])
+            for name, value in zip(measures, values[len(dimensions):]):
+                totals[key][name] += value
+        month_rows.extend(
+            model(grain=Rollup.MONTH, period=period, **dict(zip(dimensions, key)), **sums)
+            for (period, *key), sums in totals.items()
+        )
+    model.objects.bulk_create(month_rows, batch_size=1000)
+
+
+def refresh_payment_days(days):
+    rows = []
+    for day in sorted(days):
+        payments = Payment.objects.filter(
+            in_days("paid_at", [day]), booking__deleted_at__isnull=True
+        ).order_by().values("payment_method", region=F("booking__customer__region"))
+        rows.extend(
+            PaymentRollup(grain=Rollup.DAY, period=day, **row)
+            for row in payments.annotate(amount=Sum("net_amount"), payments=Count("pk"))
+        )
+    _replace(PaymentRollup, rows, days)
+
+
+def refresh_booking_days(days):
+    alive = Q(booking__deleted_at__isnull=True) & in_days("booking__start_at", days)
+    services = (
+        BookingService.objects.filter(alive)
+        .order_by()
+        .values("service_id", period=F("booking__start_date"), region=F("booking__customer__region"))
+        .annotate(
+            amount=Sum(F("service__base_price") * F("number_of_cleaners")),
+            bookings=Count("booking", distinct=True),
+            cleaners=Sum("number_of_cleaners"),
+        )
+    )
+    _replace(ServiceRollup, [ServiceRollup(grain=Rollup.DAY, **row) for row in services], days)
+
+    # Minutes are summed here: a duration in SQL differs per backend
+    workload = defaultdict(lambda: [0, 0])
+    assignments = BookingCleaner.objects.filter(alive).values_list(
+        "cleaner_id", "booking__start_date", "booking__start_at", "booking__end_at"
+    )
+    for cleaner_id, period, start_at, end_at in assignments:
+        totals = workload[cleaner_id, period]
+        totals[0] += int((end_at - start_at).total_seconds() // 60) if start_at and end_at else 0
+        totals[1] += 1
+    _replace(CleanerRollup, [
+        CleanerRollup(grain=Rollup.DAY, period=period, cleaner_id=cleaner_id, minutes=minutes, bookings=bookings)
+        for (cleaner_id, period), (minutes, bookings) in workload.items()
+    ], days)
+
+
+def lock_months(days):
+    """
+    Locks the RollupLock rows of the months containing ``days`` until the transaction ends,
+    creating the missing ones. Always in month order, so two refreshes never deadlock.
+    """
+    months = sorted({month_start(day) for day in days})
+    RollupLock.objects.bulk_create([RollupLock(month=month) for month in months], ignore_conflicts=True)
+    list(RollupLock.objects.select_for_update().filter(month__in=months).order_by("month").values_list("pk"))
+
+
+def refresh_days(booking_days=(), payment_days=()):
+    """
+    Recomputes the given days now, in a transaction holding their months' locks.
+    """
+    if not booking_days and not payment_days:
+        return
+    with transaction.atomic():
+        lock_months({*booking_days, *payment_days})
+        if booking_days:
+            refresh_booking_days(set(booking_days))
+        if payment_days:
+            refresh_payment_days(set(payment_days))
+
+
+# --- Scheduling ---------------------------------------------------------------------------------
+
+class PendingRollups:
+    def __init__(self):
+        self.booking_ids = set()  # days resolved on exit, after the writes
+        self.booking_days = set()
+        self.payment_days = set()
+
+    def add_days(self, booking_ids):
+        booking_days, payment_days = touched_days(booking_ids)
+        self.booking_days |= booking_days
+        self.payment_days |= payment_days
+
+    def refresh(self):
+        if self.booking_ids:
+            self.add_days(self.booking_ids)
+        queue_refresh(self.booking_days, self.payment_days)
+
+
+def queue_refresh(booking_days=(), payment_days=()):
+    """
+    Refreshes the days once the current transaction commits (at once in autocommit);
+    nothing is refreshed if it rolls back. Writers touching many rows wrap them in
+    rollup_changes() so their days are queued, and refreshed, once.
+    """
+    if booking_days or payment_days:
+        booking_days, payment_days = set(booking_days), set(payment_days)
+        transaction.on_commit(lambda: refresh_days(booking_days, payment_days))
+
+
+def schedule_rollups(booking_ids=(), booking_days=(), payment_days=()):
+    """
+    Queues the days of ``booking_ids`` plus the given days now, or once at the end of the
+    enclosing rollup_changes() block, for a refresh after commit. Bulk writers that know their bookings' start
+    days pass ``booking_days`` and save the lookup.
+    """
+    pending = _pending.get()
+    outer = pending is None
+    if outer:
+        pending = PendingRollups()
+    pending.booking_ids.update(booking_ids)
+    pending.booking_days.update(booking_days)
+    pending.payment_days.update(payment_days)
+    if outer:
+        pending.refresh()
+
+
+@contextmanager
+def rollup_changes(booking_ids=None):
+    """
+    Wrap writes to bookings, their services, cleaners or payments (bulk writes included).
+    The days ``booking_ids`` (ids or a values("pk") queryset) cover before and after the
+    block, and those of the booking ids added to the yielded set or scheduled by signals
+    inside it, are queued once on exit. Nested blocks queue with the outermost one.
+
+        with transaction.atomic(), rollup_changes([booking.pk]):
+            booking = form.save()
+    """
+    pending = _pending.get()
+    outer = pending is None
+    if outer:
+        pending = PendingRollups()
+    if booking_ids is not None:
+        pending.add_days(booking_ids)
+    token = _pending.set(pending)
+    try:
+        yield pending.booking_ids
+    finally:
+        _pending.reset(token)
+    if booking_ids is not None:
+        pending.add_days(booking_ids)
+    if outer:
+        pending.refresh()
+
+
+def rebuild_rollups(progress=None):
+    """
+    Recomputes every rollup from the raw tables, one transaction per month
+    (`manage.py rebuild_reports`). Returns the number of months written.
+    """
+    bookings = Booking.objects.aggregate(first=Min("start_date"), last=Max("start_date"))
+    payments = Payment.objects.aggregate(first=Min("paid_at"), last=Max("paid_at"))
+    bounds = [day for day in (bookings["first"], bookings["last"]) if day]
+    bounds += [timezone.localdate(paid_at) for paid_at in (payments["first"], payments["last"]) if paid_at]
+    with transaction.atomic():
+        for model in (PaymentRollup, ServiceRollup, CleanerRollup):
+            model.objects.all().delete()
+    if not bounds:
+        return 0
+    month, last = month_start(min(bounds)), max(bounds)
+    months = 0
+    while month <= last:
+        end = (month + timedelta(days=32)).replace(day=1)
+        days = [month + timedelta(days=offset) for offset in range((end - month).days)]
+        with transaction.atomic():
+            refresh_days(days, days)
+        months += 1
+        if progress:
+            progress(month)
+        month = end
+    return months
+
+
+# --- Read side ---------------------------------------------------------------------------------
+
+class RevenueReport:
+    """
+    Revenue and workload between ``start`` and ``end`` (inclusive) by day or month, read
+    from the rollup rows only: one query per table.
+    """
+
+    def __init__(self, start, end, grain=Rollup.MONTH):
+        self.grain = grain
+        if grain == Rollup.MONTH:
+            start, end = month_start(start), month_start(end)
+        rows = {"grain": grain, "period__gte": start, "period__lte": end}
+
+        self.methods = [code for code, _ in Payment.PAYMENT_METHOD_CHOICES]
+        self.periods = defaultdict(lambda: dict.fromkeys(self.methods, 0))
+        self.regions = defaultdict(lambda: [0, 0])
+        self.received = 0
+        for period, region, method, amount, payments in PaymentRollup.objects.filter(**rows).values_list(
+            "period", "region", "payment_method", "amount", "payments"
+        ):
+            self.periods[period][method] = self.periods[period].get(method, 0) + amount
+            self.regions[region or "—"][0] += amount
+            self.regions[region or "—"][1] += payments
+            self.received += amount
+
+        self.services = (
+            ServiceRollup.objects.filter(**rows)
+            .values("service__name")
+            .annotate(amount=Sum("amount"), bookings=Sum("bookings"), cleaners=Sum("cleaners"))
+            .order_by("-amount", "service__name")
+        )
+        self.cleaners = (
+            CleanerRollup.objects.filter(**rows)
+            .values("cleaner__name", "cleaner__vehicle_code")
+            .annotate(minutes=Sum("minutes"), bookings=Sum("bookings"))
+            .order_by("-minutes", "cleaner__name")
+        )
+
+    def period_rows(self):
+        """
+        (period, [amount per method], total) in date order.
+        """
+        for period in sorted(self.periods):
+            amounts = [self.periods[period][method] for method in self.methods]
+            yield period, amounts, sum(amounts)
+
+    def region_rows(self):
+        return sorted(self.regions.items(), key=lambda item: -item[1][0])
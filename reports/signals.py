@@ -0,0 +1,57 @@
+# signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from booking.models import Booking, BookingCleaner, BookingService
+from customer.models import Customer
+from payment.models import Payment
+from service.models import Service
+from .rollups import schedule_rollups, touched_days
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, raw=False, **kwargs):
+    """
+    Payment, BookingCleaner: saves only. A receiver on their post_delete would make every
+    queryset delete() load the rows to send it; deleting writers use rollup_changes().
+    """
+    if not raw:
+        schedule_rollups(payment_days=[timezone.localdate(instance.paid_at)])
+
+
+@receiver(post_save, sender=BookingCleaner)
+@receiver([post_save, post_delete], sender=BookingService)
+def booking_row_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_rollups([instance.booking_id])
+
+
+@receiver(post_save, sender=Service)
+def service_price_changed(sender, instance, created, raw=False, **kwargs):
+    """
+    Booked revenue uses the current base price (booking.signals remembers the old one).
+    """
+    if raw or created or getattr(instance, "_previous_base_price", None) == instance.base_price:
+        return
+    days = Booking.objects.filter(booking_services__service=instance).order_by().values_list("start_date", flat=True)
+    schedule_rollups(booking_days=set(days.distinct()))
+
+
+@receiver(pre_save, sender=Customer)
+def remember_region(sender, instance, raw=False, update_fields=None, **kwargs):
+    if instance.pk and not raw and (update_fields is None or "region" in update_fields):
+        instance._previous_region = (
+            Customer.all_objects.filter(pk=instance.pk).values_list("region", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Customer)
+def customer_region_changed(sender, instance, created, raw=False, **kwargs):
+    """
+    Revenue is grouped by the customer's region: move their days to the new one.
+    """
+    if raw or created or getattr(instance, "_previous_region", instance.region) == instance.region:
+        return
+    booking_days, payment_days = touched_days(Booking.all_objects.filter(customer_id=instance.pk).values("pk"))
+    schedule_rollups(booking_days=booking_days, payment_days=payment_days)
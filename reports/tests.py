@@ -0,0 +1,144 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import Role
+from account.utils import invalidate_permission_cache
+from booking.deletion import schedule_deletion
+from booking.models import Booking, BookingCleaner, BookingService
+from cleaner.models import Cleaner
+from customer.models import Customer
+from payment.models import Payment
+from service.models import Service
+
+from .models import CleanerRollup, PaymentRollup, Rollup, RollupLock, ServiceRollup
+from .rollups import rebuild_rollups, rollup_changes
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_cache()
+        self.user = User.objects.create_user(username="admin", password="pass")
+        Role.objects.create(user=self.user, role=Role.SUPERADMIN)
+        self.client.login(username="admin", password="pass")
+        self.deep = Service.objects.create(name="Deep Clean", duration=120, base_price=Decimal("50.00"))
+        self.sofa = Service.objects.create(name="Sofa", duration=60, base_price=Decimal("30.00"))
+        self.cleaner = Cleaner.objects.create(name="Cleaner")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_bookings()
+
+    def create_bookings(self):
+        self.marina = Customer.objects.create(full_name="Marina", address="1 Street", region="Marina")
+        self.deira = Customer.objects.create(full_name="Deira", address="2 Street", region="Deira")
+        self.first = self.create_booking("BK-000001", self.marina, datetime.date(2026, 1, 5), self.deep, 2)
+        self.second = self.create_booking("BK-000002", self.deira, datetime.date(2026, 1, 20), self.sofa, 1)
+        self.third = self.create_booking("BK-000003", self.marina, datetime.date(2026, 2, 3), self.deep, 1)
+
+    def create_booking(self, reference, customer, day, service, cleaners):
+        booking = Booking.objects.create(
+            customer=customer,
+            booking_reference=reference,
+            start_date=day,
+            start_time=datetime.time(9),
+            end_date=day,
+            end_time=datetime.time(11),
+        )
+        BookingService.objects.create(booking=booking, service=service, number_of_cleaners=cleaners)
+        return booking
+
+    def services(self, grain, period):
+        return sorted(
+            ServiceRollup.objects.filter(grain=grain, period=period).values_list(
+                "service__name", "region", "amount", "bookings", "cleaners"
+            )
+        )
+
+    def snapshot(self):
+        return {
+            model.__name__: sorted(
+                tuple(row[:1] + row[2:]) for row in model.objects.values_list(
+                    "grain", "id", "period", *model.DIMENSIONS, *model.MEASURES
+                )
+            )
+            for model in (PaymentRollup, ServiceRollup, CleanerRollup)
+        }
+
+    def test_writes_keep_the_rollups_current(self):
+        january = datetime.date(2026, 1, 1)
+        self.assertEqual(self.services(Rollup.DAY, datetime.date(2026, 1, 5)),
+                         [("Deep Clean", "Marina", Decimal("100.00"), 1, 2)])
+        self.assertEqual(self.services(Rollup.MONTH, january), [
+            ("Deep Clean", "Marina", Decimal("100.00"), 1, 2),
+            ("Sofa", "Deira", Decimal("30.00"), 1, 1),
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookingCleaner.objects.create(booking=self.first, cleaner=self.cleaner)
+            with rollup_changes([self.third.pk]):
+                BookingCleaner.objects.bulk_create([BookingCleaner(booking=self.third, cleaner=self.cleaner)])
+        self.assertEqual(
+            list(CleanerRollup.objects.filter(grain=Rollup.MONTH).order_by("period").values_list("minutes", "bookings")),
+            [(120, 1), (120, 1)],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(booking=self.first, payment_method=Payment.CARD, amount=Decimal("100.00"), net_amount=0)
+        today = timezone.localdate()
+        self.assertEqual(
+            list(PaymentRollup.objects.filter(grain=Rollup.DAY, period=today).values_list("region", "amount")),
+            [("Marina", Decimal("100.00"))],
+        )
+
+        # A region change moves the customer's revenue, a deletion removes the booking's
+        with self.captureOnCommitCallbacks(execute=True):
+            self.marina.region = "JLT"
+            self.marina.save()
+            schedule_deletion(self.second)
+        self.assertEqual(self.services(Rollup.MONTH, january), [("Deep Clean", "JLT", Decimal("100.00"), 1, 2)])
+        self.assertEqual(PaymentRollup.objects.get(grain=Rollup.MONTH).region, "JLT")
+
+        # Maintained incrementally, the tables hold what a rebuild from scratch computes
+        maintained = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(maintained, self.snapshot())
+
+    def test_refreshes_run_after_commit_and_lock_their_months(self):
+        self.assertEqual(
+            list(RollupLock.objects.order_by("month").values_list("month", flat=True)),
+            [datetime.date(2026, 1, 1), datetime.date(2026, 2, 1)],
+        )
+        with mock.patch("reports.rollups.lock_months") as lock_months:
+            with self.captureOnCommitCallbacks() as callbacks:
+                with rollup_changes([self.third.pk]):
+                    Payment.objects.create(booking=self.third, payment_method=Payment.CASH, amount=Decimal("10.00"))
+                    BookingService.objects.create(booking=self.third, service=self.sofa, number_of_cleaners=1)
+            # Nothing is locked or recomputed inside the writer's transaction
+            lock_months.assert_not_called()
+            self.assertFalse(PaymentRollup.objects.exists())
+            for callback in callbacks:
+                callback()
+        # The block's days are refreshed together, once
+        lock_months.assert_called_once_with({timezone.localdate(), self.third.start_date})
+        self.assertEqual(PaymentRollup.objects.filter(grain=Rollup.DAY).count(), 1)
+
+    def test_report_reads_only_rollups(self):
+        url = reverse("reports:index")
+        params = {"start": "2026-01-01", "end": "2026-02-28", "grain": Rollup.MONTH}
+        self.client.get(url, params)  # warm the permission cache
+        # Session and user, then one query per rollup table
+        with self.assertNumQueries(5):
+            response = self.client.get(url, params)
+        report = response.context["report"]
+        self.assertEqual(
+            [(row["service__name"], row["amount"]) for row in report.services],
+            [("Deep Clean", Decimal("150.00")), ("Sofa", Decimal("30.00"))],
+        )
+        response = self.client.get(url, {**params, "grain": Rollup.DAY, "end": "2027-06-01"})
+        self.assertIsNone(response.context["report"])
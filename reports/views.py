@@ -0,0 +1,26 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.shortcuts import render
+from django.utils import timezone
+from django.views import View
+
+from account.mixins import PermissionRequiredMixin
+from .forms import ReportForm
+from .models import Rollup
+from .rollups import RevenueReport
+
+
+class ReportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Revenue by payment method, region and service, and cleaner hours, by day or month.
+    Reads the rollup tables only (`manage.py rebuild_reports` fills them from scratch).
+    """
+    template_name = "reports/index.html"
+    permission_required = "manage_payments"
+
+    def get(self, request):
+        today = timezone.localdate()
+        form = ReportForm(request.GET or {"start": today.replace(month=1, day=1), "end": today, "grain": Rollup.MONTH})
+        report = None
+        if form.is_valid():
+            report = RevenueReport(form.cleaned_data["start"], form.cleaned_data["end"], form.cleaned_data["grain"])
+        return render(request, self.template_name, {"form": form, "report": report})
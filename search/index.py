@@ -0,0 +1,183 @@
+# index.py
+# Maintains the search_tokens inverted index and answers global search queries.
+import re
+
+from django.db.models import Exists, OuterRef, Prefetch
+
+from booking.models import Booking, BookingCleaner
+from cleaner.models import Cleaner
+from customer.models import Customer
+from tricksy.batching import chunked
+from .models import SearchToken
+
+TOKEN_RE = re.compile(r"[0-9a-z]+")
+MAX_TOKEN_LENGTH = 64
+MIN_TERM_LENGTH = 2
+
+
+class SearchSource:
+    """
+    One searchable model: which fields feed the index and who may see the results.
+    A field may follow relations ("customer.full_name"); to-many ones are prefetched
+    with ``prefetch_related`` and contribute every related row.
+    """
+
+    def __init__(self, entity_type, model, fields, permission, url_name, select_related=(), prefetch_related=()):
+        self.entity_type = entity_type
+        self.model = model
+        self.fields = fields
+        self.permission = permission
+        self.url_name = url_name
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+
+    @property
+    def label(self):
+        return self.model._meta.verbose_name_plural.capitalize()
+
+    def get_queryset(self):
+        return self.model.objects.select_related(*self.select_related)
+
+    @property
+    def follows_relations(self):
+        return any("." in field for field in self.fields)
+
+    def get_index_queryset(self):
+        """
+        What documents are built from: only the indexed columns, or the related rows too.
+        """
+        if not self.follows_relations:
+            return self.model.objects.only("pk", *self.fields)
+        return self.get_queryset().prefetch_related(*self.prefetch_related)
+
+    def document(self, obj):
+        return " ".join(str(value) for field in self.fields for value in _field_values(obj, field))
+
+
+def _field_values(obj, path):
+    values = [obj]
+    for name in path.split("."):
+        values = [
+            related
+            for value in values
+            for related in _related(getattr(value, name))
+            if related is not None and related != ""
+        ]
+    return values
+
+
+def _related(value):
+    # A to-many manager yields its (prefetched) rows
+    return value.all() if hasattr(value, "all") else [value]
+
+
+SOURCES = {
+    SearchToken.BOOKING: SearchSource(
+        SearchToken.BOOKING, Booking,
+        ("booking_reference", "customer.full_name", "customer.building", "customer.unit",
+         "booking_cleaners.cleaner.name"),
+        "view_bookings", "booking:update",
+        select_related=("customer",),
+        prefetch_related=(Prefetch("booking_cleaners", queryset=BookingCleaner.objects.select_related("cleaner")),),
+    ),
+    SearchToken.CUSTOMER: SearchSource(
+        SearchToken.CUSTOMER, Customer, ("full_name", "building", "unit", "region"), "view_customers", "customer:edit"
+    ),
+    SearchToken.CLEANER: SearchSource(
+        SearchToken.CLEANER, Cleaner, ("name", "company", "vehicle_code"), "view_cleaners", "cleaner:edit"
+    ),
+}
+SOURCES_BY_MODEL = {source.model: source for source in SOURCES.values()}
+
+
+def tokenize(text):
+    """
+    Lower-cased alphanumeric words: "BK-1A2B, Tower B" -> {"bk", "1a2b", "tower", "b"}.
+    """
+    return {token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall((text or "").lower())}
+
+
+def index_object(obj):
+    """
+    Brings one object's tokens up to date, writing only the tokens that changed.
+    Returns whether any did. Sources that follow relations re-read the object with them.
+    """
+    source = SOURCES_BY_MODEL[type(obj)]
+    if source.follows_relations:
+        obj = source.get_index_queryset().filter(pk=obj.pk).first() or obj
+    wanted = tokenize(source.document(obj))
+    rows = SearchToken.objects.filter(entity_type=source.entity_type, entity_id=obj.pk)
+    current = set(rows.values_list("token", flat=True))
+    if current - wanted:
+        rows.filter(token__in=current - wanted).delete()
+    if wanted - current:
+        SearchToken.objects.bulk_create([
+            SearchToken(token=token, entity_type=source.entity_type, entity_id=obj.pk)
+            for token in wanted - current
+        ])
+    return bool(current ^ wanted)
+
+
+def unindex_object(obj):
+    source = SOURCES_BY_MODEL[type(obj)]
+    SearchToken.objects.filter(entity_type=source.entity_type, entity_id=obj.pk).delete()
+
+
+def index_objects(model, objects):
+    """
+    Replaces the tokens of many objects of one model: one DELETE and one bulk INSERT.
+    Used by bulk writes (imports) and the rebuild command, which bypass the signals.
+    Objects of a source that follows relations must come from its get_index_queryset().
+    """
+    source = SOURCES_BY_MODEL[model]
+    objects = list(objects)
+    if not objects:
+        return 0
+    SearchToken.objects.filter(
+        entity_type=source.entity_type, entity_id__in=[obj.pk for obj in objects]
+    ).delete()
+    rows = [
+        SearchToken(token=token, entity_type=source.entity_type, entity_id=obj.pk)
+        for obj in objects
+        for token in tokenize(source.document(obj))
+    ]
+    SearchToken.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def index_ids(model, ids, batch_size=1000):
+    """
+    Re-reads the given objects (with what their documents follow) and replaces their tokens,
+    ``batch_size`` at a time. For writers that know only ids, e.g. bulk cleaner assignments.
+    """
+    source = SOURCES_BY_MODEL[model]
+    tokens = 0
+    for batch in chunked(ids, batch_size):
+        tokens += index_objects(model, source.get_index_queryset().filter(pk__in=batch))
+    return tokens
+
+
+def search(query, entity_types=None, limit=20):
+    """
+    Returns {entity_type: [objects]} matching every term of ``query`` as a word prefix,
+    at most ``limit`` per type. Each type is one index range scan plus one fetch.
+    """
+    terms = sorted((term for term in tokenize(query) if len(term) >= MIN_TERM_LENGTH), key=len, reverse=True)
+    results = {}
+    if not terms:
+        return results
+    for entity_type in entity_types or SOURCES:
+        source = SOURCES[entity_type]
+        # Start from the longest (most selective) term; every other term must match the same entity.
+        # Tokens are stored lower-cased; istartswith is a plain LIKE 'term%' that MySQL serves
+        # from the index (startswith would be LIKE BINARY, which can't use it).
+        matches = SearchToken.objects.filter(entity_type=entity_type, token__istartswith=terms[0])
+        for term in terms[1:]:
+            matches = matches.filter(Exists(SearchToken.objects.filter(
+                entity_type=entity_type, entity_id=OuterRef("entity_id"), token__istartswith=term
+            )))
+        ids = list(matches.values_list("entity_id", flat=True).distinct()[:limit])
+        if ids:
+            objects = source.get_queryset().in_bulk(ids)
+            results[entity_type] = [objects[pk] for pk in sorted(objects, reverse=True)]
+    return results
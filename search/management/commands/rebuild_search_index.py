@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from search.index import SOURCES, index_objects
+from search.models import SearchToken
+from tricksy.batching import iter_queryset_chunks
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global search index (search_tokens) from bookings, customers and cleaners."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--type", choices=list(SOURCES), action="append", dest="types",
+                            help="Only rebuild this entity type (repeatable).")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for entity_type in options["types"] or list(SOURCES):
+            source = SOURCES[entity_type]
+            objects = tokens = 0
+            for chunk in iter_queryset_chunks(source.get_index_queryset(), options["chunk_size"]):
+                with transaction.atomic():
+                    tokens += index_objects(source.model, chunk)
+                objects += len(chunk)
+            # Tokens of rows deleted without signals (QuerySet.update()/raw SQL, restores...)
+            SearchToken.objects.filter(entity_type=entity_type).exclude(
+                Exists(source.model.objects.filter(pk=OuterRef("entity_id")))
+            ).delete()
+            self.stdout.write(self.style.SUCCESS(f"Indexed {objects} {source.label.lower()} ({tokens} tokens)."))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=64)),
+                (
+                    "entity_type",
+                    models.CharField(
+                        choices=[
+                            ("booking", "Booking"),
+                            ("customer", "Customer"),
+                            ("cleaner", "Cleaner"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("entity_id", models.PositiveBigIntegerField()),
+            ],
+            options={
+                "db_table": "search_tokens",
+                "indexes": [
+                    models.Index(
+                        fields=["token", "entity_type", "entity_id"],
+                        name="search_tokens_token_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entity_type", "entity_id", "token"),
+                        name="search_tokens_entity_token_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import models
+
+
+class SearchToken(models.Model):
+    """
+    Inverted index for the global search: one row per (token, entity).
+    A query term is a prefix range scan on ``token`` instead of a %LIKE% table scan.
+    """
+    BOOKING = "booking"
+    CUSTOMER = "customer"
+    CLEANER = "cleaner"
+    ENTITY_TYPES = [
+        (BOOKING, "Booking"),
+        (CUSTOMER, "Customer"),
+        (CLEANER, "Cleaner"),
+    ]
+
+    token = models.CharField(max_length=64)
+    entity_type = models.CharField(max_length=16, choices=ENTITY_TYPES)
+    entity_id = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return f"{self.token} -> {self.entity_type} #{self.entity_id}"
+
+    class Meta:
+        db_table = "search_tokens"
+        constraints = [
+            # Also serves the per-entity lookups: reindex diffs and multi-term AND checks
+            models.UniqueConstraint(fields=["entity_type", "entity_id", "token"], name="search_tokens_entity_token_uniq"),
+        ]
+        indexes = [
+            # Term lookup: token LIKE 'term%' -> entities, covered by the index
+            models.Index(fields=["token", "entity_type", "entity_id"], name="search_tokens_token_idx"),
+        ]
@@ -0,0 +1,43 @@
+# signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from booking.models import Booking, BookingCleaner
+from cleaner.models import Cleaner
+from customer.models import Customer
+from .index import index_ids, index_object, unindex_object
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Cleaner)
+def update_search_index(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Keep search_tokens in step with every save (same transaction); bulk writes call index_objects().
+    Bookings are also found by their customer's and cleaners' names: when those tokens change,
+    the bookings they appear on are reindexed.
+    """
+    if raw or not index_object(instance) or created:
+        return
+    if sender is Customer:
+        bookings = Booking.objects.filter(customer_id=instance.pk)
+        index_ids(Booking, bookings.values_list("pk", flat=True))
+    elif sender is Cleaner:
+        bookings = Booking.objects.filter(booking_cleaners__cleaner_id=instance.pk)
+        index_ids(Booking, bookings.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=BookingCleaner)
+def booking_cleaner_saved(sender, instance, raw=False, **kwargs):
+    """
+    Saves only, like the rollups: deleting writers and bulk assignments call index_ids().
+    """
+    if not raw:
+        index_ids(Booking, [instance.booking_id])
+
+
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Cleaner)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_object(instance)
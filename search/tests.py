@@ -0,0 +1,69 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from booking.autoassign import commit_assignments
+from booking.models import Booking, BookingCleaner, BookingService
+from cleaner.models import Cleaner
+from customer.models import Customer
+from service.models import Service
+
+from .index import search
+from .models import SearchToken
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            full_name="Fatima Khan", address="Marina", building="Ocean Tower", unit="1204", region="Dubai"
+        )
+        self.booking = Booking.objects.create(
+            customer=self.customer,
+            booking_reference="BK-9F3A21C0",
+            start_date=datetime.date(2026, 1, 1),
+            start_time=datetime.time(9),
+            end_date=datetime.date(2026, 1, 1),
+            end_time=datetime.time(11),
+        )
+        self.cleaner = Cleaner.objects.create(name="Joseph Mathew", company="Sparkle", vehicle_code="V12")
+
+    def test_saves_are_indexed(self):
+        self.assertEqual(search("9f3a")["booking"], [self.booking])
+        self.assertEqual(search("ocean 1204")["customer"], [self.customer])
+        self.assertEqual(search("jos spark")["cleaner"], [self.cleaner])
+        self.assertEqual(search("fatima tower", ["customer"]), {"customer": [self.customer]})
+        self.assertEqual(search("fatima sparkle"), {})
+
+    def test_updates_and_deletes_keep_the_index_in_step(self):
+        self.customer.building = "Palm Residence"
+        self.customer.save()
+        self.assertEqual(search("ocean"), {})
+        self.assertEqual(search("palm")["customer"], [self.customer])
+
+        self.cleaner.delete()
+        self.assertEqual(search("joseph"), {})
+        self.assertFalse(SearchToken.objects.filter(entity_type=SearchToken.CLEANER).exists())
+
+    def test_bookings_are_found_by_customer_and_cleaners(self):
+        self.assertEqual(search("fatima ocean 1204", ["booking"]), {"booking": [self.booking]})
+        self.assertEqual(search("joseph", ["booking"]), {})
+
+        BookingCleaner.objects.create(booking=self.booking, cleaner=self.cleaner)
+        self.assertEqual(search("joseph 9f3a")["booking"], [self.booking])
+
+        # Renames reach the bookings they appear on
+        self.cleaner.name = "Joel Mathew"
+        self.cleaner.save()
+        self.customer.full_name = "Fatima Ali"
+        self.customer.save()
+        self.assertEqual(search("joel fatima ali")["booking"], [self.booking])
+        self.assertNotIn("booking", search("joseph"))
+        self.assertNotIn("booking", search("khan"))
+
+    def test_bulk_assignments_are_indexed(self):
+        service = Service.objects.create(name="Deep Clean", duration=60, base_price=Decimal("10.00"))
+        BookingService.objects.create(booking=self.booking, service=service, number_of_cleaners=1)
+        start = Booking.combine_schedule(datetime.date(2026, 1, 1), datetime.time.min)
+        commit_assignments(start, start + datetime.timedelta(days=1))
+        self.assertEqual(search("mathew", ["booking"]), {"booking": [self.booking]})
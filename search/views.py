@@ -0,0 +1,27 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.shortcuts import render
+from django.views import View
+
+from account.mixins import resolve_request_permissions
+from .index import SOURCES, search
+
+
+class GlobalSearchView(LoginRequiredMixin, View):
+    """
+    Search box in the top menu: bookings by reference, customer or cleaner names, customers by
+    name/building/unit/region and cleaners by name/company/vehicle code, limited to what the
+    user may view.
+    """
+    template_name = "search/results.html"
+    limit = 20
+
+    def get(self, request):
+        query = request.GET.get("q", "").strip()
+        permissions = resolve_request_permissions(request)
+        entity_types = [key for key, source in SOURCES.items() if source.permission in permissions]
+        results = search(query, entity_types, limit=self.limit) if query and entity_types else {}
+        return render(request, self.template_name, {
+            "query": query,
+            "results": [(SOURCES[key], results[key]) for key in entity_types if key in results],
+            "limit": self.limit,
+        })
@@ -2,6 +2,9 @@
 ASGI config for tricksy project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it (e.g. ``uvicorn tricksy.asgi:application``) for the server-sent events at
+booking:events: each open stream is a coroutine waiting on the worker's EventBroker,
+where a WSGI worker would hold a thread per open page.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
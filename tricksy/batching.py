@@ -0,0 +1,39 @@
+# tricksy/batching.py
+# Helpers for walking large tables in bounded memory.
+from itertools import islice
+
+
+def chunked(iterable, size):
+    """
+    Yields lists of at most ``size`` items from any iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_queryset_chunks(queryset, chunk_size=1000):
+    """
+    Yields lists of rows from ``queryset`` in primary-key order, one keyset query per chunk
+    (WHERE pk > last ORDER BY pk LIMIT n). The queryset's prefetch_related() lookups run once
+    per chunk, so memory stays flat however large the table is.
+
+    Unlike QuerySet.iterator(), this doesn't rely on server-side cursors, which the MySQL
+    client doesn't have (it buffers the whole result set).
+    Works with model instances and with values() querysets that include "pk".
+    """
+    queryset = queryset.order_by("pk")
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+        last_pk = last["pk"] if isinstance(last, dict) else last.pk
+        if len(chunk) < chunk_size:
+            return
@@ -0,0 +1,48 @@
+# tricksy/cache.py
+# Versioned cache namespaces shared by every app.
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def _fresh_version():
+    # Millisecond clock, so a version lost to eviction is never reused.
+    return int(time.time() * 1000)
+
+
+def get_cache_version(namespace):
+    """
+    Returns the current version of a cache namespace.
+    The version lives in the shared cache, so every worker sees the same value.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace):
+    """
+    Invalidates everything cached under ``namespace`` by moving it to a new version.
+    """
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def versioned_key(namespace, *parts):
+    """
+    Builds a cache key that is invalidated whenever ``namespace`` is bumped.
+    """
+    suffix = ":".join(str(part) for part in parts)
+    return f"{namespace}:v{get_cache_version(namespace)}:{suffix}"
@@ -0,0 +1,98 @@
+# tricksy/choices.py
+# Select choices shared by every form of a formset, loaded once per request from a versioned cache.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceField, ModelChoiceIterator
+
+from .cache import versioned_key
+
+# Safety net for writes that bypass the signals (QuerySet.update(), raw SQL)
+CHOICES_CACHE_TIMEOUT = 300
+
+
+class CachedChoices:
+    """
+    The objects behind one select, for the lifetime of one request.
+    The first form to render or validate loads them (cache, else one query); the
+    other forms reuse the list. Invalidate with bump_cache_version(namespace).
+    """
+
+    def __init__(self, namespace, queryset, timeout=CHOICES_CACHE_TIMEOUT):
+        self.namespace = namespace
+        self.queryset = queryset
+        self.timeout = timeout
+        self._objects = None
+        self._by_pk = None
+
+    @property
+    def objects(self):
+        if self._objects is None:
+            key = versioned_key(self.namespace, "objects")
+            objects = cache.get(key)
+            if objects is None:
+                objects = list(self.queryset)
+                cache.set(key, objects, self.timeout)
+            self._objects = objects
+        return self._objects
+
+    def get(self, pk):
+        if self._by_pk is None:
+            self._by_pk = {str(obj.pk): obj for obj in self.objects}
+        return self._by_pk.get(str(pk))
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        provider = self.field.provider
+        if provider is None:
+            yield from super().__iter__()
+            return
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in provider.objects:
+            yield self.choice(obj)
+
+    def __len__(self):
+        provider = self.field.provider
+        if provider is None:
+            return super().__len__()
+        return len(provider.objects) + (1 if self.field.empty_label is not None else 0)
+
+
+class CachedModelChoiceField(ModelChoiceField):
+    """
+    ModelChoiceField that renders and validates against ``provider`` (a CachedChoices)
+    when one is set, and behaves like a plain ModelChoiceField otherwise.
+    """
+
+    iterator = CachedModelChoiceIterator
+    provider = None
+
+    def to_python(self, value):
+        if self.provider is None or value in self.empty_values:
+            return super().to_python(value)
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        obj = self.provider.get(value)
+        if obj is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return obj
+
+
+class CachedChoicesFormMixin:
+    """
+    For ModelForms using CachedModelChoiceField: the field has already checked the row
+    exists, so skip the model's own foreign-key check (one query per form).
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.update(
+            name for name, field in self.fields.items()
+            if isinstance(field, CachedModelChoiceField) and field.provider is not None
+        )
+        return exclude
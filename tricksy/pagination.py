@@ -0,0 +1,261 @@
+# tricksy/pagination.py
+# Keyset (cursor) pagination: page N costs the same as page 1 and needs no COUNT(*).
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+from .softdelete import SoftDeleteManager
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _json_default(value):
+    # Full precision: DjangoJSONEncoder truncates microseconds, which breaks keyset equality.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError("Cannot encode %r in a cursor" % type(value))
+
+
+def is_whole_table(queryset):
+    """
+    True when ``queryset`` filters nothing but what its model's soft-delete manager hides.
+    """
+    where = queryset.query.where
+    if not where:
+        return True
+    manager = queryset.model._default_manager
+    return isinstance(manager, SoftDeleteManager) and where == manager.get_queryset().query.where
+
+
+def approximate_count(queryset):
+    """
+    Cheap row estimate for a whole table (MySQL statistics), falling back to COUNT(*)
+    for filtered querysets or other backends. Soft-deleted rows awaiting the purge
+    worker are included in the estimate.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "mysql" and is_whole_table(queryset):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return row[0]
+    return queryset.count()
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+
+class KeysetPaginator:
+    """
+    Paginates ``queryset`` by a unique ordering, e.g. ("-created_at", "-id").
+    Ordering fields (model fields or annotations) must be non-null and the last one
+    unique (normally the primary key).
+    Cursors are opaque url-safe tokens holding the boundary row's ordering values.
+    """
+
+    def __init__(self, queryset, per_page, ordering=("-pk",)):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip("-") for name in self.ordering]
+        self.descending = [name.startswith("-") for name in self.ordering]
+
+    def _model_field(self, name):
+        opts = self.queryset.model._meta
+        if name == "pk":
+            return opts.pk
+        # Ordering on an annotation (e.g. an Exists() flag): decode with its output field
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return opts.get_field(name)
+
+    def _attname(self, name):
+        if name == "pk" or name in self.queryset.query.annotations:
+            return name
+        return self._model_field(name).attname
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, self._attname(name)) for name in self.fields]
+        payload = json.dumps({"v": values, "d": direction}, default=_json_default, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values, direction = payload["v"], payload["d"]
+            if direction not in (NEXT, PREVIOUS) or len(values) != len(self.fields):
+                raise InvalidCursor("Malformed cursor")
+            values = [self._model_field(name).to_python(value) for name, value in zip(self.fields, values)]
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, ValidationError) as exc:
+            raise InvalidCursor("Invalid cursor") from exc
+        return values, direction
+
+    def _seek(self, values, forward):
+        """
+        Q() selecting rows strictly after (forward) or before the boundary row:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            after = self.descending[i] != forward  # descending fields move "down"
+            lookup = "%s__%s" % (name, "gt" if after else "lt")
+            term = Q(**{lookup: values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                term &= Q(**{prev_name: prev_value})
+            condition |= term
+        return condition
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith("-") else "-" + name for name in self.ordering]
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        direction = NEXT
+        if cursor:
+            values, direction = self.decode_cursor(cursor)
+            queryset = queryset.filter(self._seek(values, forward=direction == NEXT))
+
+        if direction == NEXT:
+            rows = list(queryset.order_by(*self.ordering)[: self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[: self.per_page]
+            return KeysetPage(rows, self, has_next=has_more, has_previous=bool(cursor))
+
+        rows = list(queryset.order_by(*self._reversed_ordering())[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page][::-1]
+        return KeysetPage(rows, self, has_next=True, has_previous=has_more)
+
+
+class KeysetPaginationMixin:
+    """
+    Drop-in for ListView: replaces OFFSET pagination with cursor pagination.
+    Set ``paginate_by`` and ``keyset_ordering``; templates get ``page_obj`` with
+    ``next_cursor``/``previous_cursor``, ``pagination_query`` (other GET params)
+    and, if ``approximate_total`` is set, an estimated row count.
+    """
+    keyset_ordering = ("-pk",)
+    cursor_kwarg = "cursor"
+    approximate_total = False
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, ordering=self.get_keyset_ordering())
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET.copy()
+        params.pop(self.cursor_kwarg, None)
+        context["pagination_query"] = params.urlencode()
+        if self.approximate_total:
+            context["approximate_total"] = self.get_approximate_total()
+        return context
+
+    def get_approximate_total(self):
+        return approximate_count(self.get_queryset())
+
+
+class KeysetSearchMixin(KeysetPaginationMixin):
+    """
+    Keyset pagination plus ?q= prefix search over ``search_fields`` and a whitelisted
+    ?sort= (``sort_options``: {key: keyset ordering}). Keep each searched/sorted column
+    indexed so every page is an index range scan whatever the table size.
+    """
+    search_fields = ()
+    sort_options = {}
+    default_sort = None
+    search_kwarg = "q"
+    sort_kwarg = "sort"
+
+    def get_search_term(self):
+        return self.request.GET.get(self.search_kwarg, "").strip()
+
+    def get_sort(self):
+        sort = self.request.GET.get(self.sort_kwarg)
+        return sort if sort in self.sort_options else self.default_sort
+
+    def get_keyset_ordering(self):
+        return self.sort_options[self.get_sort()]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        term = self.get_search_term()
+        if term:
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f"{field}__istartswith": term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def get_approximate_total(self):
+        # Counting a search result could scan most of the table; only the unfiltered estimate is cheap
+        if self.get_search_term():
+            return None
+        return super().get_approximate_total()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["search_query"] = self.get_search_term()
+        context["current_sort"] = self.get_sort()
+        return context
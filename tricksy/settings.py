@@ -46,6 +46,8 @@ INSTALLED_APPS = [
     "payment",
     "service",
     "account",
+    "search",
+    "reports",
 ]
 
 MIDDLEWARE = [
@@ -70,12 +72,15 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "account.context_processors.permissions",
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = "tricksy.wsgi.application"
+# Serves the async booking event stream (booking/events.py) without a thread per open page
+ASGI_APPLICATION = "tricksy.asgi.application"
 
 
 # Database
@@ -88,6 +93,22 @@ DATABASES = {
         "USER": os.getenv('DB_USER'),
         "PASSWORD": os.getenv('DB_PASSWORD'),
         "HOST": os.getenv('DB_HOST'),
+        # Django's default for MySQL, set explicitly: the report rollups (reports/rollups.py)
+        # recompute after taking a lock and must then see what the previous holder committed
+        "OPTIONS": {"isolation_level": "read committed"},
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Role permissions (and other versioned lookups) are cached here. Use a shared
+# backend (Redis/Memcached) in production so invalidations reach every worker.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -0,0 +1,29 @@
+# tricksy/softdelete.py
+# Soft deletion: rows are hidden by setting deleted_at and purged later by a background worker.
+from django.db import models
+from django.utils import timezone
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def alive(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+
+    def mark_deleted(self):
+        """
+        One UPDATE, no cascade: the rows disappear from ``objects`` right away.
+        """
+        return self.alive().update(deleted_at=timezone.now())
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Default manager that hides soft-deleted rows. Declare a plain manager as ``all_objects``
+    for the code that must see them (the purge worker, uniqueness checks). Foreign-key access
+    (booking.customer) goes through the base manager and still finds deleted parents.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().alive()
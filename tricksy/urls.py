@@ -25,4 +25,6 @@ urlpatterns = [
     path("accounts/", include("account.urls")),
     path("payment/", include("payment.urls")),
     path("service/", include("service.urls")),
+    path("search/", include("search.urls")),
+    path("reports/", include("reports.urls")),
 ]